@@ -0,0 +1,104 @@
+# as_path.py
+"""
+Interned AS_PATHs for the BGP simulation.
+A path is a node in a parent-pointer tree (origin at the root, the last AS
+at the node itself), and a PathTable hash-conses the nodes, so every
+distinct path is stored once however many routes, RIBs and neighbors hold
+it, and extending a path by one AS is a single dict lookup.  Since equal
+paths are the same object, comparing two paths is an identity check.
+
+Each node also carries a 64-bit bloom mask of the ASNs on it: "asn in path"
+is answered from the mask when the AS is absent (the common case for loop
+prevention) and only walks the parent chain on a possible hit.
+"""
+
+from typing import Dict, Iterator, List, Optional
+
+
+def bloom_bit(asn: str) -> int:
+    """asn's bit in ASPath.bloom; callers checking many paths for one AS can test the mask themselves."""
+    return 1 << (hash(asn) & 63)
+
+
+class ASPath:
+    """Read-only AS_PATH, origin first like the list paths (len, in, iteration, indexing)."""
+    __slots__ = ("asn", "parent", "length", "bloom")
+
+    def __init__(self, asn: str, parent: Optional["ASPath"]):
+        self.asn = asn
+        self.parent = parent
+        bit = 1 << (hash(asn) & 63)
+        if parent is None:
+            self.length, self.bloom = 1, bit
+        else:
+            self.length, self.bloom = parent.length + 1, parent.bloom | bit
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __contains__(self, asn) -> bool:
+        if not self.bloom & 1 << (hash(asn) & 63):
+            return False
+        node = self
+        while node is not None:
+            if node.asn == asn:
+                return True
+            node = node.parent
+        return False
+
+    def to_list(self) -> List[str]:
+        out = []
+        node = self
+        while node is not None:
+            out.append(node.asn)
+            node = node.parent
+        out.reverse()
+        return out
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.to_list())
+
+    def __getitem__(self, index):
+        return self.to_list()[index]
+
+    def __repr__(self) -> str:
+        return f"ASPath({' '.join(self.to_list())})"
+
+
+class PathTable:
+    """Hash-consing store: one ASPath per distinct path."""
+
+    def __init__(self):
+        # asn -> {parent path (None for an origin): parent + [asn]}; keyed by the
+        # parent object itself so no key tuples are allocated
+        self._children: Dict[str, Dict[Optional[ASPath], ASPath]] = {}
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def origin(self, asn: str) -> ASPath:
+        """The one-AS path [asn]."""
+        return self.extend(None, asn)
+
+    def children(self, asn: str) -> Dict[Optional[ASPath], ASPath]:
+        """{path: path + [asn]} for the extensions by asn made so far, for lookups in bulk; add through extend."""
+        return self._children.get(asn) or {}
+
+    def extend(self, path: Optional[ASPath], asn: str) -> ASPath:
+        """The path + [asn], created on first use."""
+        children = self._children.get(asn)
+        if children is None:
+            children = self._children[asn] = {}
+        node = children.get(path)
+        if node is None:
+            node = children[path] = ASPath(asn, path)
+            self._count += 1
+        return node
+
+    def intern(self, path: List[str]) -> ASPath:
+        """Interned form of a list path."""
+        node = None
+        for asn in path:
+            node = self.extend(node, asn)
+        return node
@@ -0,0 +1,155 @@
+# bench_bgp.py
+"""
+BGP convergence benchmark on random power-law AS graphs: synchronous
+full-table rounds versus the event-driven adj-RIB-in mode. Reports time,
+rounds, UPDATE messages and routes (prefix entries) sent, and checks both
+modes produce the same tables.
+
+The memory mode compares the traced size of the final RIBs with one list
+per route (as the rounds mode stores them) against interned AS_PATHs.
+Sharing grows with the number of prefixes each origin announces.
+
+The aggregate mode compares per-prefix propagation with per-origin
+aggregation (simulate_bgp(..., aggregate=True)) for origins announcing many
+prefixes each: time, peak traced memory, and equal tables.
+
+The policy mode loads a CAIDA as-rel file (or writes a synthetic one of the
+same shape, about 75k ASes) and times the policy-aware simulation of
+prefixes originated by random ASes.
+
+Usage: python bench_bgp.py [n_ases n_prefixes] ...   (e.g. 1000 1000 5000 2000)
+       python bench_bgp.py memory [n_ases n_prefixes [n_origins]]
+       python bench_bgp.py aggregate [n_ases n_origins per_origin]
+       python bench_bgp.py policy [as-rel file | n_ases] [n_prefixes]
+The rounds mode is skipped above 1,000,000 AS x prefix table entries.
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+
+import networkx as nx
+from bgp_policy import load_caida_relationships
+from bgp_sim import simulate_bgp
+from topologies import aslevel
+
+ROUNDS_LIMIT = 1_000_000
+
+
+def random_as_graph(n: int, seed: int = 1) -> nx.DiGraph:
+    """Barabasi-Albert graph of n ASes "AS0".."ASn-1", each link directed one way."""
+    G = nx.barabasi_albert_graph(n, 2, seed=seed)
+    return nx.DiGraph((f"AS{u}", f"AS{v}") for u, v in G.edges())
+
+
+def random_origins(graph: nx.DiGraph, n_prefixes: int, n_origins: Optional[int] = None,
+                   seed: int = 1) -> Dict[str, List[str]]:
+    """n_prefixes distinct /24s, each originated by one of n_origins random ASes (default: any AS)."""
+    rng = random.Random(seed)
+    nodes = list(graph.nodes())
+    if n_origins is not None:
+        nodes = rng.sample(nodes, min(n_origins, len(nodes)))
+    origins = {}
+    for i in range(n_prefixes):
+        origins.setdefault(rng.choice(nodes), []).append(f"{10 + (i >> 16)}.{i >> 8 & 255}.{i & 255}.0/24")
+    return origins
+
+
+def run(cases):
+    print(f"{'ASes':>7} {'prefixes':>9} {'mode':<7} {'seconds':>9} {'rounds':>7} {'messages':>10} {'routes':>13}")
+    for n, n_prefixes in cases:
+        G = random_as_graph(n)
+        origins = random_origins(G, n_prefixes)
+        results = {}
+        for mode in ("rounds", "event"):
+            if mode == "rounds" and n * n_prefixes > ROUNDS_LIMIT:
+                continue
+            stats = {}
+            t0 = time.perf_counter()
+            results[mode] = simulate_bgp(G, origins, max_iters=1000, mode=mode, stats=stats)
+            elapsed = time.perf_counter() - t0
+            print(f"{n:>7} {n_prefixes:>9} {mode:<7} {elapsed:>9.2f} {stats['rounds']:>7} "
+                  f"{stats['messages']:>10,} {stats['routes']:>13,}")
+        tables = list(results.values())
+        assert all(t == tables[0] for t in tables), "modes disagree"
+        del results, tables
+
+
+def memory(n: int, n_prefixes: int, n_origins: Optional[int] = None):
+    G = random_as_graph(n)
+    origins = random_origins(G, n_prefixes, n_origins)
+    stats = {}
+    tracemalloc.start()
+    interned = simulate_bgp(G, origins, max_iters=1000, mode="event", stats=stats, interned=True)
+    interned_bytes = tracemalloc.get_traced_memory()[0]
+    before = interned_bytes
+    lists = {asn: {prefix: path.to_list() for prefix, path in table.items()} for asn, table in interned.items()}
+    list_bytes = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    routes = sum(len(table) for table in lists.values())
+    print(f"{n} ASes, {n_prefixes} prefixes from {len(origins)} origins: "
+          f"{routes:,} routes, {stats['paths']:,} distinct AS_PATHs")
+    for label, size in (("lists", list_bytes), ("interned", interned_bytes)):
+        print(f"{label:<9} {size / 2**20:>9.1f} MB {size / routes:>7.1f} B/route")
+
+
+def aggregate(n: int, n_origins: int, per_origin: int):
+    G = random_as_graph(n)
+    origins = random_origins(G, n_origins * per_origin, n_origins)
+    print(f"{n} ASes, {len(origins)} origins, {n_origins * per_origin:,} prefixes")
+    results = {}
+    for label, flag in (("per-prefix", False), ("aggregate", True)):
+        t0 = time.perf_counter()
+        results[label] = simulate_bgp(G, origins, max_iters=1000, mode="event", aggregate=flag)
+        elapsed = time.perf_counter() - t0
+        tracemalloc.start()
+        simulate_bgp(G, origins, max_iters=1000, mode="event", aggregate=flag)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{label:<11} {elapsed:>8.2f}s {peak / 2**20:>9.1f} MB peak")
+    assert results["aggregate"] == results["per-prefix"], "aggregated tables differ"
+
+
+def write_synthetic_relationships(path: str, n: int, seed: int = 1):
+    """CAIDA-format as-rel file for topologies.aslevel(n)."""
+    with open(path, "w") as f:
+        f.write("# synthetic as-rel: <provider>|<customer>|-1, <peer>|<peer>|0\n")
+        for u, v, rel in aslevel(n, seed=seed).edges(data='rel'):
+            f.write(f"{u[2:]}|{v[2:]}|{rel}\n")
+
+
+def policy(source: str, n_prefixes: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        if os.path.exists(source):
+            path = source
+        else:
+            path = os.path.join(tmp, "as-rel.txt")
+            write_synthetic_relationships(path, int(source))
+        t0 = time.perf_counter()
+        G = load_caida_relationships(path)
+        loaded = time.perf_counter() - t0
+    print(f"{G.number_of_nodes():,} ASes, {G.number_of_edges():,} links loaded in {loaded:.1f}s")
+    origins = random_origins(G, n_prefixes)
+    stats = {}
+    t0 = time.perf_counter()
+    tables = simulate_bgp(G, origins, max_iters=1000, mode="policy", stats=stats, interned=True)
+    elapsed = time.perf_counter() - t0
+    routes = sum(len(table) for table in tables.values())
+    print(f"{n_prefixes} prefixes: {elapsed:.1f}s, {stats['rounds']} rounds, {stats['messages']:,} messages, "
+          f"{stats['routes']:,} routes sent, {routes:,} installed")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "policy":
+        policy(sys.argv[2] if len(sys.argv) > 2 else "75000", int(sys.argv[3]) if len(sys.argv) > 3 else 20)
+    elif len(sys.argv) > 1 and sys.argv[1] == "aggregate":
+        aggregate(*map(int, sys.argv[2:5])) if len(sys.argv) > 4 else aggregate(1000, 50, 100)
+    elif len(sys.argv) > 1 and sys.argv[1] == "memory":
+        memory(*map(int, sys.argv[2:5])) if len(sys.argv) > 3 else memory(1000, 10000, 1000)
+    else:
+        args = [int(a) for a in sys.argv[1:]]
+        run(list(zip(args[::2], args[1::2])) or [(200, 200), (1000, 1000), (5000, 2000)])
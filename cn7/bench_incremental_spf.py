@@ -0,0 +1,75 @@
+# bench_incremental_spf.py
+"""
+Incremental SPF benchmark: random single-link events (cost up, cost down,
+link down, link up) on random connected topologies, each applied with
+incremental_spf.apply_link_event and compared against a full simulate_ospf
+recompute (csgraph backend, the fastest full run).  Every event is checked:
+costs must agree and every next hop must start an equal-cost shortest path.
+
+Usage: python bench_incremental_spf.py [n_routers [events]]
+"""
+
+import random
+import sys
+import time
+
+from bench_rip import random_topology
+from incremental_spf import LinkEvent, apply_link_event
+from ospf_sim import simulate_ospf
+
+
+def check(G, reference, tables):
+    """Costs agree with reference and every next hop starts an equal-cost shortest path."""
+    for router, table in reference.items():
+        other = tables[router]
+        assert table.keys() == other.keys(), f"{router}: destinations differ"
+        for dest, (cost, next_hop) in table.items():
+            other_cost, other_hop = other[dest]
+            assert abs(cost - other_cost) < 1e-9, f"{router}->{dest}: cost {cost} != {other_cost}"
+            if other_hop != next_hop:
+                via = G.edges[router, other_hop].get('weight', 1) + reference[other_hop][dest][0]
+                assert abs(via - cost) < 1e-9, f"{router}->{dest}: next hop {other_hop} is not on a shortest path"
+
+
+def random_event(G, rng: random.Random, downed: list) -> LinkEvent:
+    """Random single-link event; links taken down are the ones brought back up."""
+    kind = rng.choice(("raise", "lower", "down", "up") if downed else ("raise", "lower", "down"))
+    if kind == "up":
+        u, v, w = downed.pop(rng.randrange(len(downed)))
+        return LinkEvent("up", u, v, w)
+    u, v, w = rng.choice(list(G.edges(data='weight', default=1)))
+    if kind == "down":
+        downed.append((u, v, w))
+        return LinkEvent("down", u, v)
+    return LinkEvent("cost", u, v, w + rng.randint(1, 10) if kind == "raise" else max(1, w - rng.randint(1, 10)))
+
+
+def run(n: int, events: int, seed: int = 1):
+    G = random_topology(n, seed=seed)
+    rng = random.Random(seed)
+    tables = simulate_ospf(G, backend="csgraph")
+    downed = []
+    incremental = full = 0.0
+    changed = 0
+    print(f"{'event':<6} {'link':<16} {'changed':>9} {'incr ms':>9} {'full ms':>9}")
+    for _ in range(events):
+        event = random_event(G, rng, downed)
+        t0 = time.perf_counter()
+        changes = apply_link_event(G, tables, event)
+        t1 = time.perf_counter()
+        reference = simulate_ospf(G, backend="csgraph")
+        t2 = time.perf_counter()
+        check(G, reference, tables)
+        entries = sum(len(delta) for delta in changes.values())
+        incremental += t1 - t0
+        full += t2 - t1
+        changed += entries
+        link = f"{event.u}-{event.v}"
+        print(f"{event.kind:<6} {link:<16} {entries:>9,} {(t1 - t0) * 1e3:>9.1f} {(t2 - t1) * 1e3:>9.1f}")
+    print(f"{n} routers, {events} events: {changed:,} entries changed, "
+          f"incremental {incremental:.2f}s, full recompute {full:.2f}s ({full / incremental:.0f}x)")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    run(args[0] if args else 1000, args[1] if len(args) > 1 else 20)
@@ -0,0 +1,69 @@
+# bench_render.py
+"""
+Topology rendering benchmark: the per-artist networkx drawing swv.py used
+(spring layout from scratch, every edge label) against render.draw_graph,
+with a cold and a warm layout cache, on random topologies.  The "pool" row
+renders four images with render_all in one process per CPU.
+
+Usage: python bench_render.py [n_routers ...]   (e.g. 200 1000 20000)
+The networkx path is skipped above 1000 routers.
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import networkx as nx
+from bench_rip import random_topology
+from render import draw_graph, render_all
+
+NETWORKX_LIMIT = 1000
+
+
+def draw_networkx(graph: nx.Graph, path: Path, title: str):
+    """The networkx drawing swv.py did per graph before render.py."""
+    import matplotlib.pyplot as plt
+    plt.figure(figsize=(6, 4))
+    pos = nx.spring_layout(graph, seed=42)
+    nx.draw_networkx_nodes(graph, pos, node_size=700)
+    nx.draw_networkx_labels(graph, pos)
+    nx.draw_networkx_edges(graph, pos)
+    edge_labels = {(u, v): graph.edges[u, v].get('weight', 1) for u, v in graph.edges()}
+    nx.draw_networkx_edge_labels(graph, pos, edge_labels=edge_labels)
+    plt.title(title)
+    plt.axis('off')
+    plt.tight_layout()
+    plt.savefig(path, dpi=200)
+    plt.close()
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - t0
+
+
+def run(sizes):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot  # noqa: F401  (not timed)
+    workers = os.cpu_count() or 1
+    print(f"{'routers':>8} {'renderer':<14} {'seconds':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        for n in sizes:
+            G = random_topology(n)
+            if n <= NETWORKX_LIMIT:
+                print(f"{n:>8} {'networkx':<14} {timed(draw_networkx, G, tmp / 'a.png', 'bench'):>9.2f}")
+            cache = tmp / f"layouts{n}"
+            print(f"{n:>8} {'cold cache':<14} {timed(draw_graph, G, tmp / 'b.png', 'bench', cache):>9.2f}")
+            print(f"{n:>8} {'warm cache':<14} {timed(draw_graph, G, tmp / 'c.png', 'bench', cache):>9.2f}")
+            jobs = [(G, tmp / f"p{i}.png", "bench") for i in range(4)]
+            print(f"{n:>8} {'serial x4':<14} {timed(render_all, jobs, cache, 1):>9.2f}")
+            print(f"{n:>8} {f'pool/{workers} x4':<14} {timed(render_all, jobs, cache, max(2, workers)):>9.2f}")
+
+
+if __name__ == "__main__":
+    run([int(a) for a in sys.argv[1:]] or [200, 1000, 10000])
@@ -0,0 +1,70 @@
+# bench_spf.py
+"""
+SPF benchmark for the link-state simulators: per-router networkx Dijkstra
+versus the all-pairs csgraph engine on random connected topologies.
+Reports time and peak traced memory (tracemalloc, which numpy reports to),
+and checks that the csgraph tables are identical to networkx's.
+
+"arrays" rows time spf_engine.spf_arrays alone (no dict tables), the form
+to use for very large topologies. "pool/N" rows run the csgraph tables with
+N worker processes (one per CPU, at least two).
+
+Usage: python bench_spf.py [n_routers ...]
+networkx is skipped above 2000 routers and dict tables above 5000.
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+from bench_rip import random_topology
+from ospf_sim import simulate_ospf
+from spf_engine import spf_arrays
+
+NETWORKX_LIMIT = 2000
+TABLES_LIMIT = 5000
+WORKERS = max(2, os.cpu_count() or 1)
+
+
+def measure(fn, *args):
+    """(result, seconds, peak bytes); memory is traced in a second run, tracing skews timing."""
+    t0 = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - t0
+    tracemalloc.start()
+    fn(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def check(reference, tables):
+    assert list(tables) == list(reference), "routers differ"
+    for router, table in reference.items():
+        assert list(tables[router].items()) == list(table.items()), f"{router}: table differs"
+
+
+def run(sizes):
+    print(f"{'routers':>8} {'backend':<9} {'seconds':>9} {'peak MB':>9}")
+    for n in sizes:
+        G = random_topology(n)
+        reference = None
+        if n <= NETWORKX_LIMIT:
+            reference, elapsed, peak = measure(simulate_ospf, G)
+            print(f"{n:>8} {'networkx':<9} {elapsed:>9.2f} {peak / 2**20:>9.1f}")
+        if n <= TABLES_LIMIT:
+            tables, elapsed, peak = measure(simulate_ospf, G, "csgraph")
+            print(f"{n:>8} {'csgraph':<9} {elapsed:>9.2f} {peak / 2**20:>9.1f}")
+            if reference is not None:
+                check(reference, tables)
+            pooled, elapsed, peak = measure(simulate_ospf, G, "csgraph", WORKERS)
+            print(f"{n:>8} {f'pool/{WORKERS}':<9} {elapsed:>9.2f} {peak / 2**20:>9.1f}")
+            assert pooled == tables, "pooled tables differ"
+            del tables, pooled
+        _, elapsed, peak = measure(spf_arrays, G)
+        print(f"{n:>8} {'arrays':<9} {elapsed:>9.2f} {peak / 2**20:>9.1f}")
+
+
+if __name__ == "__main__":
+    run([int(a) for a in sys.argv[1:]] or [500, 2000, 10000])
@@ -0,0 +1,177 @@
+# bench_suite.py
+"""
+Scaling benchmark for every routing engine on synthetic topologies (see
+topologies.py): RIP, OSPF and IS-IS on the router-level graphs, BGP on the
+AS-level graph.  Each run records wall time, peak traced memory, rounds to
+convergence and messages exchanged, and the results are written to
+sim_outputs/bench_results.json and sim_outputs/bench_results.csv (next to
+this script, wherever it is run from).
+
+Link-state engines compute tables directly, so they report no rounds; their
+messages are the LSAs a flood needs, each router's LSA crossing every link
+once except back towards where it came from: n * (2m - (n - 1)).
+
+The results are compared with sim_outputs/bench_baseline.json (committed,
+from "baseline 10 100"; runs it lacks are not compared): a run is a
+regression when its time or memory grows by more than TOLERANCE (and by
+more than the noise floor), and a change when rounds or messages differ,
+which for these deterministic topologies means the algorithm changed.
+
+Usage: python bench_suite.py [topology ...] [size ...]   (e.g. grid ba 1000 10000)
+       python bench_suite.py baseline [topology ...] [size ...]
+The baseline mode runs the suite and stores it as the new baseline.
+Engines are skipped above their LIMITS; other engines run up to 100k nodes.
+"""
+
+import csv
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from bench_bgp import random_origins
+from routing import engines, get_engine
+from topologies import TOPOLOGIES, generate
+
+OUT_DIR = Path(__file__).resolve().parent / "sim_outputs"
+RESULTS = OUT_DIR / "bench_results"
+BASELINE = OUT_DIR / "bench_baseline.json"
+FIELDS = ("topology", "size", "nodes", "links", "protocol", "engine",
+          "seconds", "peak_mb", "rounds", "messages")
+
+PROTOCOLS = {"waxman": ("rip", "ospf", "isis"), "ba": ("rip", "ospf", "isis"),
+             "fattree": ("rip", "ospf", "isis"), "grid": ("rip", "ospf", "isis"),
+             "aslevel": ("bgp",)}
+# largest topology per engine; dict tables are n^2 entries, the reference engines are O(n^2) or worse
+LIMITS = {("rip", "reference"): 300, ("rip", "triggered"): 5000, ("rip", "matrix"): 5000,
+          ("ospf", "reference"): 2000, ("ospf", "csgraph"): 5000,
+          ("isis", "reference"): 2000, ("isis", "csgraph"): 5000,
+          ("bgp", "reference"): 1000}
+DEFAULT_LIMIT = 100_000
+BGP_PREFIXES = 20
+TOLERANCE = 0.2
+NOISE = {"seconds": 0.1, "peak_mb": 1.0}
+
+
+def engine_options(protocol: str) -> Dict:
+    """Fresh keyword arguments for one run; the vector engines fill in a stats dict."""
+    return {"max_iters": 1000, "stats": {}} if protocol in ("rip", "bgp") else {}
+
+
+def bench(protocol: str, engine: str, G, origins) -> Dict:
+    """seconds, peak_mb, rounds and messages of one engine on G; memory is traced in a second run."""
+    simulate = get_engine(protocol, engine)
+    args = (G, origins) if protocol == "bgp" else (G,)
+    kwargs = engine_options(protocol)
+    t0 = time.perf_counter()
+    simulate(*args, **kwargs)
+    elapsed = time.perf_counter() - t0
+    stats = kwargs.get("stats", {})
+    tracemalloc.start()
+    simulate(*args, **engine_options(protocol))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    n, m = G.number_of_nodes(), G.number_of_edges()
+    if protocol in ("ospf", "isis"):
+        rounds, messages = None, n * (2 * m - (n - 1))
+    else:
+        # the RIP matrix engine only counts rounds
+        rounds, messages = stats.get("rounds"), stats.get("messages")
+    return {"seconds": round(elapsed, 4), "peak_mb": round(peak / 2**20, 2),
+            "rounds": rounds, "messages": messages}
+
+
+def warm_up(protocols):
+    """Run every engine once on a tiny graph so lazy imports (NumPy, SciPy) are not timed."""
+    for protocol in protocols:
+        G = generate("aslevel" if protocol == "bgp" else "grid", 9)
+        for engine in engines(protocol):
+            bench(protocol, engine, G, random_origins(G, 2) if protocol == "bgp" else None)
+
+
+def run(topologies: List[str], sizes: List[int]) -> List[Dict]:
+    warm_up(dict.fromkeys(p for topology in topologies for p in PROTOCOLS[topology]))
+    print(f"{'topology':<9} {'nodes':>7} {'protocol':<8} {'engine':<10} {'seconds':>9} {'peak MB':>9} "
+          f"{'rounds':>7} {'messages':>13}")
+    results = []
+    for topology in topologies:
+        for size in sizes:
+            G = generate(topology, size)
+            n = G.number_of_nodes()
+            for protocol in PROTOCOLS[topology]:
+                origins = random_origins(G, BGP_PREFIXES) if protocol == "bgp" else None
+                for engine in engines(protocol):
+                    if n > LIMITS.get((protocol, engine), DEFAULT_LIMIT):
+                        continue
+                    record = {"topology": topology, "size": size, "nodes": n, "links": G.number_of_edges(),
+                              "protocol": protocol, "engine": engine}
+                    record.update(bench(protocol, engine, G, origins))
+                    results.append(record)
+                    rounds = "-" if record["rounds"] is None else record["rounds"]
+                    messages = "-" if record["messages"] is None else f"{record['messages']:,}"
+                    print(f"{topology:<9} {n:>7} {protocol:<8} {engine:<10} {record['seconds']:>9.3f} "
+                          f"{record['peak_mb']:>9.1f} {rounds:>7} {messages:>13}")
+    return results
+
+
+def save(results: List[Dict], path: Path):
+    """results as path.json and path.csv (empty cells for missing rounds/messages)."""
+    path.with_suffix(".json").write_text(json.dumps(results, indent=2))
+    with open(path.with_suffix(".csv"), "w", newline="") as f:
+        writer = csv.DictWriter(f, FIELDS)
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def run_key(record: Dict) -> Tuple:
+    """What identifies a run across result files."""
+    return record["topology"], record["size"], record["protocol"], record["engine"]
+
+
+def compare(results: List[Dict], baseline: List[Dict]) -> int:
+    """Print the runs that regressed or changed against baseline; returns how many."""
+    before = {run_key(r): r for r in baseline}
+    problems = 0
+    matched = 0
+    for record in results:
+        old = before.get(run_key(record))
+        if old is None:
+            continue
+        matched += 1
+        notes = []
+        for field, noise in NOISE.items():
+            if record[field] > old[field] * (1 + TOLERANCE) and record[field] - old[field] > noise:
+                notes.append(f"{field} {old[field]} -> {record[field]}")
+        for field in ("nodes", "rounds", "messages"):
+            if record[field] != old[field]:
+                notes.append(f"{field} changed {old[field]} -> {record[field]}")
+        if notes:
+            problems += 1
+            print(f"REGRESSION {' '.join(map(str, run_key(record)))}: {'; '.join(notes)}")
+    print(f"{matched} runs compared with {BASELINE}, {problems} regressed or changed")
+    return problems
+
+
+def parse(args: List[str]) -> Tuple[List[str], List[int]]:
+    """(topologies, sizes) from command-line words; all topologies and 10, 100, 1000 by default."""
+    topologies = [a for a in args if not a.isdigit()]
+    for name in topologies:
+        if name not in TOPOLOGIES:
+            raise ValueError(f"Unknown topology: {name}")
+    sizes = [int(a) for a in args if a.isdigit()]
+    return topologies or list(TOPOLOGIES), sizes or [10, 100, 1000]
+
+
+if __name__ == "__main__":
+    OUT_DIR.mkdir(exist_ok=True)
+    if sys.argv[1:2] == ["baseline"]:
+        BASELINE.write_text(json.dumps(run(*parse(sys.argv[2:])), indent=2))
+        print(f"baseline written to {BASELINE}")
+    else:
+        results = run(*parse(sys.argv[1:]))
+        save(results, RESULTS)
+        print(f"results written to {RESULTS}.json and {RESULTS}.csv")
+        if BASELINE.exists():
+            sys.exit(1 if compare(results, json.loads(BASELINE.read_text())) else 0)
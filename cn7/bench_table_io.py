@@ -0,0 +1,64 @@
+# bench_table_io.py
+"""
+Routing-table output benchmark: the indented JSON string the demos used to
+write (json.dumps, indent=2) against the table_io formats, for the
+all-pairs OSPF tables of random topologies.  Reports write time, peak
+traced memory while writing (on top of the tables themselves), file size,
+and the time to read back the first router (as r.py does) and everything.
+
+Usage: python bench_table_io.py [n_routers ...]   (e.g. 1000 3000)
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from bench_rip import random_topology
+from ospf_sim import simulate_ospf
+from table_io import first_table, load_tables, save_tables
+
+FORMATS = ("json-string", "json", "jsonl", "rtb", "rtb-zlib")
+
+
+def write(tables, path: Path, fmt: str):
+    if fmt == "json-string":
+        import json
+        path.write_text(json.dumps(tables, indent=2))
+    else:
+        save_tables(tables, path, compress=fmt == "rtb-zlib")
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - t0
+
+
+def run(sizes):
+    print(f"{'routers':>8} {'format':<12} {'write s':>8} {'peak MB':>8} {'file MB':>8} "
+          f"{'first s':>8} {'load s':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            tables = simulate_ospf(random_topology(n), "csgraph")
+            for fmt in FORMATS:
+                suffix = {"json-string": ".json", "rtb-zlib": ".rtb"}.get(fmt, "." + fmt)
+                path = Path(tmp) / f"tables{suffix}"
+                _, elapsed = timed(write, tables, path, fmt)
+                tracemalloc.start()
+                write(tables, path, fmt)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                first, first_s = timed(first_table, path)
+                loaded, load_s = timed(load_tables, path)
+                assert first[0] == next(iter(tables)) and len(loaded) == len(tables)
+                del loaded
+                print(f"{n:>8} {fmt:<12} {elapsed:>8.2f} {peak / 2**20:>8.1f} "
+                      f"{os.path.getsize(path) / 2**20:>8.1f} {first_s:>8.4f} {load_s:>8.2f}")
+            del tables
+
+
+if __name__ == "__main__":
+    run([int(a) for a in sys.argv[1:]] or [500, 2000])
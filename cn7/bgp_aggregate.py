@@ -0,0 +1,87 @@
+# bgp_aggregate.py
+"""
+Per-origin aggregation for the BGP simulation (simulate_bgp(..., aggregate=True)).
+Routing never looks at the prefix itself, only at which ASes originate it,
+so all prefixes with the same set of origins take the same paths in every
+mode.  Each such class is propagated once, under its first prefix, and the
+per-prefix tables are expanded lazily: AggregatedTables[asn] is a read-only
+mapping that answers table[prefix] from the class's route.
+
+The views compare equal to the per-prefix tables and can be passed to
+table_io.save_tables as they are; call to_dict() for plain dicts (json).
+Iteration lists each class's prefixes together, in the order they were
+given, which is also the per-prefix order unless an origin interleaves
+prefixes of different origin sets (multi-origin prefixes).
+"""
+
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Tuple
+
+
+def prefix_classes(origin_prefixes: Dict[str, List[str]]) -> Tuple[Dict[str, List[str]], Dict[str, List[str]]]:
+    """
+    (representative origin_prefixes, members): every prefix is replaced by the
+    first prefix with the same origins, and members maps that representative
+    to all the prefixes of its class.
+    """
+    origins_of: Dict[str, Tuple[str, ...]] = {}
+    for origin, prefixes in origin_prefixes.items():
+        for prefix in prefixes:
+            seen = origins_of.get(prefix, ())
+            if origin not in seen:
+                origins_of[prefix] = seen + (origin,)
+    rep_of_class: Dict[Tuple[str, ...], str] = {}
+    members: Dict[str, List[str]] = {}
+    for prefix, origins in origins_of.items():
+        rep = rep_of_class.setdefault(origins, prefix)
+        members.setdefault(rep, []).append(prefix)
+    reps = {origin: list(dict.fromkeys(rep_of_class[origins_of[p]] for p in prefixes))
+            for origin, prefixes in origin_prefixes.items()}
+    return reps, members
+
+
+class AggregatedTable(Mapping):
+    """One AS's prefix -> AS_PATH table, backed by its per-class routes."""
+
+    def __init__(self, routes: Dict, members: Dict[str, List[str]], rep_of: Dict[str, str]):
+        self._routes = routes
+        self._members = members
+        self._rep_of = rep_of
+
+    def __getitem__(self, prefix: str):
+        rep = self._rep_of.get(prefix)
+        if rep is None or rep not in self._routes:
+            raise KeyError(prefix)
+        return self._routes[rep]
+
+    def __iter__(self) -> Iterator[str]:
+        for rep in self._routes:
+            yield from self._members[rep]
+
+    def __len__(self) -> int:
+        return sum(len(self._members[rep]) for rep in self._routes)
+
+    def to_dict(self) -> Dict:
+        return dict(self)
+
+
+class AggregatedTables(Mapping):
+    """asn -> AggregatedTable for the per-class tables of an aggregated run."""
+
+    def __init__(self, tables: Dict[str, Dict], members: Dict[str, List[str]]):
+        self._tables = tables
+        self._members = members
+        self._rep_of = {prefix: rep for rep, prefixes in members.items() for prefix in prefixes}
+
+    def __getitem__(self, asn: str) -> AggregatedTable:
+        return AggregatedTable(self._tables[asn], self._members, self._rep_of)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._tables)
+
+    def __len__(self) -> int:
+        return len(self._tables)
+
+    def to_dict(self) -> Dict[str, Dict]:
+        """The per-prefix tables as plain dicts, as simulate_bgp returns them without aggregate."""
+        return {asn: self[asn].to_dict() for asn in self._tables}
@@ -0,0 +1,251 @@
+# bgp_policy.py
+"""
+Policy-aware BGP for the simulation (simulate_bgp(..., mode="policy")).
+Edges of the AS graph carry CAIDA-style business relationships in a 'rel'
+attribute: for an edge (u, v), -1 means u is v's provider, 0 that u and v
+are peers and 1 that u is v's customer.  Edges without one are peerings.
+
+Best-path selection, in order:
+  1. highest local-pref: routes from customers, then peers, then providers
+  2. shortest AS_PATH
+  3. lowest MED (the link's 'med' attribute, default 0; compared across
+     neighbors, as with always-compare-med)
+  4. the neighbor listed first
+Export follows Gao-Rexford: our own and customer routes go to everyone,
+peer and provider routes only to customers (peers and providers get a
+WITHDRAW when a route they hold stops qualifying).
+
+Selection is incremental: a better candidate is compared with the current
+best only, and a prefix that loses its best route gets a heap of its
+candidates (built once from the adj-RIB-in, then kept up to date with lazy
+deletion), so re-selection is O(log degree) rather than a rescan of every
+neighbor of a tier-1 AS.
+"""
+
+from heapq import heapify, heappop, heappush
+from typing import Dict, List, Optional, Tuple
+
+import networkx as nx
+from as_path import ASPath, PathTable, bloom_bit
+from bgp_sim import BGPNode, _current_paths, _longer
+from convergence import ConvergenceMetrics, bgp_update_bytes
+
+CUSTOMER, PEER, PROVIDER = "customer", "peer", "provider"
+LOCAL_PREF = {CUSTOMER: 200, PEER: 100, PROVIDER: 50}
+
+Key = Tuple[int, int, int, int]  # (-local_pref, AS_PATH length, MED, neighbor rank)
+
+
+def _link(as_graph: nx.DiGraph, asn: str, nbr: str) -> Dict:
+    """Attributes of the link between asn and nbr, whichever way it is stored."""
+    data = as_graph.get_edge_data(asn, nbr)
+    return as_graph.edges[nbr, asn] if data is None else data
+
+
+def relationship(as_graph: nx.DiGraph, asn: str, nbr: str) -> str:
+    """What nbr is to asn: CUSTOMER, PEER or PROVIDER."""
+    data = as_graph.get_edge_data(asn, nbr)
+    if data is not None:
+        rel = data.get('rel', 0)
+        return CUSTOMER if rel == -1 else PROVIDER if rel == 1 else PEER
+    rel = as_graph.edges[nbr, asn].get('rel', 0)
+    return PROVIDER if rel == -1 else CUSTOMER if rel == 1 else PEER
+
+
+def load_caida_relationships(path: str, prefix: str = "AS") -> nx.DiGraph:
+    """
+    AS graph from a CAIDA as-rel file ("<a>|<b>|<rel>[|<source>]" lines, '#'
+    comments): rel -1 is a provider-to-customer link, 0 a peering.  Nodes
+    are named prefix + ASN to match the rest of the simulation.
+    """
+    edges = []
+    with open(path) as f:
+        for line in f:
+            if line.startswith("#") or not line.strip():
+                continue
+            a, b, rel = line.split("|", 3)[:3]
+            rel = int(rel)
+            if rel not in (-1, 0):
+                raise ValueError(f"Unknown AS relationship {rel} in line: {line.strip()}")
+            edges.append((prefix + a, prefix + b, {'rel': rel}))
+    G = nx.DiGraph()
+    G.add_edges_from(edges)
+    return G
+
+
+class PolicyBGPNode(BGPNode):
+    def __init__(self, asn: str, neighbors: List[str], as_graph: nx.DiGraph):
+        super().__init__(asn, neighbors)
+        # per neighbor rank: role, -local_pref and MED of the link
+        self.roles = [relationship(as_graph, asn, nbr) for nbr in neighbors]
+        self.pref = [-LOCAL_PREF[role] for role in self.roles]
+        self.med = [_link(as_graph, asn, nbr).get('med', 0) for nbr in neighbors]
+        # prefix -> heap of candidate keys, only for prefixes that lost a best route
+        self.candidates: Dict[str, List[Key]] = {}
+        # prefixes currently announced to peers and providers (own and customer routes)
+        self.exported = set()
+
+    def _key(self, rank: int, path: ASPath) -> Key:
+        return (self.pref[rank], path.length, self.med[rank], rank)
+
+    def advertise_policy(self, prefixes, paths: PathTable) -> Tuple[Dict, Dict]:
+        """
+        (UPDATE for customers, UPDATE for peers and providers) for the changed
+        prefixes; peers and providers only hear about routes they may have.
+        """
+        to_customers = {}
+        to_others = {}
+        table = self.table
+        best_from = self.best_from
+        exported = self.exported
+        asn = self.asn
+        extended = paths.children(asn)
+        for prefix in prefixes:
+            path = table.get(prefix)
+            if path is None:
+                to_customers[prefix] = None
+                if prefix in exported:
+                    exported.discard(prefix)
+                    to_others[prefix] = None
+                continue
+            out = extended.get(path)
+            if out is None:
+                out = paths.extend(path, asn)
+            to_customers[prefix] = out
+            source = best_from[prefix]
+            if source is None or self.roles[self.rank[source]] == CUSTOMER:
+                exported.add(prefix)
+                to_others[prefix] = out
+            elif prefix in exported:
+                exported.discard(prefix)
+                to_others[prefix] = None
+        return to_customers, to_others
+
+    def receive_update(self, neighbor_as: str, updates: Dict[str, Optional[ASPath]],
+                       changed: Dict[str, None]):
+        """As BGPNode.receive_update, selecting by (local-pref, AS_PATH length, MED, neighbor)."""
+        rib = self.rib_in.setdefault(neighbor_as, {})
+        rank = self.rank[neighbor_as]
+        pref = self.pref[rank]
+        med = self.med[rank]
+        table = self.table
+        best_from = self.best_from
+        candidates = self.candidates
+        asn = self.asn
+        bit = bloom_bit(asn)
+        for prefix, path in updates.items():
+            if path is None or (path.bloom & bit and asn in path):
+                # a stale heap entry is dropped when it reaches the top
+                if rib.pop(prefix, None) is not None and best_from.get(prefix) == neighbor_as:
+                    self._reselect(prefix, changed)
+                continue
+            rib[prefix] = path
+            key = (pref, path.length, med, rank)
+            heap = candidates.get(prefix)
+            if heap is not None:
+                heappush(heap, key)
+                if len(heap) > 2 * len(self.neighbors) + 8:
+                    del candidates[prefix]  # mostly stale; rebuilt on the next re-selection
+            current = table.get(prefix)
+            if current is None:
+                table[prefix] = path
+                best_from[prefix] = neighbor_as
+                changed[prefix] = None
+                continue
+            source = best_from[prefix]
+            if source is None:
+                continue  # our own prefix
+            if source == neighbor_as:
+                if key <= self._key(rank, current):
+                    table[prefix] = path
+                    if path is not current:
+                        changed[prefix] = None
+                else:
+                    self._reselect(prefix, changed)
+            elif key < self._key(self.rank[source], current):
+                table[prefix] = path
+                best_from[prefix] = neighbor_as
+                changed[prefix] = None
+
+    def _reselect(self, prefix: str, changed: Dict[str, None]):
+        """Best candidate from prefix's heap, skipping entries that no longer match the adj-RIB-in."""
+        old = self.table.pop(prefix, None)
+        neighbors = self.neighbors
+        rib_in = self.rib_in
+        heap = self.candidates.get(prefix)
+        if heap is None:
+            heap = []
+            for rank, nbr in enumerate(neighbors):
+                path = rib_in.get(nbr, {}).get(prefix)
+                if path is not None:
+                    heap.append(self._key(rank, path))
+            heapify(heap)
+            self.candidates[prefix] = heap
+        best = None
+        while heap:
+            rank = heap[0][3]
+            nbr = neighbors[rank]
+            path = rib_in.get(nbr, {}).get(prefix)
+            if path is not None and path.length == heap[0][1]:
+                best = path
+                break
+            heappop(heap)
+        if best is None:
+            del self.best_from[prefix]
+            del self.candidates[prefix]
+        else:
+            self.table[prefix] = best
+            self.best_from[prefix] = nbr
+        if best is not old:
+            changed[prefix] = None
+
+
+def policy_exchange(nodes: Dict[str, PolicyBGPNode], origin_prefixes: Dict[str, List[str]],
+                    max_iters: int, paths: PathTable,
+                    metrics: Optional[ConvergenceMetrics] = None) -> Tuple[int, int, int]:
+    """
+    Event-driven exchange with export filters: rounds of per-AS update
+    queues as in bgp_sim's event mode, customers receiving every changed
+    route and peers/providers only own and customer routes.
+    Returns (rounds, messages, routes).
+    """
+    changed = {asn: dict.fromkeys(prefixes) for asn, prefixes in origin_prefixes.items() if prefixes}
+    rounds = messages = routes = 0
+    for it in range(max_iters):
+        if not changed:
+            break
+        rounds += 1
+        if metrics is not None:
+            metrics.begin_round()
+            sent, carried, bytes_sent, worse = messages, routes, 0, 0
+        queues: Dict[str, List[Tuple[int, str, Dict]]] = {}
+        for asn, prefixes in changed.items():
+            node = nodes[asn]
+            to_customers, to_others = node.advertise_policy(prefixes, paths)
+            if metrics is not None:
+                customer_bytes, other_bytes = bgp_update_bytes(to_customers), bgp_update_bytes(to_others)
+            for nbr, role in zip(node.neighbors, node.roles):
+                updates = to_customers if role == CUSTOMER else to_others
+                if not updates:
+                    continue
+                queues.setdefault(nbr, []).append((nodes[nbr].rank[asn], asn, updates))
+                messages += 1
+                routes += len(updates)
+                if metrics is not None:
+                    bytes_sent += customer_bytes if role == CUSTOMER else other_bytes
+        changed = {}
+        for asn, queue in queues.items():
+            node = nodes[asn]
+            queue.sort(key=lambda item: item[0])
+            touched = {}
+            before = _current_paths(node.table, queue) if metrics is not None else None
+            for _, sender, updates in queue:
+                node.receive_update(sender, updates, touched)
+            if touched:
+                changed[asn] = touched
+                if before is not None:
+                    worse += _longer(node.table, before, touched)
+        if metrics is not None:
+            metrics.end_round(sum(len(touched) for touched in changed.values()),
+                              messages - sent, routes - carried, bytes_sent, worse)
+    return rounds, messages, routes
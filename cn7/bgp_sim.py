@@ -5,9 +5,14 @@ We exchange path vectors: dest_prefix -> AS_PATH (list). Preference rule: shorte
 Loop prevention: drop routes containing your own AS number.
 """
 
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 import networkx as nx
 import copy
+import gc
+from as_path import ASPath, PathTable, bloom_bit
+from convergence import ConvergenceMetrics, bgp_update_bytes
+
+MODES = ("rounds", "event", "policy")
 
 class BGPNode:
     def __init__(self, asn: str, neighbors: List[str]):
@@ -15,6 +20,11 @@ class BGPNode:
         # routing table: prefix -> AS_PATH (list of ASNs from origin to current node)
         self.table: Dict[str, List[str]] = {}
         self.neighbors = neighbors
+        # event mode: per-neighbor adj-RIB-in (neighbor -> prefix -> AS_PATH as received)
+        # and the neighbor each best path came from (None for our own prefixes)
+        self.rib_in: Dict[str, Dict[str, List[str]]] = {}
+        self.best_from: Dict[str, Optional[str]] = {}
+        self.rank = {nbr: i for i, nbr in enumerate(neighbors)}
 
     def advertise(self):
         """
@@ -43,50 +53,281 @@ class BGPNode:
                 changed = True
         return changed
 
-def simulate_bgp(as_graph: nx.DiGraph, origin_prefixes: Dict[str, List[str]], max_iters=50):
+    def advertise_changes(self, prefixes, paths: Optional[PathTable] = None) -> Dict[str, Optional[List[str]]]:
+        """
+        UPDATE for the given prefixes: AS_PATH + [self.asn], or None (WITHDRAW) if we lost the route.
+        With a PathTable the table holds interned ASPaths and extension is a lookup.
+        """
+        updates = {}
+        table = self.table
+        asn = self.asn
+        if paths is None:
+            for prefix in prefixes:
+                path = table.get(prefix)
+                updates[prefix] = None if path is None else path + [asn]
+            return updates
+        extended = paths.children(asn)
+        for prefix in prefixes:
+            path = table.get(prefix)
+            if path is None:
+                updates[prefix] = None
+                continue
+            out = extended.get(path)
+            updates[prefix] = paths.extend(path, asn) if out is None else out
+        return updates
+
+    def receive_update(self, neighbor_as: str, updates: Dict[str, Optional[ASPath]],
+                       changed: Dict[str, None]):
+        """
+        Event-driven counterpart of process_updates_from: store the neighbor's
+        routes (interned ASPaths) in its adj-RIB-in (None withdraws; a looped
+        path counts as a withdraw) and re-select the best path, shortest
+        AS_PATH first and then the neighbor listed first.  Prefixes whose best
+        path changed are added to changed (an insertion-ordered dict).
+        """
+        rib = self.rib_in.setdefault(neighbor_as, {})
+        rank = self.rank[neighbor_as]
+        table = self.table
+        best_from = self.best_from
+        asn = self.asn
+        bit = bloom_bit(asn)
+        for prefix, path in updates.items():
+            if path is None or (path.bloom & bit and asn in path):
+                if rib.pop(prefix, None) is not None and best_from.get(prefix) == neighbor_as:
+                    self._reselect(prefix, changed)
+                continue
+            rib[prefix] = path
+            current = table.get(prefix)
+            if current is None:
+                table[prefix] = path
+                best_from[prefix] = neighbor_as
+                changed[prefix] = None
+                continue
+            source = best_from[prefix]
+            if source == neighbor_as:
+                if path.length <= current.length:
+                    # still the best: no other neighbor beat the old, longer path
+                    table[prefix] = path
+                    if path is not current:
+                        changed[prefix] = None
+                else:
+                    self._reselect(prefix, changed)
+            elif source is not None and (path.length < current.length or
+                                         (path.length == current.length and rank < self.rank[source])):
+                table[prefix] = path
+                best_from[prefix] = neighbor_as
+                changed[prefix] = None
+
+    def _reselect(self, prefix: str, changed: Dict[str, None]):
+        """Pick prefix's best path from the adj-RIB-in after the current one got worse or went away."""
+        old = self.table.pop(prefix, None)
+        best = best_nbr = None
+        for nbr in self.neighbors:
+            path = self.rib_in.get(nbr, {}).get(prefix)
+            if path is not None and (best is None or path.length < best.length):
+                best, best_nbr = path, nbr
+        if best is None:
+            del self.best_from[prefix]
+        else:
+            self.table[prefix] = best
+            self.best_from[prefix] = best_nbr
+        if best is not old:
+            changed[prefix] = None
+
+def _peers(as_graph: nx.DiGraph, asn: str, position: Dict[str, int]) -> List[str]:
+    """Successors, then predecessors not already listed in node order (peering is treated as undirected)."""
+    neighbors = list(as_graph.neighbors(asn))
+    if as_graph.is_directed():
+        seen = set(neighbors)
+        neighbors += sorted((other for other in as_graph.predecessors(asn) if other not in seen),
+                            key=position.__getitem__)
+    return neighbors
+
+def simulate_bgp(as_graph: nx.DiGraph, origin_prefixes: Dict[str, List[str]], max_iters=50,
+                 mode: str = "rounds", stats: Optional[Dict[str, int]] = None, interned: bool = False,
+                 aggregate: bool = False, metrics: Optional[ConvergenceMetrics] = None):
     """
     as_graph: directed graph of AS peering (but we will treat as undirected for simplicity)
     origin_prefixes: dict mapping origin_asn -> list of prefixes that originate there
+    mode: "rounds" re-advertises every full table to every neighbor each round;
+    "event" keeps per-neighbor adj-RIB-in and only sends changed best paths
+    (UPDATE/WITHDRAW) through per-AS update queues, with interned paths
+    (see as_path).  Both give the same tables.
+    "policy" runs the event mode with customer/peer/provider relationships
+    from the edges' 'rel' attribute, local-pref, MED and Gao-Rexford export
+    filters (see bgp_policy); as_graph must be directed.
+    stats: optional dict, filled with rounds, messages and routes (prefix entries) sent
+    (and distinct paths for "event" and "policy")
+    interned: "event"/"policy" only; return the shared ASPath objects instead of lists
+    aggregate: propagate each set of prefixes with the same origins once and
+    return read-only per-prefix views that expand on access (see bgp_aggregate);
+    they compare equal to the per-prefix tables, and to_dict() or table_io.save_tables
+    turns them into the same plain output
+    metrics: optional ConvergenceMetrics, given one record per round (see convergence)
     """
+    if mode not in MODES:
+        raise ValueError(f"Unknown BGP mode: {mode}")
+    if interned and mode == "rounds":
+        raise ValueError("interned paths need mode='event' or 'policy'")
+    if aggregate:
+        from bgp_aggregate import AggregatedTables, prefix_classes
+        reps, members = prefix_classes(origin_prefixes)
+        tables = simulate_bgp(as_graph, reps, max_iters, mode, stats, interned, metrics=metrics)
+        if stats is not None:
+            stats.update(classes=len(members))
+        return AggregatedTables(tables, members)
+    position = {asn: i for i, asn in enumerate(as_graph.nodes())}
     nodes = {}
-    for asn in as_graph.nodes():
-        neighbors = list(as_graph.neighbors(asn))
-        # For simplicity, also include reverse neighbors if graph undirected edges not present
-        for other in as_graph.nodes():
-            if as_graph.has_edge(other, asn) and other not in neighbors:
-                neighbors.append(other)
-        nodes[asn] = BGPNode(asn, neighbors)
+    if mode == "policy":
+        if not as_graph.is_directed():
+            raise ValueError("policy mode needs a directed as_graph (relationships are per edge direction)")
+        from bgp_policy import PolicyBGPNode, policy_exchange
+        for asn in as_graph.nodes():
+            nodes[asn] = PolicyBGPNode(asn, _peers(as_graph, asn, position), as_graph)
+    else:
+        for asn in as_graph.nodes():
+            # For simplicity, also include reverse neighbors if graph undirected edges not present
+            nodes[asn] = BGPNode(asn, _peers(as_graph, asn, position))
 
+    paths = PathTable() if mode != "rounds" else None
     # Initialize originators' tables
     for origin_asn, prefixes in origin_prefixes.items():
         for p in prefixes:
             # origin's AS_PATH is [origin_asn]
-            nodes[origin_asn].table[p] = [origin_asn]
+            nodes[origin_asn].table[p] = [origin_asn] if paths is None else paths.origin(origin_asn)
+            nodes[origin_asn].best_from[p] = None
 
-    # iterative UPDATE exchange (simplified synchronous rounds)
-    for it in range(max_iters):
-        changed_any = False
-        snapshot = {asn: copy.deepcopy(nodes[asn].table) for asn in nodes}
-        # each node processes updates from each neighbor
-        for asn, node in nodes.items():
-            for nbr in node.neighbors:
-                if nbr not in snapshot:
-                    continue
-                # neighbor advertises its table extended by neighbor ASN
-                updates = {}
-                for prefix, path in snapshot[nbr].items():
-                    # advertise path extended by neighbor ASN
-                    updates[prefix] = path + [nbr]
-                changed = node.process_updates_from(nbr, updates)
-                if changed:
-                    changed_any = True
-        if not changed_any:
-            break
+    if mode != "rounds":
+        exchange = policy_exchange if mode == "policy" else _event_exchange
+        # millions of paths, RIB entries and update dicts would otherwise trigger
+        # repeated full collections
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            rounds, messages, routes = exchange(nodes, origin_prefixes, max_iters, paths, metrics)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        if stats is not None:
+            stats.update(paths=len(paths))
+    else:
+        rounds = messages = routes = 0
+        # iterative UPDATE exchange (simplified synchronous rounds)
+        for it in range(max_iters):
+            rounds += 1
+            changed_any = False
+            if metrics is not None:
+                metrics.begin_round()
+                sent, carried, bytes_sent = messages, routes, 0
+            snapshot = {asn: copy.deepcopy(nodes[asn].table) for asn in nodes}
+            # each node processes updates from each neighbor
+            for asn, node in nodes.items():
+                for nbr in node.neighbors:
+                    if nbr not in snapshot:
+                        continue
+                    # neighbor advertises its table extended by neighbor ASN
+                    updates = {}
+                    for prefix, path in snapshot[nbr].items():
+                        # advertise path extended by neighbor ASN
+                        updates[prefix] = path + [nbr]
+                    messages += 1
+                    routes += len(updates)
+                    if metrics is not None:
+                        bytes_sent += bgp_update_bytes(updates)
+                    changed = node.process_updates_from(nbr, updates)
+                    if changed:
+                        changed_any = True
+            if metrics is not None:
+                # process_updates_from only takes shorter paths, so none gets worse
+                changed = sum(1 for asn, node in nodes.items()
+                              for prefix, path in node.table.items() if snapshot[asn].get(prefix) != path)
+                metrics.end_round(changed, messages - sent, routes - carried, bytes_sent)
+            if not changed_any:
+                break
+    if stats is not None:
+        stats.update(rounds=rounds, messages=messages, routes=routes)
 
     # Format final routing tables (prefix -> chosen AS_PATH)
+    if paths is not None and not interned:
+        # one list per distinct path, shared by the routes that use it; the
+        # adj-RIBs-in are not returned, drop them first to keep the peak down
+        for node in nodes.values():
+            node.rib_in.clear()
+            if mode == "policy":
+                node.candidates.clear()
+        lists: Dict[ASPath, List[str]] = {}
+        for node in nodes.values():
+            table = node.table
+            for prefix, path in table.items():
+                as_list = lists.get(path)
+                if as_list is None:
+                    as_list = lists[path] = path.to_list()
+                table[prefix] = as_list
     final_tables = {asn: nodes[asn].table for asn in nodes}
     return final_tables
 
+def _current_paths(table: Dict, queue: List[Tuple[int, str, Dict]]) -> Dict:
+    """prefix -> path (or None) in table, for every prefix a queue of UPDATEs mentions."""
+    return {prefix: table.get(prefix) for _, _, updates in queue for prefix in updates}
+
+
+def _longer(table: Dict, before: Dict, touched: Dict[str, None]) -> int:
+    """How many of the touched prefixes now have a longer AS_PATH than before."""
+    worse = 0
+    for prefix in touched:
+        old, new = before[prefix], table.get(prefix)
+        if old is not None and new is not None and new.length > old.length:
+            worse += 1
+    return worse
+
+
+def _event_exchange(nodes: Dict[str, BGPNode], origin_prefixes: Dict[str, List[str]],
+                    max_iters: int, paths: PathTable,
+                    metrics: Optional[ConvergenceMetrics] = None) -> Tuple[int, int, int]:
+    """
+    Drive the event mode: each round every AS whose best paths changed sends
+    one UPDATE (changed prefixes only, end-of-round paths) to each neighbor's
+    queue, and each AS then works through its queue in neighbor order.
+    Rounds and tie-breaking line up with the synchronous exchange, so the
+    tables, and the order prefixes enter them, are the same.
+    Returns (rounds, messages, routes).
+    """
+    changed = {asn: dict.fromkeys(prefixes) for asn, prefixes in origin_prefixes.items() if prefixes}
+    rounds = messages = routes = 0
+    for it in range(max_iters):
+        if not changed:
+            break
+        rounds += 1
+        if metrics is not None:
+            metrics.begin_round()
+            sent, carried, bytes_sent, worse = messages, routes, 0, 0
+        queues: Dict[str, List[Tuple[int, str, Dict]]] = {}
+        for asn, prefixes in changed.items():
+            node = nodes[asn]
+            updates = node.advertise_changes(prefixes, paths)
+            if metrics is not None:
+                bytes_sent += bgp_update_bytes(updates) * len(node.neighbors)
+            for nbr in node.neighbors:
+                queues.setdefault(nbr, []).append((nodes[nbr].rank[asn], asn, updates))
+                messages += 1
+                routes += len(updates)
+        changed = {}
+        for asn, queue in queues.items():
+            node = nodes[asn]
+            queue.sort(key=lambda item: item[0])
+            touched = {}
+            before = _current_paths(node.table, queue) if metrics is not None else None
+            for _, sender, updates in queue:
+                node.receive_update(sender, updates, touched)
+            if touched:
+                changed[asn] = touched
+                if before is not None:
+                    worse += _longer(node.table, before, touched)
+        if metrics is not None:
+            metrics.end_round(sum(len(touched) for touched in changed.values()),
+                              messages - sent, routes - carried, bytes_sent, worse)
+    return rounds, messages, routes
+
 if __name__ == "__main__":
     G = nx.DiGraph()
     G.add_edges_from([("AS1","AS2"), ("AS2","AS3"), ("AS3","AS4"), ("AS2","AS4")])
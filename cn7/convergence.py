@@ -0,0 +1,101 @@
+# convergence.py
+"""
+Per-round convergence metrics for the distance- and path-vector
+simulations: pass a ConvergenceMetrics as simulate_rip(..., metrics=m) or
+simulate_bgp(..., metrics=m) and every exchange round is recorded as
+
+  changed            routing-table entries whose best route changed
+  messages, entries  UPDATEs sent and the routes (prefix entries) they carry
+  bytes              wire size of those messages (see rip_bytes / bgp_*_bytes)
+  count_to_infinity  entries whose route got worse (higher cost, longer
+                     AS_PATH) while the network converged: counting to
+                     infinity for RIP, path hunting for BGP
+  seconds            wall time of the round
+
+Without a collector the simulators do no per-entry work for it.
+The exchanges here only run on static topologies with announcements, so
+routes only improve and count_to_infinity stays 0, except in BGP policy
+mode where a longer route with a higher local-pref can replace a shorter one.
+
+save_metrics writes several runs to one JSON file for r.py:
+{label: {"totals": {...}, "rounds": [{...}, ...]}}.  Runs of other labels
+already in the file are kept, so rerunning one protocol updates only its run.
+"""
+
+import json
+import time
+from pathlib import Path
+from typing import Dict, List
+
+RIP_HEADER = 4         # command, version, zero
+RIP_ENTRY = 20         # address family, tag, address, mask, next hop, metric
+RIP_MAX_ENTRIES = 25   # per datagram
+BGP_HEADER = 23        # marker, length, type, withdrawn and attribute lengths
+BGP_WITHDRAWN = 4      # length byte + up to 3 bytes of a /24
+BGP_ROUTE = 20         # NLRI 4, ORIGIN 4, NEXT_HOP 7, AS_PATH header and segment header 5
+BGP_ASN = 4            # per AS in the AS_PATH (4-byte ASNs)
+
+FIELDS = ("changed", "messages", "entries", "bytes", "count_to_infinity", "seconds")
+
+
+def rip_bytes(entries: int) -> int:
+    """Wire size of one RIPv2 response carrying entries routes, 25 per datagram."""
+    datagrams = max(1, -(-entries // RIP_MAX_ENTRIES))
+    return RIP_HEADER * datagrams + RIP_ENTRY * entries
+
+
+def bgp_update_bytes(updates: Dict) -> int:
+    """Wire size of one UPDATE: each announced route with its AS_PATH, withdrawals packed together."""
+    size = BGP_HEADER
+    for path in updates.values():
+        size += BGP_WITHDRAWN if path is None else BGP_ROUTE + BGP_ASN * len(path)
+    return size
+
+
+class ConvergenceMetrics:
+    """Round-by-round record of one simulation run; the simulators call begin_round/end_round."""
+
+    def __init__(self, label: str = ""):
+        self.label = label
+        self.rounds: List[Dict[str, float]] = []
+        self._start = 0.0
+
+    def begin_round(self):
+        self._start = time.perf_counter()
+
+    def end_round(self, changed: int, messages: int, entries: int, bytes_sent: int,
+                  count_to_infinity: int = 0):
+        self.rounds.append({
+            "round": len(self.rounds) + 1,
+            "changed": changed,
+            "messages": messages,
+            "entries": entries,
+            "bytes": bytes_sent,
+            "count_to_infinity": count_to_infinity,
+            "seconds": time.perf_counter() - self._start,
+        })
+
+    def totals(self) -> Dict[str, float]:
+        """Sums over all rounds, plus the round count."""
+        out = {"rounds": len(self.rounds)}
+        for field in FIELDS:
+            out[field] = sum(r[field] for r in self.rounds)
+        return out
+
+    def to_dict(self) -> Dict:
+        return {"totals": self.totals(), "rounds": self.rounds}
+
+
+def save_metrics(runs: List[ConvergenceMetrics], path: Path):
+    """Write runs to path as {label: run.to_dict()}, replacing the saved runs with the same labels."""
+    saved = load_metrics(path)
+    saved.update((run.label, run.to_dict()) for run in runs)
+    Path(path).write_text(json.dumps(saved, indent=2))
+
+
+def load_metrics(path: Path) -> Dict[str, Dict]:
+    """The saved runs, {} if there is no file."""
+    path = Path(path)
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
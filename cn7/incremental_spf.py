@@ -0,0 +1,217 @@
+# incremental_spf.py
+"""
+Incremental SPF for the link-state simulators.
+Given the routing tables of simulate_ospf / simulate_isis and one topology
+event, only the parts of each router's shortest-path tree the event can
+touch are recomputed:
+
+- cost decrease / link up: from each router for which the link now offers a
+  shorter path, improvements are propagated outward from the far end of the
+  link (a Dijkstra that stops where nothing improves);
+- cost increase / link down / node down: for each router, the destinations
+  that some shortest path reaches through the link (or node) are collected
+  by walking its shortest-path DAG down from the far end of the link, and
+  only those are re-settled by a Dijkstra seeded from their unaffected
+  neighbors.
+
+Routers whose trees do not use the link are skipped after an O(1) check,
+and the work for the others is proportional to the part of the tree below
+the link, not to the number of routers.
+Costs match a full recompute; with equal-cost paths the next hop kept or
+chosen is one of the valid ones.
+"""
+
+from heapq import heappop, heappush
+from typing import Dict, Hashable, NamedTuple, Optional, Set, Tuple
+
+import networkx as nx
+
+EVENTS = ("cost", "down", "up", "node_down")
+
+Entry = Tuple[float, Hashable]  # (cost, next_hop)
+
+
+class LinkEvent(NamedTuple):
+    kind: str                   # one of EVENTS
+    u: Hashable                 # link endpoint, or the node for "node_down"
+    v: Optional[Hashable] = None
+    weight: float = 1           # new cost for "cost" and "up"
+
+
+def _close(a: float, b: float) -> bool:
+    # a <= b, allowing for float sums taken in a different order
+    return a <= b + 1e-9 * max(1.0, abs(b))
+
+
+def _affected(graph: nx.Graph, table: Dict, s, links) -> Set[Hashable]:
+    """
+    Destinations some shortest path from s reaches through one of links
+    (a, b, old cost): the far ends of the links that were on s's shortest
+    paths, and everything below them in s's shortest-path DAG (x -> z with
+    d(s, x) + w == d(s, z)).
+    """
+    found = set()
+    for a, b, w in links:
+        da = table.get(a)
+        db = table.get(b)
+        if da is not None and db is not None and _close(da[0] + w, db[0]):
+            found.add(b)
+    stack = list(found)
+    while stack:
+        x = stack.pop()
+        if x not in graph:
+            continue
+        dx = table[x][0]
+        for z, data in graph[x].items():
+            if z not in found and z in table and _close(dx + data.get('weight', 1), table[z][0]):
+                found.add(z)
+                stack.append(z)
+    found.discard(s)
+    return found
+
+
+def _resettle(graph: nx.Graph, table: Dict, s, affected: Set) -> Dict[Hashable, Optional[Entry]]:
+    """Recompute affected destinations of s's table on the new graph; others keep their entries."""
+    best = {}
+    via = {}
+    heap = []
+    for x in affected:
+        if x not in graph:
+            continue
+        for y, data in graph[x].items():
+            if y in affected or y not in table:
+                continue
+            cost = table[y][0] + data.get('weight', 1)
+            if x not in best or cost < best[x]:
+                best[x], via[x] = cost, y
+        if x in best:
+            heappush(heap, (best[x], x))
+    new = {}
+    while heap:
+        d, x = heappop(heap)
+        if x in new or d > best[x]:
+            continue
+        y = via[x]
+        hop = x if y == s else (new[y][1] if y in new else table[y][1])
+        new[x] = (d, hop)
+        for z, data in graph[x].items():
+            if z in affected and z not in new:
+                cost = d + data.get('weight', 1)
+                if z not in best or cost < best[z]:
+                    best[z], via[z] = cost, x
+                    heappush(heap, (cost, z))
+    changes = {}
+    for x in affected:
+        entry = new.get(x)
+        if entry != table.get(x):
+            changes[x] = entry
+    return changes
+
+
+def _improve(graph: nx.Graph, table: Dict, s, a, b, w) -> Dict[Hashable, Entry]:
+    """Propagate the shorter paths a new or cheaper link a -> b gives s."""
+    da = table.get(a)
+    if da is None:
+        return {}
+    start = da[0] + w
+    current = table.get(b)
+    if current is not None and not start < current[0]:
+        return {}
+    hop = b if a == s else da[1]
+    changes = {}
+    heap = [(start, b)]
+    while heap:
+        d, x = heappop(heap)
+        if x in changes:
+            continue
+        old = table.get(x)
+        if old is not None and not d < old[0]:
+            continue
+        changes[x] = (d, hop)
+        for z, data in graph[x].items():
+            if z not in changes:
+                cost = d + data.get('weight', 1)
+                old = table.get(z)
+                if old is None or cost < old[0]:
+                    heappush(heap, (cost, z))
+    return changes
+
+
+def apply_link_event(graph: nx.Graph, tables: Dict[Hashable, Dict[Hashable, Entry]],
+                     event: LinkEvent) -> Dict[Hashable, Dict[Hashable, Optional[Entry]]]:
+    """
+    Apply event to graph and tables in place.
+    tables: {router: {dest: (cost, next_hop)}} as returned by simulate_ospf
+    Returns the changed entries {router: {dest: (cost, next_hop) or None}};
+    None means the destination became unreachable (or was removed).  For
+    "node_down" the removed router's own table is reported as None; a router
+    added (or restored) by "up" reports its whole table, self entry included.
+    """
+    if graph.is_directed():
+        raise ValueError("Incremental SPF needs an undirected graph")
+    if event.kind not in EVENTS:
+        raise ValueError(f"Unknown link event: {event.kind}")
+    u, v = event.u, event.v
+    raised = []   # (a, b, old cost) links that got dearer or vanished, both directions
+    lowered = None
+    added = []    # routers the event brings into the tables
+    if event.kind == "node_down":
+        if u not in graph:
+            raise ValueError(f"No such router: {u}")
+        raised = [link for a, data in graph[u].items()
+                  for link in ((a, u, data.get('weight', 1)), (u, a, data.get('weight', 1)))]
+        graph.remove_node(u)
+    else:
+        old = graph.edges[u, v].get('weight', 1) if graph.has_edge(u, v) else None
+        if event.kind == "down":
+            if old is None:
+                raise ValueError(f"No such link: {u}-{v}")
+            graph.remove_edge(u, v)
+            raised = [(u, v, old), (v, u, old)]
+        else:
+            if event.kind == "cost" and old is None:
+                raise ValueError(f"No such link: {u}-{v}")
+            new = event.weight
+            graph.add_edge(u, v, weight=new)
+            for x in (u, v):
+                if x not in tables:
+                    tables[x] = {x: (0, x)}
+                    added.append(x)
+            if old is not None and new > old:
+                raised = [(u, v, old), (v, u, old)]
+            elif old is None or new < old:
+                lowered = new
+
+    changes = {}
+    if event.kind == "node_down":
+        changes[u] = None
+    # work out every router's changes against the old tables, then apply
+    for s in tables:
+        if s == u and event.kind == "node_down":
+            continue
+        table = tables[s]
+        if raised:
+            affected = _affected(graph, table, s, raised)
+            delta = _resettle(graph, table, s, affected) if affected else {}
+        elif lowered is not None:
+            delta = _improve(graph, table, s, u, v, lowered)
+            for x, entry in _improve(graph, table, s, v, u, lowered).items():
+                if x not in delta or entry[0] < delta[x][0]:
+                    delta[x] = entry
+        else:
+            delta = {}
+        if s in added:
+            delta = {s: (0, s), **delta}
+        if delta:
+            changes[s] = delta
+    for s, delta in changes.items():
+        if delta is None:
+            del tables[s]
+            continue
+        table = tables[s]
+        for x, entry in delta.items():
+            if entry is None:
+                table.pop(x, None)
+            else:
+                table[x] = entry
+    return changes
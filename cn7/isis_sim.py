@@ -8,12 +8,23 @@ IS-IS simulation (link-state) — similar to OSPF in approach:
 import networkx as nx
 from typing import Dict, Tuple
 
-def simulate_isis(graph: nx.Graph):
+BACKENDS = ("networkx", "csgraph")
+
+def simulate_isis(graph: nx.Graph, backend: str = "networkx", workers: int = 1):
     """
     For simplicity, we assume LSDB is perfectly synchronized, so each router has full graph.
     Each router runs Dijkstra to compute shortest paths.
+    backend: "networkx" or "csgraph" (all-pairs SPF from a CSR matrix, see spf_engine)
+    workers: csgraph only; shard the routers across this many processes
     Returns mapping router -> routing table (dest -> (cost, next_hop))
     """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown SPF backend: {backend}")
+    if workers > 1 and backend != "csgraph":
+        raise ValueError("workers > 1 needs the csgraph backend")
+    if backend == "csgraph":
+        from spf_engine import spf_tables
+        return spf_tables(graph, workers)
     # identical to OSPF simulation for our purposes
     routing_tables = {}
     for node in graph.nodes():
@@ -7,11 +7,23 @@ and then runs Dijkstra locally to build its shortest-path tree and routing table
 import networkx as nx
 from typing import Dict, Tuple
 
-def simulate_ospf(graph: nx.Graph):
+BACKENDS = ("networkx", "csgraph")
+
+def simulate_ospf(graph: nx.Graph, backend: str = "networkx", workers: int = 1):
     """
     graph: weighted graph (edge attribute 'weight' is cost)
+    backend: "networkx" runs Dijkstra per router; "csgraph" computes all pairs
+    natively from a CSR matrix (see spf_engine; identical tables)
+    workers: csgraph only; shard the routers across this many processes
     Returns dict: router -> (shortest path tree as dict dest -> (cost, next_hop))
     """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown SPF backend: {backend}")
+    if workers > 1 and backend != "csgraph":
+        raise ValueError("workers > 1 needs the csgraph backend")
+    if backend == "csgraph":
+        from spf_engine import spf_tables
+        return spf_tables(graph, workers)
     routing_tables = {}
     for node in graph.nodes():
         # Dijkstra from this node
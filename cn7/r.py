@@ -1,23 +1,97 @@
 # report_generator.py
 """
-Generate a 2-3 page PDF report 'Lab7_Report.pdf' using PNGs + JSONs produced by sim_with_visuals.py
+Generate a 4-page PDF report 'Lab7_Report.pdf' using PNGs + JSONs produced by sim_with_visuals.py
 Requires: reportlab
+
+Builds are incremental: every input file is identified by its SHA-256
+(rehashed only when its size or mtime changed) and each section's decoded
+content is kept in sim_outputs/.report_cache, so after one simulator rerun
+only the sections reading its outputs are rebuilt.  Images are downscaled
+once to the size they are drawn at and the small copies embedded.
 """
 
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen.canvas import Canvas
-from reportlab.lib.utils import ImageReader
 from pathlib import Path
-import json, textwrap
+import hashlib
+import json
+import textwrap
+from convergence import load_metrics
+from table_io import first_table
 
 OUT_DIR = Path("sim_outputs")
 REPORT_PATH = Path("Lab7_Report.pdf")
+CACHE_DIR = OUT_DIR / ".report_cache"
+# written by bench_suite.py, which puts it beside this script whatever the working directory
+BENCH_RESULTS = Path(__file__).resolve().parent / "sim_outputs" / "bench_results.json"
+IMAGE_SCALE = 2  # image pixels per PDF point
 
-def load_json(name):
-    p = OUT_DIR / name
-    if not p.exists():
-        return {}
-    return json.load(open(p))
+class BuildCache:
+    """
+    Content-hash cache for the report: digest(path) is the file's SHA-256,
+    and section(key, path, build) returns build()'s JSON-able result,
+    reusing the stored one while path's digest is unchanged.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.dir = Path(cache_dir)
+        self.manifest_path = self.dir / "manifest.json"
+        manifest = json.loads(self.manifest_path.read_text()) if self.manifest_path.exists() else {}
+        self.files = manifest.get("files", {})        # path -> [size, mtime_ns, sha256]
+        self.sections = manifest.get("sections", {})  # key -> {"digest": ..., "data": ...}
+        self.rebuilt = []
+        self.reused = []
+        self.images = set()  # downscaled images used by this build
+        self.used = set()    # section keys used by this build
+
+    def digest(self, path):
+        st = path.stat()
+        known = self.files.get(str(path))
+        if known and known[0] == st.st_size and known[1] == st.st_mtime_ns:
+            return known[2]
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        self.files[str(path)] = [st.st_size, st.st_mtime_ns, h.hexdigest()]
+        return h.hexdigest()
+
+    def section(self, key, path, build):
+        digest = None if path is None else self.digest(path)
+        self.used.add(key)
+        cached = self.sections.get(key)
+        if cached is not None and cached["digest"] == digest:
+            self.reused.append(key)
+            return cached["data"]
+        data = build()
+        self.sections[key] = {"digest": digest, "data": data}
+        self.rebuilt.append(key)
+        return data
+
+    def image(self, path, w, h):
+        """path downscaled to fit w x h points at IMAGE_SCALE, made once per image content."""
+        small = self.dir / f"{self.digest(path)[:20]}_{w}x{h}.png"
+        self.images.add(small.name)
+        if small.exists():
+            self.reused.append(f"image:{path.name}")
+            return small
+        from PIL import Image
+        self.dir.mkdir(parents=True, exist_ok=True)
+        with Image.open(path) as img:
+            img.thumbnail((w * IMAGE_SCALE, h * IMAGE_SCALE), Image.LANCZOS)
+            img.save(small, optimize=True)
+        self.rebuilt.append(f"image:{path.name}")
+        return small
+
+    def save(self):
+        self.dir.mkdir(parents=True, exist_ok=True)
+        # forget files that are gone, and sections and images no longer in the report
+        self.files = {p: v for p, v in self.files.items() if Path(p).exists()}
+        self.sections = {key: v for key, v in self.sections.items() if key in self.used}
+        for old in self.dir.glob("*.png"):
+            if old.name not in self.images:
+                old.unlink()
+        self.manifest_path.write_text(json.dumps({"files": self.files, "sections": self.sections}))
 
 def draw_title(c):
     c.setFont("Helvetica-Bold", 18)
@@ -41,70 +115,152 @@ def add_obj_and_summary(c):
         c.drawString(40, y, line)
         y -= 12
 
-def add_topology_image(c, img_path, x, y, w=240, h=150, caption=""):
+def snapshot_path(name):
+    """The file holding snapshot name: name itself, or the same snapshot saved as .rtb/.jsonl/.json."""
+    stem = Path(name).stem
+    for p in [OUT_DIR / name] + [OUT_DIR / (stem + suffix) for suffix in (".rtb", ".jsonl", ".json")]:
+        if p.exists():
+            return p
+    return None
+
+def add_topology_image(c, cache, img_path, x, y, w=240, h=150, caption=""):
     p = OUT_DIR / img_path
     if not p.exists():
         c.setFont("Helvetica-Oblique", 9)
         c.drawString(x, y + h / 2, f"(image not found: {img_path})")
         return
-    img = ImageReader(str(p))
-    c.drawImage(img, x, y, width=w, height=h, preserveAspectRatio=True, anchor='c')
+    c.drawImage(str(cache.image(p, w, h)), x, y, width=w, height=h, preserveAspectRatio=True, anchor='c')
     if caption:
         c.setFont("Helvetica", 9)
         c.drawString(x, y - 10, caption)
 
-def add_table_snapshot(c, json_name, x, y, max_entries=6):
-    """Draw a small sample from the JSON routing table."""
-    data = load_json(json_name)
-    if not data:
+def snapshot_lines(path, max_entries):
+    """(router, formatted entries) for the first router's table in path, or None."""
+    router, table = first_table(path)
+    lines = []
+    for dest, info in list(table.items())[:max_entries]:
+        if isinstance(info, (list, tuple)) and len(info) == 2 and isinstance(info[0], (int, float)):
+            # (cost, next_hop); JSON gives a list
+            val = f"cost={info[0]}, next={info[1]}"
+        elif isinstance(info, (list, tuple)):
+            # FIX: convert all items to string before joining
+            val = "AS-PATH: " + " ".join(map(str, info))
+        else:
+            val = str(info)
+        lines.append(f"{dest:12} {val}")
+    return router, lines
+
+def add_table_snapshot(c, cache, json_name, x, y, max_entries=6):
+    """Draw a small sample from the first router's routing table."""
+    p = snapshot_path(json_name)
+    if p is None:
         c.setFont("Helvetica-Oblique", 9)
         c.drawString(x, y, f"(no snapshot available for {json_name})")
         return
+    first_router, lines = cache.section(f"table:{json_name}:{p.name}:{max_entries}", p,
+                                        lambda: snapshot_lines(p, max_entries))
 
     c.setFont("Helvetica-Bold", 10)
     c.drawString(x, y, f"Snapshot: {json_name}")
     y -= 14
     c.setFont("Helvetica", 9)
-
-    first_router = next(iter(data.keys()))
     c.drawString(x, y, f"Router: {first_router}")
     y -= 12
+    for line in lines:
+        c.drawString(x, y, line)
+        y -= 11
 
-    entries = list(data[first_router].items())[:max_entries]
-    for dest, info in entries:
-        if isinstance(info, list):
-            # FIX: convert all items to string before joining
-            val = "AS-PATH: " + " ".join(map(str, info))
-        elif isinstance(info, (list, tuple)):
-            if len(info) >= 2:
-                val = f"cost={info[0]}, next={info[1]}"
-            else:
-                val = str(info)
-        else:
-            val = str(info)
+def add_convergence_table(c, cache, x, y):
+    """Per-protocol totals, and a bar per round of the entries changed, from convergence.json."""
+    p = OUT_DIR / "convergence.json"
+    runs = cache.section("convergence", p, lambda: load_metrics(p)) if p.exists() else None
+    if not runs:
+        c.setFont("Helvetica-Oblique", 9)
+        c.drawString(x, y, "(no convergence metrics; run sim_with_visuals.py)")
+        return y - 12
+    c.setFont("Helvetica-Bold", 10)
+    c.drawString(x, y, "Convergence and overhead")
+    y -= 14
+    c.setFont("Helvetica", 9)
+    header = ["Protocol", "Rounds", "Messages", "Entries", "Bytes", "Count-to-inf", "Time (ms)"]
+    columns = [x, x + 60, x + 110, x + 170, x + 225, x + 285, x + 355]
+    for col, text in zip(columns, header):
+        c.drawString(col, y, text)
+    y -= 12
+    for label, run in runs.items():
+        t = run["totals"]
+        row = [label, t["rounds"], t["messages"], t["entries"], t["bytes"], t["count_to_infinity"],
+               f"{t['seconds'] * 1000:.2f}"]
+        for col, value in zip(columns, row):
+            c.drawString(col, y, str(value))
+        y -= 11
+    y -= 10
+    c.drawString(x, y, "Entries changed per round:")
+    y -= 10
+    height = 40
+    for label, run in runs.items():
+        changed = [r["changed"] for r in run["rounds"]]
+        top = max(changed, default=0) or 1
+        width = min(16, 400 / max(len(changed), 1))
+        y -= height
+        c.drawString(x, y + 2, label)
+        c.setFillGray(0.5)
+        for i, value in enumerate(changed):
+            c.rect(x + 60 + i * width, y, width * 0.8, height * value / top, stroke=0, fill=1)
+        c.setFillGray(0)
+        c.drawString(x + 60 + len(changed) * width + 4, y + 2, f"max {top}")
+        y -= 12
+    return y
+
+def bench_rows(path):
+    """Largest benchmarked size per (topology, protocol, engine) from bench_suite.py's results."""
+    largest = {}
+    for r in json.loads(path.read_text()):
+        key = (r["topology"], r["protocol"], r["engine"])
+        if key not in largest or r["size"] > largest[key]["size"]:
+            largest[key] = r
+    return [[r["topology"], r["protocol"], r["engine"], r["nodes"], f"{r['seconds']:.3f}",
+             f"{r['peak_mb']:.1f}"] for r in largest.values()]
 
-        c.drawString(x, y, f"{dest:12} {val}")
+def add_bench_table(c, cache, x, y, max_rows=30):
+    """Scaling results from sim_outputs/bench_results.json, if bench_suite.py has been run."""
+    if not BENCH_RESULTS.exists():
+        return y
+    rows = cache.section("bench", BENCH_RESULTS, lambda: bench_rows(BENCH_RESULTS))
+    c.setFont("Helvetica-Bold", 10)
+    c.drawString(x, y, "Benchmark suite (largest size run)")
+    y -= 14
+    c.setFont("Helvetica", 9)
+    columns = [x, x + 70, x + 130, x + 200, x + 260, x + 320]
+    for row in [["Topology", "Protocol", "Engine", "Nodes", "Seconds", "Peak MB"]] + rows[:max_rows]:
+        for col, value in zip(columns, row):
+            c.drawString(col, y, str(value))
         y -= 11
+    if len(rows) > max_rows:
+        c.drawString(x, y, f"... {len(rows) - max_rows} more in {BENCH_RESULTS}")
+        y -= 11
+    return y
 
 def make_report():
+    cache = BuildCache()
     c = Canvas(str(REPORT_PATH), pagesize=A4)
     draw_title(c)
     add_obj_and_summary(c)
 
     # Page 1: RIP + OSPF
-    add_topology_image(c, "rip_topology.png", 40, 480, caption="RIP Topology")
-    add_topology_image(c, "ospf_topology.png", 320, 480, caption="OSPF Topology")
-    add_table_snapshot(c, "rip_tables.json", 40, 320, max_entries=6)
-    add_table_snapshot(c, "ospf_tables.json", 320, 320, max_entries=6)
+    add_topology_image(c, cache, "rip_topology.png", 40, 480, caption="RIP Topology")
+    add_topology_image(c, cache, "ospf_topology.png", 320, 480, caption="OSPF Topology")
+    add_table_snapshot(c, cache, "rip_tables.json", 40, 320, max_entries=6)
+    add_table_snapshot(c, cache, "ospf_tables.json", 320, 320, max_entries=6)
     c.showPage()
 
     # Page 2: BGP + IS-IS
     c.setFont("Helvetica-Bold", 14)
     c.drawString(40, 800, "BGP and IS-IS Results")
-    add_topology_image(c, "bgp_topology.png", 40, 540, caption="BGP AS-level Topology")
-    add_topology_image(c, "isis_topology.png", 320, 540, caption="IS-IS Topology")
-    add_table_snapshot(c, "bgp_tables.json", 40, 360, max_entries=6)
-    add_table_snapshot(c, "isis_tables.json", 320, 360, max_entries=6)
+    add_topology_image(c, cache, "bgp_topology.png", 40, 540, caption="BGP AS-level Topology")
+    add_topology_image(c, cache, "isis_topology.png", 320, 540, caption="IS-IS Topology")
+    add_table_snapshot(c, cache, "bgp_tables.json", 40, 360, max_entries=6)
+    add_table_snapshot(c, cache, "isis_tables.json", 320, 360, max_entries=6)
 
     # Page 3: Observations
     c.showPage()
@@ -125,8 +281,17 @@ def make_report():
         c.drawString(40, y, line)
         y -= 12
 
+    # Page 4: Summary from the simulator and benchmark metrics
+    c.showPage()
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(40, 800, "Summary of Metrics")
+    y = add_convergence_table(c, cache, 40, 775)
+    add_bench_table(c, cache, 40, y - 20)
+
     c.save()
+    cache.save()
     print("✅ Report generated successfully:", REPORT_PATH)
+    print(f"   {len(cache.rebuilt)} sections rebuilt, {len(cache.reused)} reused from {cache.dir}")
 
 if __name__ == "__main__":
     make_report()
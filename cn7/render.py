@@ -0,0 +1,169 @@
+# render.py
+"""
+Topology images for the simulations, fast enough for large graphs.
+  - layouts are cached on disk under a hash of the nodes, edges and
+    weights, so re-rendering an unchanged topology skips the layout
+  - up to LARGE nodes the layout is the seeded spring layout the demos have
+    always used; above it a coarsened one (see coarse_layout), linear in
+    the edges apart from a spring layout of LARGE cells
+  - all edges are one LineCollection and all nodes one scatter, instead of
+    an artist per edge; labels and edge weights are only drawn up to
+    LABEL_LIMIT nodes, where they stay readable
+  - render_all draws several images in worker processes
+
+matplotlib is imported when drawing, not with this module.
+"""
+
+import hashlib
+import json
+import os
+import random
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import networkx as nx
+
+LARGE = 500
+LABEL_LIMIT = 60
+
+Job = Tuple[nx.Graph, Path, str]  # (graph, image path, title)
+
+
+def topology_key(graph: nx.Graph) -> str:
+    """Hash of the node order, the edges and their weights (everything the layout depends on)."""
+    h = hashlib.sha1()
+    h.update(repr(list(graph.nodes())).encode())
+    h.update(repr([(u, v, w) for u, v, w in graph.edges(data='weight', default=1)]).encode())
+    return h.hexdigest()
+
+
+def coarse_layout(graph: nx.Graph, cells: int = LARGE, smoothing: int = 3, seed: int = 42) -> Dict:
+    """
+    Multilevel layout for big graphs: partition the nodes into `cells` by a
+    multi-source BFS from random seeds (components the seeds miss get seeds
+    of their own), spring-lay-out the graph of cells, put each node around
+    its cell's position (further out the deeper it is in the BFS), then
+    pull every node towards its neighbors' mean a few times.
+    """
+    import numpy as np
+    from scipy.sparse import diags
+
+    nodes = list(graph.nodes())
+    rng = random.Random(seed)
+    seeds = rng.sample(nodes, min(cells, len(nodes)))
+    owner = {node: i for i, node in enumerate(seeds)}
+    depth = dict.fromkeys(seeds, 0)
+    frontier = list(seeds)
+    pending = iter(nodes)
+    while frontier:
+        nxt = []
+        for u in frontier:
+            for v in graph.neighbors(u):
+                if v not in owner:
+                    owner[v], depth[v] = owner[u], depth[u] + 1
+                    nxt.append(v)
+        frontier = nxt
+        if not frontier:
+            # another component: seed it from its first unreached node
+            for node in pending:
+                if node not in owner:
+                    owner[node], depth[node] = len(seeds), 0
+                    seeds.append(node)
+                    frontier = [node]
+                    break
+    coarse = nx.Graph()
+    coarse.add_nodes_from(range(len(seeds)))
+    coarse.add_edges_from((owner[u], owner[v]) for u, v in graph.edges() if owner[u] != owner[v])
+    centers = nx.spring_layout(coarse, seed=seed)
+    spread = 0.5 / len(seeds) ** 0.5  # about half the spacing of the cells
+    reach = {}
+    for node in nodes:
+        reach[owner[node]] = max(reach.get(owner[node], 0), depth[node])
+    angles = np.array([rng.random() for _ in nodes]) * 2 * np.pi
+    radius = np.array([spread * depth[node] / (reach[owner[node]] + 1) for node in nodes])
+    P = np.array([centers[owner[node]] for node in nodes])
+    P += np.column_stack([np.cos(angles), np.sin(angles)]) * radius[:, None]
+    A = nx.to_scipy_sparse_array(graph, nodelist=nodes, weight=None, format="csr")
+    degree = np.asarray(A.sum(axis=1)).ravel()
+    mean = diags(1 / np.maximum(degree, 1)) @ A
+    isolated = degree == 0
+    for _ in range(smoothing):
+        Q = mean @ P
+        Q[isolated] = P[isolated]
+        P = 0.5 * P + 0.5 * Q
+    return dict(zip(nodes, P))
+
+
+def compute_layout(graph: nx.Graph) -> Dict:
+    if graph.number_of_nodes() <= LARGE:
+        return nx.spring_layout(graph, seed=42)
+    return coarse_layout(graph)
+
+
+def cached_layout(graph: nx.Graph, cache_dir: Optional[Path] = None) -> Dict:
+    """node -> (x, y), read from or stored in cache_dir/<topology_key>.json if cache_dir is given."""
+    if cache_dir is None:
+        return compute_layout(graph)
+    path = Path(cache_dir) / f"{topology_key(graph)}.json"
+    if path.exists():
+        coords = json.loads(path.read_text())
+        return dict(zip(graph.nodes(), coords))
+    pos = compute_layout(graph)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # a temporary file of its own, as render_all workers may lay out the same topology at once
+    with tempfile.NamedTemporaryFile("w", dir=path.parent, suffix=".tmp", delete=False) as tmp:
+        # node order is part of the key, so the positions are stored in that order
+        json.dump([[float(c) for c in pos[node]] for node in graph.nodes()], tmp)
+    os.replace(tmp.name, path)
+    return pos
+
+
+def draw_graph(graph: nx.Graph, path: Path, title: str, cache_dir: Optional[Path] = None):
+    """Save graph as an image at path: one LineCollection for the edges, one scatter for the nodes."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import LineCollection
+
+    pos = cached_layout(graph, cache_dir)
+    n = graph.number_of_nodes()
+    small = n <= LABEL_LIMIT
+    fig, ax = plt.subplots(figsize=(6, 4))
+    segments = [(pos[u], pos[v]) for u, v in graph.edges()]
+    ax.add_collection(LineCollection(segments, colors="k", linewidths=1.0 if small else 0.2,
+                                     alpha=1.0 if small else 0.5, zorder=1))
+    xs, ys = zip(*(pos[node] for node in graph.nodes())) if n else ((), ())
+    ax.scatter(xs, ys, s=700 if small else max(1.0, 20000 / n), c="#1f78b4", zorder=2)
+    if small:
+        nx.draw_networkx_labels(graph, pos, ax=ax)
+        # edge labels (weights) if present
+        edge_labels = {(u, v): w for u, v, w in graph.edges(data='weight', default=1)}
+        nx.draw_networkx_edge_labels(graph, pos, edge_labels=edge_labels, ax=ax)
+    # the big labelled markers need room at the edges, as networkx leaves
+    ax.margins(0.1 if small else 0.02)
+    ax.autoscale_view()
+    ax.set_title(title if small else f"{title} ({n} nodes)")
+    ax.axis('off')
+    fig.tight_layout()
+    fig.savefig(path, dpi=200)
+    plt.close(fig)
+
+
+def _draw_job(args):
+    draw_graph(*args)
+
+
+def render_all(jobs: List[Job], cache_dir: Optional[Path] = None, workers: Optional[int] = None):
+    """Draw every (graph, path, title) job, in up to `workers` processes (default: one per CPU)."""
+    workers = min(len(jobs), workers or os.cpu_count() or 1)
+    tasks = [(graph, path, title, cache_dir) for graph, path, title in jobs]
+    if workers <= 1:
+        for task in tasks:
+            _draw_job(task)
+        return
+    # forked workers inherit matplotlib instead of each importing it
+    import matplotlib.pyplot  # noqa: F401
+    with ProcessPoolExecutor(workers) as pool:
+        list(pool.map(_draw_job, tasks))
@@ -0,0 +1,134 @@
+# rip_matrix.py
+"""
+Vectorized distance-vector engine for the RIP simulation.
+All distance vectors live in one N x N array and each synchronous exchange
+round is a min-plus relaxation: router r offered neighbor n's row gets
+cost(r, n) + D[n] and keeps the entries that are strictly cheaper, with the
+next hop recorded alongside. Neighbors are applied in each router's
+neighbor order, one neighbor "slot" at a time across all routers, and only
+entries that changed in the previous round are offered again (the
+triggered-update argument: an unchanged entry cannot win twice), so the
+result, including next-hop tie-breaking and the round count, is the same
+as the dict-based RIPRouter exchange.
+"""
+
+import gc
+from typing import Dict, List, Optional, Tuple
+
+import networkx as nx
+import numpy as np
+from convergence import RIP_ENTRY, RIP_HEADER, RIP_MAX_ENTRIES, ConvergenceMetrics
+
+INT_INF = np.iinfo(np.int64).max // 4  # "unreachable" for integer costs
+
+
+def min_plus_rip(graph: nx.Graph, max_iters: int = 50,
+                 metrics: Optional[ConvergenceMetrics] = None) -> Tuple[List, np.ndarray, np.ndarray, int]:
+    """
+    Run synchronous distance-vector rounds until nothing changes (or max_iters),
+    recording each round in metrics if given.
+    Returns (names, dist, next_hop, rounds): names in graph.nodes() order,
+    dist[r, d] the cost (INT_INF or inf when unreachable) and next_hop[r, d]
+    the index of the next hop (-1 when unreachable).
+    """
+    names = list(graph.nodes())
+    index = {name: i for i, name in enumerate(names)}
+    n = len(names)
+    neighbors = [[(index[nbr], graph.edges[name, nbr].get('weight', 1)) for nbr in graph.neighbors(name)]
+                 for name in names]
+    weights = [w for row in neighbors for _, w in row]
+    integral = all(isinstance(w, (int, np.integer)) for w in weights)
+    dtype, inf = (np.int64, INT_INF) if integral else (np.float64, np.inf)
+
+    dist = np.full((n, n), inf, dtype=dtype)
+    next_hop = np.full((n, n), -1, dtype=np.int32)
+    diag = np.arange(n)
+    dist[diag, diag] = 0
+    next_hop[diag, diag] = diag
+    # neighbor slots: slot j holds every router's j-th neighbor
+    degree = max((len(row) for row in neighbors), default=0)
+    slots = []
+    for j in range(degree):
+        rows = np.array([r for r in range(n) if len(neighbors[r]) > j], dtype=np.intp)
+        nbrs = np.array([neighbors[r][j][0] for r in rows], dtype=np.intp)
+        costs = np.array([neighbors[r][j][1] for r in rows], dtype=dtype)
+        dist[rows, nbrs] = costs
+        next_hop[rows, nbrs] = nbrs
+        slots.append((rows, nbrs, costs))
+
+    # entries changed in the previous round as flat indices r * n + d, sorted,
+    # so each router's changes are one contiguous run; round 1 sends the
+    # initial tables
+    flat_dist = dist.reshape(-1)
+    flat_hop = next_hop.reshape(-1)
+    changed = np.flatnonzero(flat_dist < inf)
+    marked = np.zeros(n * n, dtype=bool)
+    rounds = 0
+    for it in range(max_iters):
+        if not len(changed):
+            break
+        rounds += 1
+        if metrics is not None:
+            metrics.begin_round()
+            sent = carried = datagrams = 0
+        # end-of-round values offered to the neighbors (the snapshot)
+        owner = changed // n
+        offered_dest = changed - owner * n
+        offered_cost = flat_dist[changed]
+        first = np.searchsorted(owner, np.arange(n + 1))
+        for rows, nbrs, costs in slots:
+            # each router has one neighbor per slot, so within a slot every
+            # (router, dest) receives at most one offer
+            counts = first[nbrs + 1] - first[nbrs]
+            total = int(counts.sum())
+            if not total:
+                continue
+            if metrics is not None:
+                nonempty = counts[counts > 0]
+                sent += len(nonempty)
+                carried += total
+                datagrams += int(((nonempty + RIP_MAX_ENTRIES - 1) // RIP_MAX_ENTRIES).sum())
+            ends = np.cumsum(counts)
+            pick = np.repeat(first[nbrs] - ends + counts, counts) + np.arange(total)
+            receiver = np.repeat(rows, counts)
+            key = receiver * n + offered_dest[pick]
+            offer = offered_cost[pick] + np.repeat(costs, counts)
+            better = offer < flat_dist[key]
+            key = key[better]
+            flat_dist[key] = offer[better]
+            flat_hop[key] = np.repeat(nbrs, counts)[better]
+            marked[key] = True
+        # a dense scan is far cheaper than sorting the updated keys
+        changed = np.flatnonzero(marked)
+        marked[changed] = False
+        if metrics is not None:
+            metrics.end_round(len(changed), sent, carried, RIP_HEADER * datagrams + RIP_ENTRY * carried)
+    return names, dist, next_hop, rounds
+
+
+def simulate_rip_matrix(graph: nx.Graph, max_iters: int = 50,
+                        metrics: Optional[ConvergenceMetrics] = None) -> Tuple[Dict, int]:
+    """Same {router: {dest: (cost, next_hop)}} tables as simulate_rip, plus the round count."""
+    names, dist, next_hop, rounds = min_plus_rip(graph, max_iters, metrics)
+    order = sorted(range(len(names)), key=names.__getitem__)
+    sorted_names = [names[i] for i in order]
+    inf = INT_INF if dist.dtype == np.int64 else np.inf
+    tables = {}
+    # N^2 small tuples would otherwise trigger repeated full collections
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for r, name in enumerate(names):
+            costs = dist[r, order]
+            hops = next_hop[r, order]
+            reachable = costs < inf
+            if reachable.all():
+                dests = sorted_names
+            else:
+                dests = [d for d, ok in zip(sorted_names, reachable.tolist()) if ok]
+                costs, hops = costs[reachable], hops[reachable]
+            tables[name] = dict(zip(dests, zip(costs.tolist(), map(names.__getitem__, hops.tolist()))))
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return tables, rounds
@@ -5,9 +5,12 @@ Each router maintains a distance vector (# of hops). Routers periodically exchan
 routing tables until convergence.
 """
 
-from typing import Dict, Tuple
+from typing import Dict, Optional, Set, Tuple
 import networkx as nx
 import copy
+from convergence import ConvergenceMetrics, rip_bytes
+
+MODES = ("periodic", "triggered", "matrix")
 
 class RIPRouter:
     def __init__(self, name: str, neighbors: Dict[str,int]):
@@ -18,24 +21,50 @@ class RIPRouter:
         for n, cost in neighbors.items():
             self.table[n] = (cost, n)
 
-    def update_from_neighbor(self, neighbor_name: str, neighbor_table: Dict[str, Tuple[int,str]], link_cost: int):
-        """Incorporate neighbor's distance vector. Returns True if table changed."""
+    def update_from_neighbor(self, neighbor_name: str, neighbor_table: Dict[str, Tuple[int,str]], link_cost: int,
+                             changed_dests: Optional[Set[str]] = None):
+        """
+        Incorporate neighbor's distance vector (or just its changed entries).
+        Returns True if table changed; changed destinations are added to changed_dests if given.
+        """
         changed = False
+        table = self.table
+        name = self.name
         for dest, (n_cost, n_next) in neighbor_table.items():
-            if dest == self.name:
+            # a route through us can never beat our own (split horizon)
+            if dest == name or n_next == name:
                 continue
             # cost via neighbor = cost to neighbor + neighbor's cost to dest
             cost_via = link_cost + n_cost
-            if dest not in self.table or cost_via < self.table[dest][0]:
-                self.table[dest] = (cost_via, neighbor_name)
+            current = table.get(dest)
+            if current is None or cost_via < current[0]:
+                table[dest] = (cost_via, neighbor_name)
                 changed = True
+                if changed_dests is not None:
+                    changed_dests.add(dest)
         return changed
 
-def simulate_rip(graph: nx.Graph, max_iters=50):
+def simulate_rip(graph: nx.Graph, max_iters=50, mode: str = "periodic", stats: Optional[Dict[str, int]] = None,
+                 metrics: Optional[ConvergenceMetrics] = None):
     """
     graph: undirected weighted networkx graph where node names are router names
     and edge attribute 'weight' indicates cost (we treat as hop cost; if omitted assume 1)
+    mode: "periodic" sends every full table to every neighbor each round;
+    "triggered" sends only the entries that changed in the previous round;
+    "matrix" runs the rounds as NumPy min-plus relaxations (see rip_matrix).
+    All give identical tables (same rounds, same tie-breaking).
+    stats: optional dict, filled with rounds, messages and entries exchanged
+    (rounds only for "matrix")
+    metrics: optional ConvergenceMetrics, given one record per round (see convergence)
     """
+    if mode not in MODES:
+        raise ValueError(f"Unknown RIP mode: {mode}")
+    if mode == "matrix":
+        from rip_matrix import simulate_rip_matrix
+        tables, rounds = simulate_rip_matrix(graph, max_iters, metrics)
+        if stats is not None:
+            stats.update(rounds=rounds)
+        return tables
     # Initialize routers
     routers = {}
     for node in graph.nodes():
@@ -45,21 +74,40 @@ def simulate_rip(graph: nx.Graph, max_iters=50):
             neighbors[nbr] = cost
         routers[node] = RIPRouter(node, neighbors)
 
-    # Periodic exchange until convergence
-    for it in range(max_iters):
-        changed_any = False
-        # snapshot to simulate simultaneous exchanges
-        snapshot = {r: copy.deepcopy(routers[r].table) for r in routers}
-        for router_name, router in routers.items():
-            for nbr in graph.neighbors(router_name):
-                link_cost = graph.edges[router_name, nbr].get('weight', 1)
-                changed = router.update_from_neighbor(nbr, snapshot[nbr], link_cost)
-                if changed:
-                    changed_any = True
-        if not changed_any:
-            # converged
-            # print(f"RIP converged in {it} iterations")
-            break
+    if mode == "triggered":
+        rounds, messages, entries = _triggered_exchange(graph, routers, max_iters, metrics)
+    else:
+        rounds = messages = entries = 0
+        # Periodic exchange until convergence
+        for it in range(max_iters):
+            rounds += 1
+            changed_any = False
+            if metrics is not None:
+                metrics.begin_round()
+                sent, carried, bytes_sent = messages, entries, 0
+            # snapshot to simulate simultaneous exchanges
+            snapshot = {r: copy.deepcopy(routers[r].table) for r in routers}
+            for router_name, router in routers.items():
+                for nbr in graph.neighbors(router_name):
+                    link_cost = graph.edges[router_name, nbr].get('weight', 1)
+                    messages += 1
+                    entries += len(snapshot[nbr])
+                    if metrics is not None:
+                        bytes_sent += rip_bytes(len(snapshot[nbr]))
+                    changed = router.update_from_neighbor(nbr, snapshot[nbr], link_cost)
+                    if changed:
+                        changed_any = True
+            if metrics is not None:
+                # update_from_neighbor only ever lowers a cost, so nothing counts to infinity
+                changed = sum(1 for name, router in routers.items()
+                              for dest, route in router.table.items() if snapshot[name].get(dest) != route)
+                metrics.end_round(changed, messages - sent, entries - carried, bytes_sent)
+            if not changed_any:
+                # converged
+                # print(f"RIP converged in {it} iterations")
+                break
+    if stats is not None:
+        stats.update(rounds=rounds, messages=messages, entries=entries)
 
     # Format output
     routing_tables = {}
@@ -68,6 +116,49 @@ def simulate_rip(graph: nx.Graph, max_iters=50):
         routing_tables[name] = dict(sorted(r.table.items()))
     return routing_tables
 
+def _triggered_exchange(graph: nx.Graph, routers: Dict[str, RIPRouter], max_iters: int,
+                        metrics: Optional[ConvergenceMetrics] = None) -> Tuple[int, int, int]:
+    """
+    Triggered updates in synchronous rounds: each router sends its neighbors only
+    the entries that changed in the previous round, with their end-of-round values.
+    An unchanged entry was already offered and costs only decrease, so it could
+    not win again; routers and neighbors are visited in the periodic order, so
+    ties resolve the same way.  Returns (rounds, messages, entries).
+    """
+    neighbors = {name: [(nbr, graph.edges[name, nbr].get('weight', 1)) for nbr in graph.neighbors(name)]
+                 for name in routers}
+    # round 1 carries the initial tables
+    pending = {name: dict(r.table) for name, r in routers.items()}
+    rounds = messages = entries = 0
+    for it in range(max_iters):
+        if not pending:
+            break
+        rounds += 1
+        if metrics is not None:
+            metrics.begin_round()
+            sent, carried = messages, entries
+            bytes_sent = sum(len(neighbors[name]) * rip_bytes(len(update)) for name, update in pending.items())
+        changed = {}
+        for router_name, router in routers.items():
+            dests = None
+            for nbr, link_cost in neighbors[router_name]:
+                update = pending.get(nbr)
+                if update is None:
+                    continue
+                messages += 1
+                entries += len(update)
+                if dests is None:
+                    dests = set()
+                router.update_from_neighbor(nbr, update, link_cost, dests)
+            if dests:
+                changed[router_name] = dests
+        pending = {name: {dest: routers[name].table[dest] for dest in dests}
+                   for name, dests in changed.items()}
+        if metrics is not None:
+            metrics.end_round(sum(len(dests) for dests in changed.values()),
+                              messages - sent, entries - carried, bytes_sent)
+    return rounds, messages, entries
+
 # Example: small helper if run directly
 if __name__ == "__main__":
     G = nx.Graph()
@@ -75,7 +166,9 @@ if __name__ == "__main__":
         ("A","B",1), ("B","C",1), ("C","D",1), ("B","D",2), ("A","E",1)
     ]
     G.add_weighted_edges_from(edges)
-    tables = simulate_rip(G)
+    stats = {}
+    tables = simulate_rip(G, mode="triggered", stats=stats)
+    print("Triggered updates:", stats)
     for router, table in tables.items():
         print(f"Router {router} routing table:")
         for dest,(cost,next_hop) in table.items():
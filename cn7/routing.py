@@ -0,0 +1,89 @@
+# routing.py
+"""
+Engine registry for the routing simulations, the one entry point run_all.py
+and swv.py share.  Each protocol has a "reference" engine (the plain
+networkx / dict implementation) and faster engines; an engine names its
+module and function and is only imported when it is first used, so running
+one protocol loads neither the other protocols nor NumPy/SciPy.
+
+    from routing import simulate
+    tables = simulate("ospf", G, engine="csgraph")
+"""
+
+from importlib import import_module
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+
+class Engine(NamedTuple):
+    module: str
+    function: str
+    options: Dict        # keyword arguments the engine always passes
+
+
+ENGINES: Dict[str, Dict[str, Engine]] = {
+    "rip": {
+        "reference": Engine("rip_sim", "simulate_rip", {}),
+        "triggered": Engine("rip_sim", "simulate_rip", {"mode": "triggered"}),
+        "matrix": Engine("rip_sim", "simulate_rip", {"mode": "matrix"}),
+    },
+    "ospf": {
+        "reference": Engine("ospf_sim", "simulate_ospf", {}),
+        "csgraph": Engine("ospf_sim", "simulate_ospf", {"backend": "csgraph"}),
+    },
+    "bgp": {
+        "reference": Engine("bgp_sim", "simulate_bgp", {}),
+        "event": Engine("bgp_sim", "simulate_bgp", {"mode": "event"}),
+        "policy": Engine("bgp_sim", "simulate_bgp", {"mode": "policy"}),
+    },
+    "isis": {
+        "reference": Engine("isis_sim", "simulate_isis", {}),
+        "csgraph": Engine("isis_sim", "simulate_isis", {"backend": "csgraph"}),
+    },
+}
+
+
+def register_engine(protocol: str, name: str, module: str, function: str, **options):
+    """Add (or replace) an engine; module is imported on first use."""
+    ENGINES.setdefault(protocol, {})[name] = Engine(module, function, options)
+
+
+def engines(protocol: Optional[str] = None) -> List[str]:
+    """Protocol names, or the engine names of one protocol."""
+    if protocol is None:
+        return list(ENGINES)
+    if protocol not in ENGINES:
+        raise ValueError(f"Unknown protocol: {protocol}")
+    return list(ENGINES[protocol])
+
+
+def get_engine(protocol: str, engine: str = "reference") -> Callable:
+    """The simulate function for protocol/engine, with the engine's options applied."""
+    if engine not in engines(protocol):
+        raise ValueError(f"Unknown {protocol} engine: {engine}")
+    spec = ENGINES[protocol][engine]
+    function = getattr(import_module(spec.module), spec.function)
+    if not spec.options:
+        return function
+    return lambda *args, **kwargs: function(*args, **{**spec.options, **kwargs})
+
+
+def simulate(protocol: str, *args, engine: str = "reference", **kwargs):
+    """Run protocol's simulation with the given engine; arguments go to its simulate function."""
+    return get_engine(protocol, engine)(*args, **kwargs)
+
+
+def parse_selection(args: List[str]) -> Dict[str, str]:
+    """
+    {protocol: engine} from command-line words "ospf" or "ospf=csgraph";
+    every protocol with its reference engine when args is empty.
+    """
+    if not args:
+        return {protocol: "reference" for protocol in ENGINES}
+    selection = {}
+    for arg in args:
+        protocol, _, engine = arg.partition("=")
+        engine = engine or "reference"
+        if engine not in engines(protocol):
+            raise ValueError(f"Unknown {protocol} engine: {engine}")
+        selection[protocol] = engine
+    return selection
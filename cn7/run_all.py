@@ -5,25 +5,23 @@ Saves simple text snapshots you can screenshot for submission.
 """
 
 import networkx as nx
-from rip_sim import simulate_rip
-from ospf_sim import simulate_ospf
-from bgp_sim import simulate_bgp
-from isis_sim import simulate_isis
-import json
+from routing import parse_selection, simulate
+from table_io import save_snapshot, split_format
+import sys
 from pathlib import Path
 
 out_dir = Path("sim_outputs")
 out_dir.mkdir(exist_ok=True)
+FORMAT = "json"  # routing-table file format, see table_io
 
-def demo_rip():
+def demo_rip(engine="reference"):
     G = nx.Graph()
     G.add_weighted_edges_from([
         ("R1","R2",1), ("R2","R3",1), ("R3","R4",1),
         ("R2","R4",2), ("R1","R5",1)
     ])
-    tables = simulate_rip(G)
-    path = out_dir / "rip_tables.json"
-    path.write_text(json.dumps(tables, indent=2))
+    tables = simulate("rip", G, engine=engine)
+    path = save_snapshot(tables, out_dir, "rip_tables", FORMAT)
     print("RIP routing tables written to", path)
     for r,t in tables.items():
         print(f"=== {r} ===")
@@ -31,14 +29,14 @@ def demo_rip():
             print(f"{dest:>4}  cost={cost:<3}  next={nxt}")
         print()
 
-def demo_ospf():
+def demo_ospf(engine="reference"):
     G = nx.Graph()
     G.add_weighted_edges_from([
         ("R1","R2",1), ("R2","R3",1), ("R3","R4",5),
         ("R1","R4",10), ("R2","R4",2)
     ])
-    tables = simulate_ospf(G)
-    (out_dir/"ospf_tables.json").write_text(json.dumps(tables, indent=2))
+    tables = simulate("ospf", G, engine=engine)
+    save_snapshot(tables, out_dir, "ospf_tables", FORMAT)
     print("OSPF routing tables:")
     for r,t in tables.items():
         print(f"--- {r} ---")
@@ -46,12 +44,12 @@ def demo_ospf():
             print(f"{dest:>4} cost={cost:<3} next={next_hop}")
         print()
 
-def demo_bgp():
+def demo_bgp(engine="reference"):
     G = nx.DiGraph()
     G.add_edges_from([("AS1","AS2"), ("AS2","AS3"), ("AS3","AS4"), ("AS2","AS4")])
     origins = {"AS4":["10.0.0.0/24"], "AS3":["192.0.2.0/24"]}
-    tables = simulate_bgp(G, origins)
-    (out_dir/"bgp_tables.json").write_text(json.dumps(tables, indent=2))
+    tables = simulate("bgp", G, origins, engine=engine)
+    save_snapshot(tables, out_dir, "bgp_tables", FORMAT)
     print("BGP routing tables:")
     for asn,table in tables.items():
         print(f"--- {asn} ---")
@@ -59,11 +57,11 @@ def demo_bgp():
             print(f"{prefix:>18}  AS-PATH: {' '.join(path)}")
         print()
 
-def demo_isis():
+def demo_isis(engine="reference"):
     G = nx.Graph()
     G.add_weighted_edges_from([("A","B",1),("B","C",1),("C","D",1),("A","D",4)])
-    tables = simulate_isis(G)
-    (out_dir/"isis_tables.json").write_text(json.dumps(tables, indent=2))
+    tables = simulate("isis", G, engine=engine)
+    save_snapshot(tables, out_dir, "isis_tables", FORMAT)
     print("IS-IS routing tables:")
     for r,t in tables.items():
         print(f"--- {r} ---")
@@ -71,9 +69,12 @@ def demo_isis():
             print(f"{dest:>4} cost={cost:<3} next={next_hop}")
         print()
 
+DEMOS = {"rip": demo_rip, "ospf": demo_ospf, "bgp": demo_bgp, "isis": demo_isis}
+
 if __name__ == "__main__":
-    demo_rip()
-    demo_ospf()
-    demo_bgp()
-    demo_isis()
-    print("All simulations done. Check sim_outputs directory for JSON snapshots.")
+    # python run_all.py [--format json|jsonl|rtb] [protocol[=engine] ...], e.g. "ospf=csgraph bgp";
+    # all by default.  rtb/jsonl stream large tables (BGP's AS_PATH tables go to jsonl for rtb)
+    FORMAT, args = split_format(sys.argv[1:])
+    for protocol, engine in parse_selection(args).items():
+        DEMOS[protocol](engine)
+    print("All simulations done. Check sim_outputs directory for routing-table snapshots.")
@@ -0,0 +1,499 @@
+# spf_engine.py
+"""
+All-pairs shortest-path-first engine for the link-state simulators.
+The topology is converted to CSR arrays once, scipy's native Dijkstra
+computes distance rows for a block of sources per call, and next hops are
+read off the shortest-path parents by pointer jumping, so no path lists
+are ever built.
+
+The tables are identical to the networkx version's, equal-cost ties
+included: from the distances, _settle recovers the order networkx's heap
+settles nodes in and the parent that gave each its path, and costs are ints
+wherever the path's weights are.  spf_arrays needs only the parents, and
+_parents finds them without ranking every level when equal-cost ties are
+rare.
+
+With workers > 1 the sources are sharded across a process pool. The CSR
+arrays and the N x N output arrays (dist, next hop, settle order) live in
+shared memory: every worker maps them and writes its block of rows in
+place, so neither the topology nor any result is pickled, and the tables
+are built from the arrays in the parent.
+"""
+
+import gc
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import networkx as nx
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+NO_HOP = -1
+
+
+def graph_to_csr(graph: nx.Graph) -> Tuple[List, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    (names, indptr, indices, weights) of graph in graph.nodes() order.
+    Missing weights count as 1, the cheapest of parallel edges is kept and
+    zero-cost links stay links (stored explicitly).
+    """
+    names = list(graph.nodes())
+    index = {name: i for i, name in enumerate(names)}
+    costs = {}
+    for u, v, data in graph.edges(data=True):
+        w = data.get('weight', 1)
+        pairs = ((index[u], index[v]),) if graph.is_directed() else ((index[u], index[v]), (index[v], index[u]))
+        for key in pairs:
+            if key not in costs or w < costs[key]:
+                costs[key] = w
+    keys = sorted(costs)
+    rows = np.fromiter((r for r, _ in keys), dtype=np.int64, count=len(keys))
+    indices = np.fromiter((c for _, c in keys), dtype=np.int32, count=len(keys))
+    weights = np.fromiter((costs[k] for k in keys), dtype=np.float64, count=len(keys))
+    indptr = np.searchsorted(rows, np.arange(len(names) + 1)).astype(np.int32)
+    return names, indptr, indices, weights
+
+
+def graph_edges(graph: nx.Graph) -> Tuple[np.ndarray, ...]:
+    """
+    (tail, head, weight, position, inexact) arrays of the directed edges,
+    sorted by head: position is head's place in tail's adjacency, the order
+    networkx relaxes edges in, and inexact marks weights that are not ints.
+    """
+    index = {name: i for i, name in enumerate(graph.nodes())}
+    tails, heads, weights, positions, inexact = [], [], [], [], []
+    for u, nbrs in graph.adj.items():
+        for position, (v, data) in enumerate(nbrs.items()):
+            w = data.get('weight', 1)
+            tails.append(index[u])
+            heads.append(index[v])
+            weights.append(w)
+            positions.append(position)
+            inexact.append(not isinstance(w, (int, np.integer)))
+    order = np.argsort(np.array(heads, dtype=np.int64), kind="stable")
+    return (np.array(tails, dtype=np.int64)[order], np.array(heads, dtype=np.int64)[order],
+            np.array(weights, dtype=np.float64)[order], np.array(positions, dtype=np.int64)[order],
+            np.array(inexact, dtype=bool)[order])
+
+
+def _tight_edges(dist: np.ndarray, edges: Tuple[np.ndarray, ...]) -> Tuple[np.ndarray, ...]:
+    """
+    The tight edges of a dist block (dist[tail] + weight == dist[head]),
+    grouped by (source row, head): (target, starts, tail_flat, eids) where
+    the candidates for the parent of flat node target[j] are entries
+    starts[j] up to starts[j + 1], eids[e] is entry e's edge and
+    tail_flat[e] its tail as a flat index into the block.  Costs must be
+    positive, so that no edge into a source is tight.
+    """
+    tail, head, weight = edges[:3]
+    k, n = dist.shape
+    reachable = np.isfinite(dist).all()
+    found = []
+    # row by row, so the gathers stay in cache
+    for row in dist:
+        to = row[head]
+        tight = row[tail] + weight == to
+        if not reachable:
+            tight &= np.isfinite(to)
+        found.append(np.flatnonzero(tight))
+    eids = np.concatenate(found)
+    rows = np.repeat(np.arange(k), [len(f) for f in found])
+    target = rows * n + head[eids]
+    starts = np.flatnonzero(np.r_[True, target[1:] != target[:-1]]) if len(target) else target
+    return target[starts], starts, rows * n + tail[eids], eids
+
+
+def _settle(dist: np.ndarray, sources: np.ndarray, edges: Tuple[np.ndarray, ...]):
+    """
+    (parent, order, inexact) as networkx's Dijkstra leaves them, from a dist
+    block.  networkx settles nodes by (distance, push count), and a node's
+    final push comes from the first-settled neighbor offering its final
+    distance, in that neighbor's adjacency order.  So the settle order sorts
+    by (dist, parent's rank, position in the parent's adjacency), and the
+    parent is the tight in-neighbor of lowest rank.  With positive costs a
+    node's in-neighbors all settle at lower distances, so the levels are
+    ranked in one pass outwards from the source, and since a level holding
+    a single node needs no ranking, pass j ranks the j-th level with several
+    nodes of every row at once.  Zero-cost links can tie a node with its
+    parent and are left to _settle_reference.
+    parent holds flat indices into the block (-1 at the sources and
+    unreachable nodes), order[i] lists the nodes in settle order and
+    inexact[i, x] says whether x's path has a non-int weight.
+    """
+    tail, head, weight, position, inexact_edge = edges
+    if not weight.all():
+        return _settle_reference(dist, sources, edges)
+    k, n = dist.shape
+    target, starts, tail_flat, eids = _tight_edges(dist, edges)
+    sizes = np.diff(np.r_[starts, len(eids)])
+    m = max(len(eids), 1)
+    width = int(position.max()) + 1 if len(position) else 1
+    # each node's first candidate; the others are weighed in the node's pass
+    parent = np.full(k * n, -1, dtype=np.int64)
+    parent[target] = tail_flat[starts]
+    offset = np.zeros(k * n, dtype=np.int64)
+    offset[target] = position[eids[starts]]
+    tied = np.flatnonzero(sizes > 1)
+    tied_of = np.full(k * n, -1, dtype=np.int64)
+    tied_of[target[tied]] = tied
+    # rows sorted by distance; nodes sharing a level are ranked below, so any order among them will do
+    flat_order = (np.argsort(dist, axis=1) + (np.arange(k) * n)[:, None]).ravel()
+    ordered = dist.ravel()[flat_order].reshape(k, n)
+    first = np.empty((k, n), dtype=bool)
+    first[:, 0] = True
+    np.not_equal(ordered[:, 1:], ordered[:, :-1], out=first[:, 1:])
+    alone = first.copy()
+    alone[:, :-1] &= first[:, 1:]
+    # position in the sorted row: final for a node alone at its distance
+    rank = np.empty(k * n, dtype=np.int64)
+    rank[flat_order] = np.tile(np.arange(n), k)
+    # the passes: each shared level's sorted positions, pass by pass and row by row
+    step = np.cumsum(first & ~alone, axis=1)
+    step[alone | ~np.isfinite(ordered)] = 0
+    step = step.ravel()
+    shared = np.flatnonzero(step)
+    passes = int(step.max(initial=0))
+    shared = shared[np.argsort(step[shared].astype(np.min_scalar_type(passes)), kind="stable")]
+    bounds = np.searchsorted(step[shared], np.arange(1, passes + 2))
+    nodes = flat_order[shared]
+    slots = shared % n
+    row_key = shared // n * (n * width)
+    parent_of = parent[nodes]
+    offset_of = offset[nodes]
+    # entries of the nodes with several candidates, laid out pass by pass
+    tied_at = np.flatnonzero(tied_of[nodes] >= 0)
+    tied_sizes = sizes[tied_of[nodes[tied_at]]]
+    tied_offsets = np.r_[0, np.cumsum(tied_sizes)]
+    tied_entries = np.repeat(starts[tied_of[nodes[tied_at]]] - tied_offsets[:-1], tied_sizes) + \
+        np.arange(tied_offsets[-1])
+    tied_bounds = np.searchsorted(tied_at, bounds)
+    lo = t_lo = 0
+    for hi, t_hi in zip(bounds.tolist(), tied_bounds.tolist()):
+        if t_hi > t_lo:
+            entries = tied_entries[tied_offsets[t_lo]:tied_offsets[t_hi]]
+            best = np.minimum.reduceat(rank[tail_flat[entries]] * m + entries,
+                                       tied_offsets[t_lo:t_hi] - tied_offsets[t_lo]) % m
+            parent_of[tied_at[t_lo:t_hi]] = tail_flat[best]
+            offset_of[tied_at[t_lo:t_hi]] = position[eids[best]]
+        key = row_key[lo:hi] + rank[parent_of[lo:hi]] * width + offset_of[lo:hi]
+        rank[nodes[lo:hi][np.argsort(key)]] = slots[lo:hi]
+        lo, t_lo = hi, t_hi
+    # every node with several candidates, those alone at their distance included
+    chosen = starts.copy()
+    if len(tied):
+        entries = np.flatnonzero(np.repeat(sizes > 1, sizes))
+        chosen[tied] = np.minimum.reduceat(rank[tail_flat[entries]] * m + entries,
+                                           np.r_[0, np.cumsum(sizes[tied])[:-1]]) % m
+        parent[target[tied]] = tail_flat[chosen[tied]]
+    order = np.empty((k, n), dtype=np.int64)
+    order[np.arange(k)[:, None], rank.reshape(k, n)] = np.arange(n)
+    inexact = np.zeros(k * n, dtype=bool)
+    if inexact_edge.any():
+        inexact[target] = inexact_edge[eids[chosen]]
+        # OR along each path by pointer doubling, as in _next_hops
+        anc = np.where(parent < 0, np.arange(k * n), parent)
+        while True:
+            inexact |= inexact[anc]
+            jumped = anc[anc]
+            if np.array_equal(jumped, anc):
+                break
+            anc = jumped
+    return parent, order, inexact.reshape(k, n)
+
+
+def _parents(dist: np.ndarray, sources: np.ndarray, edges: Tuple[np.ndarray, ...]) -> np.ndarray:
+    """
+    The parent column of _settle alone, which is all the next hops need.
+    A node's parent is its candidate nearest the source, and only when
+    several share that distance does the settle order matter: those ties
+    are broken one level at a time by walking up from the tied candidates
+    (_settles_first) instead of ranking every level.  Where ties are
+    common (unit costs) ranking is cheaper, and _settle does it.
+    """
+    tail, head, weight, position, inexact_edge = edges
+    if not weight.all():
+        return _settle_reference(dist, sources, edges)[0]
+    k, n = dist.shape
+    target, starts, tail_flat, eids = _tight_edges(dist, edges)
+    sizes = np.diff(np.r_[starts, len(eids)])
+    flat_dist = dist.ravel()
+    # the nearest candidates of every node with several
+    tied = np.flatnonzero(sizes > 1)
+    entries = np.flatnonzero(np.repeat(sizes > 1, sizes))
+    owner = np.repeat(np.arange(len(tied)), sizes[tied])
+    reach = flat_dist[tail_flat[entries]]
+    if len(tied):
+        nearest = reach == np.minimum.reduceat(reach, np.r_[0, np.cumsum(sizes[tied])[:-1]])[owner]
+        entries, owner = entries[nearest], owner[nearest]
+    count = np.bincount(owner, minlength=len(tied))
+    first = np.r_[0, np.cumsum(count)]
+    chosen = starts.copy()
+    chosen[tied] = entries[first[:-1]]
+    ties = np.flatnonzero(count > 1)
+    if len(ties) * 5 > len(target):
+        return _settle(dist, sources, edges)[0]
+    parent = np.full(k * n, -1, dtype=np.int64)
+    parent[target] = tail_flat[chosen]
+    offset = np.zeros(k * n, dtype=np.int64)
+    offset[target] = position[eids[chosen]]
+    if not len(ties):
+        return parent
+    # pass j breaks the ties at each row's j-th distance holding any
+    tie_node = target[tied[ties]]
+    tie_dist = flat_dist[tie_node]
+    rows = tie_node // n
+    by_level = np.lexsort((tie_dist, rows))
+    ties, tie_node, tie_dist, rows = ties[by_level], tie_node[by_level], tie_dist[by_level], rows[by_level]
+    level = np.cumsum(np.r_[True, (rows[1:] != rows[:-1]) | (tie_dist[1:] != tie_dist[:-1])])
+    step = level - np.maximum.accumulate(np.where(np.r_[True, rows[1:] != rows[:-1]], level, 1)) + 1
+    by_step = np.argsort(step, kind="stable")
+    ties, tie_node = ties[by_step], tie_node[by_step]
+    bounds = np.searchsorted(step[by_step], np.arange(2, int(step.max()) + 2))
+    lo = 0
+    for hi in bounds.tolist():
+        group = ties[lo:hi]
+        best = entries[first[group]]
+        for r in range(1, int(count[group].max(initial=0))):
+            more = np.flatnonzero(count[group] > r)
+            other = entries[first[group[more]] + r]
+            better = _settles_first(tail_flat[other], tail_flat[best[more]], parent, offset, flat_dist)
+            best[more[better]] = other[better]
+        parent[tie_node[lo:hi]] = tail_flat[best]
+        offset[tie_node[lo:hi]] = position[eids[best]]
+        lo = hi
+    return parent
+
+
+def _settles_first(a: np.ndarray, b: np.ndarray, parent: np.ndarray, offset: np.ndarray,
+                   flat_dist: np.ndarray) -> np.ndarray:
+    """
+    Whether flat node a[i] settles before b[i], two nodes of one row at one
+    distance: walk both up the parents until they share a parent (then the
+    one earlier in its adjacency) or their parents' distances differ (then
+    the one with the nearer parent).  The parents above must be final.
+    """
+    result = np.empty(len(a), dtype=bool)
+    pending = np.arange(len(a))
+    while len(pending):
+        pa, pb = parent[a], parent[b]
+        merged = pa == pb
+        result[pending[merged]] = offset[a[merged]] < offset[b[merged]]
+        da, db = flat_dist[pa], flat_dist[pb]
+        apart = ~merged & (da != db)
+        result[pending[apart]] = da[apart] < db[apart]
+        going = ~merged & ~apart
+        pending, a, b = pending[going], pa[going], pb[going]
+    return result
+
+
+def _settle_reference(dist: np.ndarray, sources: np.ndarray, edges: Tuple[np.ndarray, ...]):
+    """
+    _settle by running networkx's Dijkstra from each source, for graphs with
+    zero-cost links.  The edges are added in adjacency order, int where the
+    original weight is, so the settle order, parents and cost types match.
+    """
+    tail, head, weight, position, inexact_edge = edges
+    k, n = dist.shape
+    graph = nx.DiGraph()
+    graph.add_nodes_from(range(n))
+    by_tail = np.lexsort((position, tail))
+    graph.add_weighted_edges_from(
+        (u, v, w if inexact else int(w)) for u, v, w, inexact in
+        zip(tail[by_tail].tolist(), head[by_tail].tolist(), weight[by_tail].tolist(), inexact_edge[by_tail].tolist()))
+    parent = np.full((k, n), -1, dtype=np.int64)
+    order = np.empty((k, n), dtype=np.int64)
+    inexact = np.zeros((k, n), dtype=bool)
+    for i, source in enumerate(sources.tolist()):
+        lengths, paths = nx.single_source_dijkstra(graph, source)
+        settled = list(lengths)
+        order[i] = np.r_[settled, np.flatnonzero(~np.isfinite(dist[i]))]
+        inexact[i, settled] = [isinstance(d, float) for d in lengths.values()]
+        for node, path in paths.items():
+            if len(path) > 1:
+                parent[i, node] = i * n + path[-2]
+    return parent.ravel(), order, inexact
+
+
+def _next_hops(parent: np.ndarray, sources: np.ndarray) -> np.ndarray:
+    """
+    Next hop from sources[i] towards every node, from the flat parent
+    pointers of a block (negative when none): the node on x's path whose
+    parent is the source.  Every node points at its parent and the pointers
+    are doubled (anc = anc[anc]) until they all reach a first-hop node,
+    O(log path length) vectorized passes.
+    """
+    k = len(sources)
+    n = len(parent) // k
+    flat = np.arange(k * n, dtype=np.int64)
+    root = (parent < 0) | (parent == (np.arange(k) * n + sources).repeat(n))
+    anc = np.where(root, flat, parent)
+    while True:
+        jumped = anc[anc]
+        if np.array_equal(jumped, anc):
+            break
+        anc = jumped
+    hop = (anc % n).astype(np.int32).reshape(k, n)
+    hop[(parent < 0).reshape(k, n)] = NO_HOP
+    hop[np.arange(k), sources] = sources
+    return hop
+
+
+def _spf_block(csr: csr_matrix, edges: Tuple[np.ndarray, ...], chunk: np.ndarray, tables: bool = True):
+    """
+    (dist, next_hop, order, inexact) for one block of sources, next hops and
+    order as networkx's; just (dist, next_hop) unless tables.
+    """
+    dist = dijkstra(csr, directed=True, indices=chunk)
+    if not tables:
+        return dist, _next_hops(_parents(dist, chunk, edges), chunk)
+    parent, order, inexact = _settle(dist, chunk, edges)
+    return dist, _next_hops(parent, chunk), order, inexact
+
+
+def spf_arrays(graph: nx.Graph, sources: Optional[Sequence[int]] = None,
+               block: int = 256, workers: int = 1) -> Tuple[List, np.ndarray, np.ndarray]:
+    """
+    (names, dist, next_hop) for the given source indices (all nodes by
+    default): dist[i, x] is the cost from sources[i] to x (inf when
+    unreachable) and next_hop[i, x] the index of the first hop (NO_HOP when
+    unreachable; the source itself for x == source).
+    workers > 1 computes all sources in that many processes.
+    """
+    if workers > 1:
+        if sources is not None:
+            raise ValueError("workers > 1 computes every source; leave sources unset")
+        return _parallel_spf(graph, workers, block,
+                             lambda names, dist, next_hop: (names, dist.copy(), next_hop.copy()), tables=False)
+    names, indptr, indices, weights = graph_to_csr(graph)
+    n = len(names)
+    csr = csr_matrix((weights, indices, indptr), shape=(n, n))
+    edges = graph_edges(graph)
+    sources = np.arange(n) if sources is None else np.asarray(sources, dtype=np.intp)
+    dist = np.empty((len(sources), n), dtype=np.float64)
+    next_hop = np.empty((len(sources), n), dtype=np.int32)
+    for start in range(0, len(sources), block):
+        chunk = sources[start:start + block]
+        d, hops = _spf_block(csr, edges, chunk, tables=False)
+        dist[start:start + len(chunk)] = d
+        next_hop[start:start + len(chunk)] = hops
+    return names, dist, next_hop
+
+
+def spf_tables(graph: nx.Graph, workers: int = 1, block: int = 256) -> Dict[str, Dict[str, Tuple[float, str]]]:
+    """
+    Routing tables {router: {dest: (cost, next_hop)}}, identical to the
+    networkx simulators' (next hops, int or float costs, destination order).
+    workers > 1 computes the arrays in that many processes; the tables are
+    built from them here.
+    """
+    if workers < 1:
+        raise ValueError(f"workers must be at least 1, got {workers}")
+    tables = {}
+    # N^2 small tuples would otherwise trigger repeated full collections
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        if workers > 1:
+            def build(names, dist, next_hop, order, inexact):
+                for start in range(0, len(names), block):
+                    rows = slice(start, start + block)
+                    tables.update(_block_tables(names, np.arange(len(names))[rows], dist[rows],
+                                                next_hop[rows], order[rows], inexact[rows]))
+            _parallel_spf(graph, workers, block, build)
+            return tables
+        names, indptr, indices, weights = graph_to_csr(graph)
+        n = len(names)
+        csr = csr_matrix((weights, indices, indptr), shape=(n, n))
+        edges = graph_edges(graph)
+        for start in range(0, n, block):
+            chunk = np.arange(start, min(start + block, n))
+            tables.update(_block_tables(names, chunk, *_spf_block(csr, edges, chunk)))
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return tables
+
+
+# per-worker state set by _attach: (csr, edges, output arrays, shared blocks)
+_worker = None
+
+# the N x N arrays the workers fill in: dist, next_hop, order, inexact (the first two unless tables)
+OUTPUTS = (np.float64, np.int32, np.int32, np.bool_)
+
+
+def _attach(n: int, layout: List[Tuple[str, tuple, str]], edges: Tuple[np.ndarray, ...]):
+    """Pool initializer: map the CSR arrays and the output arrays from shared memory."""
+    global _worker
+    blocks = []
+    arrays = []
+    for shm_name, shape, dtype in layout:
+        shm = SharedMemory(name=shm_name)
+        blocks.append(shm)
+        arrays.append(np.ndarray(shape, dtype=dtype, buffer=shm.buf))
+    indptr, indices, weights = arrays[:3]
+    _worker = (csr_matrix((weights, indices, indptr), shape=(n, n)), edges, arrays[3:], blocks)
+
+
+def _spf_rows(bounds: Tuple[int, int]):
+    """Compute sources start..stop-1 in a worker, straight into the shared output rows."""
+    csr, edges, outputs, _ = _worker
+    chunk = np.arange(*bounds)
+    for out, result in zip(outputs, _spf_block(csr, edges, chunk, tables=len(outputs) == len(OUTPUTS))):
+        out[bounds[0]:bounds[1]] = result
+
+
+def _parallel_spf(graph: nx.Graph, workers: int, block: int, consume, tables: bool = True):
+    """
+    consume(names, dist, next_hop, order, inexact) on the all-pairs arrays
+    (consume(names, dist, next_hop) unless tables),
+    which the workers write into shared memory; its result is returned.
+    The arrays are freed afterwards, so consume must not keep them.
+    """
+    names, indptr, indices, weights = graph_to_csr(graph)
+    n = len(names)
+    blocks = []
+    layout = []
+    views = []
+    try:
+        for shape, dtype in [(a.shape, a.dtype) for a in (indptr, indices, weights)] + \
+                            [((n, n), np.dtype(t)) for t in (OUTPUTS if tables else OUTPUTS[:2])]:
+            shm = SharedMemory(create=True, size=max(int(np.prod(shape)) * dtype.itemsize, 1))
+            blocks.append(shm)
+            views.append(np.ndarray(shape, dtype=dtype, buffer=shm.buf))
+            layout.append((shm.name, shape, dtype.str))
+        for view, array in zip(views, (indptr, indices, weights)):
+            view[:] = array
+        with Pool(workers, initializer=_attach, initargs=(n, layout, graph_edges(graph))) as pool:
+            bounds = [(start, min(start + block, n)) for start in range(0, n, block)]
+            for _ in pool.imap_unordered(_spf_rows, bounds):
+                pass
+        return consume(names, *views[3:])
+    finally:
+        del views  # numpy views would keep the blocks from closing
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+
+
+def _block_tables(names: List, chunk: np.ndarray, dist: np.ndarray, next_hop: np.ndarray,
+                  order: np.ndarray, inexact: np.ndarray) -> Dict:
+    """Tables of the routers in chunk, destinations in settle order, costs int unless a weight on the path is not."""
+    tables = {}
+    for i, r in enumerate(chunk.tolist()):
+        row = order[i]
+        row = row[np.isfinite(dist[i, row]) & (row != r)]
+        costs = dist[i, row]
+        flags = inexact[i, row]
+        if not flags.any():
+            costs = costs.astype(np.int64).tolist()
+        elif flags.all():
+            costs = costs.tolist()
+        else:
+            costs = [c if f else int(c) for c, f in zip(costs.tolist(), flags.tolist())]
+        table = {names[r]: (0, names[r])}
+        table.update(zip(map(names.__getitem__, row.tolist()),
+                         zip(costs, map(names.__getitem__, next_hop[i, row].tolist()))))
+        tables[names[r]] = table
+    return tables
@@ -0,0 +1,301 @@
+# table_io.py
+"""
+Routing-table files for large simulations.  json.dumps(tables, indent=2)
+builds the whole O(N^2) text in memory; the writers here stream one router
+at a time and the readers can fetch a single router without parsing the rest.
+
+  .json   the indented JSON the demos have always written (json.dump to the
+          file, so no whole-file string; reading still parses everything)
+  .jsonl  one {"router": ..., "table": {...}} line per router, any tables
+          (BGP AS_PATHs included); first_table reads one line
+  .rtb    columnar binary for {dest: (cost, next_hop)} tables: per router a
+          block of dest/cost/next-hop arrays over a shared name dictionary,
+          optionally zlib-compressed, and an index of block offsets, so one
+          router is one seek and read
+
+Names are stored as strings, as JSON stores them.  Binary costs are float64
+(exact for integers up to 2**53) and read back as ints when every cost
+written was an int.
+
+.rtb layout (little-endian):
+  header   magic, version, flags, n_routers, n_names, index_offset, names_offset, names_len
+  blocks   per router: cost float64[k], dest int32[k], next_hop int32[k] (zlib'd if compressed)
+  index    router int32[n_routers], count uint32[n_routers], offset uint64[n_routers + 1]
+  names    UTF-8, NUL-separated
+"""
+
+import json
+import struct
+import sys
+import zlib
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Mapping, Tuple, Union
+
+FORMATS = ("json", "jsonl", "rtb")
+MAGIC = b"RTABLES1"
+VERSION = 1
+HEADER = struct.Struct("<8sIIIIQQQ")
+COMPRESSED = 1
+INT_COSTS = 2
+
+Table = Dict[str, Tuple[float, str]]
+Tables = Union[Mapping[str, Dict], Iterable[Tuple[str, Dict]]]
+
+
+def _items(tables: Tables) -> Iterable[Tuple[str, Dict]]:
+    """(router, table) pairs, with read-only table views (aggregated BGP) as plain dicts."""
+    items = tables.items() if isinstance(tables, Mapping) else tables
+    return ((router, table if isinstance(table, dict) else dict(table)) for router, table in items)
+
+
+def _le(a: array) -> bytes:
+    """a's bytes in little-endian order."""
+    if sys.byteorder == "big":
+        a = array(a.typecode, a)
+        a.byteswap()
+    return a.tobytes()
+
+
+def _from_le(typecode: str, data: bytes) -> array:
+    a = array(typecode)
+    a.frombytes(data)
+    if sys.byteorder == "big":
+        a.byteswap()
+    return a
+
+
+class TableWriter:
+    """
+    Streaming .rtb writer: add(router, table) one router at a time; close()
+    (or leaving the with block) writes the index and name dictionary.
+    Memory is one router's table plus the names.
+    """
+
+    def __init__(self, path: Union[str, Path], compress: bool = False):
+        self._f = open(path, "wb")
+        self._f.write(b"\0" * HEADER.size)  # rewritten by close()
+        self.compress = compress
+        self._ids: Dict[str, int] = {}
+        self._routers = array("i")
+        self._counts = array("I")
+        self._offsets = array("Q", [HEADER.size])
+        self._int_costs = True
+
+    def _id(self, name) -> int:
+        name = str(name)
+        i = self._ids.get(name)
+        if i is None:
+            i = self._ids[name] = len(self._ids)
+        return i
+
+    def add(self, router: str, table: Table):
+        ident = self._id
+        dests = array("i")
+        costs = array("d")
+        hops = array("i")
+        try:
+            for dest, (cost, next_hop) in table.items():
+                dests.append(ident(dest))
+                costs.append(cost)
+                hops.append(ident(next_hop))
+                if self._int_costs and not isinstance(cost, int):
+                    self._int_costs = False
+        except (TypeError, ValueError):
+            raise ValueError(f"{router}: .rtb files hold (cost, next_hop) tables; use .jsonl") from None
+        data = _le(costs) + _le(dests) + _le(hops)
+        if self.compress:
+            data = zlib.compress(data)
+        self._f.write(data)
+        self._routers.append(ident(router))
+        self._counts.append(len(dests))
+        self._offsets.append(self._offsets[-1] + len(data))
+
+    def close(self):
+        f = self._f
+        if f.closed:
+            return
+        index_offset = f.tell()
+        for a in (self._routers, self._counts, self._offsets):
+            f.write(_le(a))
+        names = "\0".join(self._ids).encode("utf-8")
+        names_offset = f.tell()
+        f.write(names)
+        flags = (COMPRESSED if self.compress else 0) | (INT_COSTS if self._int_costs else 0)
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, flags, len(self._routers), len(self._ids),
+                            index_offset, names_offset, len(names)))
+        f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TableReader:
+    """Random access to an .rtb file: reader[router] reads that router's block only."""
+
+    def __init__(self, path: Union[str, Path]):
+        self._f = f = open(path, "rb")
+        magic, version, flags, n_routers, n_names, index_offset, names_offset, names_len = \
+            HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            f.close()
+            raise ValueError(f"Not a routing-table file: {path}")
+        self.compressed = bool(flags & COMPRESSED)
+        self._int_costs = bool(flags & INT_COSTS)
+        f.seek(index_offset)
+        routers = _from_le("i", f.read(4 * n_routers))
+        self._counts = _from_le("I", f.read(4 * n_routers))
+        self._offsets = _from_le("Q", f.read(8 * (n_routers + 1)))
+        f.seek(names_offset)
+        self.names = f.read(names_len).decode("utf-8").split("\0") if n_names else []
+        self.routers = [self.names[i] for i in routers]
+        self._position = {router: i for i, router in enumerate(self.routers)}
+
+    def __len__(self) -> int:
+        return len(self.routers)
+
+    def __contains__(self, router) -> bool:
+        return router in self._position
+
+    def __getitem__(self, router: str) -> Table:
+        i = self._position.get(router)
+        if i is None:
+            raise KeyError(router)
+        return self._block(i)
+
+    def __iter__(self) -> Iterator[Tuple[str, Table]]:
+        """(router, table) in the order they were written."""
+        for i, router in enumerate(self.routers):
+            yield router, self._block(i)
+
+    def _block(self, i: int) -> Table:
+        f = self._f
+        f.seek(self._offsets[i])
+        data = f.read(self._offsets[i + 1] - self._offsets[i])
+        if self.compressed:
+            data = zlib.decompress(data)
+        k = self._counts[i]
+        costs = _from_le("d", data[:8 * k]).tolist()
+        if self._int_costs:
+            costs = [int(c) for c in costs]
+        dests = _from_le("i", data[8 * k:12 * k])
+        hops = _from_le("i", data[12 * k:])
+        names = self.names
+        return {names[d]: (c, names[h]) for d, c, h in zip(dests, costs, hops)}
+
+    def close(self):
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_jsonl(tables: Tables, path: Union[str, Path]):
+    """One {"router": ..., "table": {...}} line per router, written as it is produced."""
+    with open(path, "w") as f:
+        for router, table in _items(tables):
+            f.write(json.dumps({"router": router, "table": table}))
+            f.write("\n")
+
+
+def read_jsonl(path: Union[str, Path]) -> Iterator[Tuple[str, Dict]]:
+    """(router, table) per line, as JSON decodes them (lists for tuples)."""
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                yield record["router"], record["table"]
+
+
+def save_tables(tables: Tables, path: Union[str, Path], compress: bool = False):
+    """Write tables in the format named by path's suffix (.json, .jsonl or .rtb)."""
+    suffix = Path(path).suffix
+    if suffix == ".json":
+        with open(path, "w") as f:
+            json.dump(dict(_items(tables)), f, indent=2)
+    elif suffix == ".jsonl":
+        write_jsonl(tables, path)
+    elif suffix == ".rtb":
+        with TableWriter(path, compress) as writer:
+            for router, table in _items(tables):
+                writer.add(router, table)
+    else:
+        raise ValueError(f"Unknown routing-table format: {suffix}")
+
+
+def load_tables(path: Union[str, Path]) -> Dict[str, Dict]:
+    """Every router's table from a .json, .jsonl or .rtb file."""
+    suffix = Path(path).suffix
+    if suffix == ".json":
+        with open(path) as f:
+            return json.load(f)
+    if suffix == ".jsonl":
+        return dict(read_jsonl(path))
+    if suffix == ".rtb":
+        with TableReader(path) as reader:
+            return dict(reader)
+    raise ValueError(f"Unknown routing-table format: {suffix}")
+
+
+def first_table(path: Union[str, Path]) -> Tuple[str, Dict]:
+    """
+    The first router and its table; reads one line of .jsonl and one block of
+    .rtb (plain .json has to be parsed whole).  Raises ValueError if empty.
+    """
+    suffix = Path(path).suffix
+    if suffix == ".jsonl":
+        for router, table in read_jsonl(path):
+            return router, table
+    elif suffix == ".rtb":
+        with TableReader(path) as reader:
+            for router, table in reader:
+                return router, table
+    else:
+        for router, table in load_tables(path).items():
+            return router, table
+    raise ValueError(f"No routers in {path}")
+
+
+def save_snapshot(tables: Tables, directory: Union[str, Path], stem: str, fmt: str = "json") -> Path:
+    """
+    Write tables as directory/stem.<fmt> and delete the same snapshot saved in
+    the other formats, so readers (r.py) find the current one.  .rtb only
+    holds (cost, next_hop) tables; anything else (BGP AS_PATHs) goes to .jsonl.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown routing-table format: {fmt} (expected one of {', '.join(FORMATS)})")
+    directory = Path(directory)
+    if fmt == "rtb":
+        tables = list(_items(tables))
+        first = next((entry for _, table in tables for entry in table.values()), None)
+        if not (isinstance(first, (tuple, list)) and len(first) == 2 and isinstance(first[0], (int, float))):
+            fmt = "jsonl"
+    path = directory / f"{stem}.{fmt}"
+    save_tables(tables, path)
+    for other in FORMATS:
+        if other != fmt:
+            (directory / f"{stem}.{other}").unlink(missing_ok=True)
+    return path
+
+
+def split_format(args: List[str]) -> Tuple[str, List[str]]:
+    """("json" or the value of --format X / --format=X, the other arguments) from command-line words."""
+    fmt, rest = "json", []
+    words = iter(args)
+    for arg in words:
+        if arg == "--format":
+            fmt = next(words, "")
+        elif arg.startswith("--format="):
+            fmt = arg.split("=", 1)[1]
+        else:
+            rest.append(arg)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown routing-table format: {fmt!r} (expected one of {', '.join(FORMATS)})")
+    return fmt, rest
@@ -0,0 +1,39 @@
+# test_bgp_aggregate.py
+"""Aggregated BGP runs save to the same bytes as per-prefix runs.  Run with pytest."""
+
+import json
+import random
+
+import pytest
+
+from bgp_sim import MODES, simulate_bgp
+from table_io import save_tables
+from topologies import aslevel
+
+
+def origins_for(graph, n_prefixes=40, seed=3):
+    """Prefixes with one or two origins each, several per origin AS."""
+    rng = random.Random(seed)
+    origins = {}
+    for i in range(n_prefixes):
+        for asn in rng.sample(list(graph), rng.choice([1, 1, 2])):
+            origins.setdefault(asn, []).append(f"10.{i}.0.0/16")
+    return origins
+
+
+@pytest.mark.parametrize("mode", MODES)
+@pytest.mark.parametrize("suffix", [".json", ".jsonl"])
+def test_aggregated_tables_save_identically(tmp_path, mode, suffix):
+    G = aslevel(60)
+    origins = origins_for(G)
+    aggregated = simulate_bgp(G, origins, mode=mode, aggregate=True)
+    save_tables(simulate_bgp(G, origins, mode=mode), tmp_path / f"plain{suffix}")
+    save_tables(aggregated, tmp_path / f"aggregated{suffix}")
+    assert (tmp_path / f"aggregated{suffix}").read_bytes() == (tmp_path / f"plain{suffix}").read_bytes()
+
+
+def test_to_dict_is_plain_json():
+    G = aslevel(30)
+    origins = origins_for(G, 10)
+    plain = simulate_bgp(G, origins)
+    assert json.dumps(simulate_bgp(G, origins, aggregate=True).to_dict()) == json.dumps(plain)
@@ -0,0 +1,63 @@
+# test_incremental_spf.py
+"""The changes apply_link_event returns rebuild its tables.  Run with pytest."""
+
+import copy
+
+import networkx as nx
+import pytest
+
+from bench_rip import random_topology
+from incremental_spf import LinkEvent, apply_link_event
+from ospf_sim import simulate_ospf
+
+
+def replay(tables, changes):
+    """tables with changes applied the way a consumer of apply_link_event would."""
+    tables = copy.deepcopy(tables)
+    for router, delta in changes.items():
+        if delta is None:
+            del tables[router]
+            continue
+        table = tables.setdefault(router, {})
+        for dest, entry in delta.items():
+            if entry is None:
+                table.pop(dest, None)
+            else:
+                table[dest] = entry
+    return tables
+
+
+def costs(tables):
+    return {router: {dest: cost for dest, (cost, _) in table.items()} for router, table in tables.items()}
+
+
+def apply_and_check(G, tables, event):
+    before = copy.deepcopy(tables)
+    changes = apply_link_event(G, tables, event)
+    assert replay(before, changes) == tables
+    assert costs(tables) == costs(simulate_ospf(G))
+    return changes
+
+
+def test_restored_router_reports_self_entry():
+    G = random_topology(40, seed=5)
+    tables = simulate_ospf(G)
+    node = "R7"
+    links = [(a, data.get("weight", 1)) for a, data in G[node].items()]
+    apply_and_check(G, tables, LinkEvent("node_down", node))
+    for i, (a, weight) in enumerate(links):
+        changes = apply_and_check(G, tables, LinkEvent("up", node, a, weight))
+        if i == 0:
+            assert changes[node][node] == (0, node)
+        else:
+            assert node not in changes.get(node, {})
+
+
+@pytest.mark.parametrize("new", ["R-new", 1000])
+def test_new_router_reports_self_entry(new):
+    G = nx.path_graph(5)
+    nx.set_edge_attributes(G, 2, "weight")
+    tables = simulate_ospf(G)
+    changes = apply_and_check(G, tables, LinkEvent("up", 2, new, 3))
+    assert changes[new][new] == (0, new)
+    assert changes[new][2] == (3, 2)
@@ -0,0 +1,133 @@
+# topologies.py
+"""
+Reproducible synthetic topologies for the routing benchmarks, from tens to
+about 100k nodes.  Router-level graphs (waxman, ba, fattree, grid) are
+undirected, connected, named "R0".."Rn-1" and carry integer link costs 1-10
+in 'weight'.  The AS-level graph is a DiGraph of "AS0".."ASn-1" whose edges
+carry CAIDA-style 'rel' attributes (see bgp_policy), so it runs in every
+BGP mode.
+
+Fat-trees are built for the smallest even k with at least n nodes, so the
+node count is only approximately n; all other generators return exactly n.
+"""
+
+import math
+import random
+
+import networkx as nx
+
+TOPOLOGIES = ("waxman", "ba", "fattree", "grid", "aslevel")
+
+
+def _router_graph(G: nx.Graph, seed: int) -> nx.Graph:
+    """G relabelled "R0".."Rn-1" in node order, with random costs 1-10."""
+    G = nx.convert_node_labels_to_integers(G)
+    rng = random.Random(seed)
+    for u, v in G.edges():
+        G.edges[u, v]['weight'] = rng.randint(1, 10)
+    return nx.relabel_nodes(G, {i: f"R{i}" for i in G.nodes()})
+
+
+def waxman(n: int, degree: float = 4.0, beta: float = 0.5, seed: int = 1) -> nx.Graph:
+    """
+    Waxman graph: n routers uniform in the unit square, linked with
+    probability beta * exp(-d / (alpha * L)).  alpha is chosen for about
+    `degree` links per router, and pairs beyond seven decay lengths
+    (probability < 0.001 * beta) are never considered, so only nearby pairs
+    are drawn from a KD-tree instead of all n^2.  Components are then
+    chained to their nearest neighbor in the first one.
+    """
+    import numpy as np
+    from scipy.spatial import cKDTree
+
+    rng = np.random.default_rng(seed)
+    points = rng.random((n, 2))
+    # expected degree ~ n * beta * 2 pi (alpha L)^2 for a decay length alpha L << 1
+    scale = math.sqrt(degree / (2 * math.pi * n * beta))
+    tree = cKDTree(points)
+    pairs = tree.query_pairs(7 * scale, output_type="ndarray")
+    d = np.linalg.norm(points[pairs[:, 0]] - points[pairs[:, 1]], axis=1)
+    keep = rng.random(len(pairs)) < beta * np.exp(-d / scale)
+    G = nx.Graph()
+    G.add_nodes_from(range(n))
+    G.add_edges_from(pairs[keep].tolist())
+    components = [sorted(c) for c in nx.connected_components(G)]
+    if len(components) > 1:
+        main = components[0]
+        main_tree = cKDTree(points[main])
+        for component in components[1:]:
+            u = component[0]
+            G.add_edge(u, main[main_tree.query(points[u])[1]])
+    return _router_graph(G, seed)
+
+
+def ba(n: int, m: int = 2, seed: int = 1) -> nx.Graph:
+    """Barabasi-Albert preferential-attachment graph, m links per new router."""
+    return _router_graph(nx.barabasi_albert_graph(n, m, seed=seed), seed)
+
+
+def fattree(n: int, seed: int = 1) -> nx.Graph:
+    """
+    k-ary fat-tree for the smallest even k with k^3/4 hosts plus 5k^2/4
+    switches >= n: k pods of k/2 edge and k/2 aggregation switches, (k/2)^2
+    core switches, and k/2 hosts per edge switch.
+    """
+    k = 2
+    while k ** 3 // 4 + 5 * k * k // 4 < n:
+        k += 2
+    half = k // 2
+    G = nx.Graph()
+    for pod in range(k):
+        for a in range(half):
+            agg = ("agg", pod, a)
+            for c in range(half):
+                G.add_edge(agg, ("core", a * half + c))
+            for e in range(half):
+                G.add_edge(agg, ("edge", pod, e))
+        for e in range(half):
+            for h in range(half):
+                G.add_edge(("edge", pod, e), ("host", pod, e, h))
+    return _router_graph(G, seed)
+
+
+def grid(n: int, seed: int = 1) -> nx.Graph:
+    """The first n routers, row by row, of a square 2-D mesh."""
+    side = math.ceil(math.sqrt(n))
+    G = nx.grid_2d_graph(side, side)
+    G.remove_nodes_from([(i // side, i % side) for i in range(n, side * side)])
+    return _router_graph(G, seed)
+
+
+def aslevel(n: int, m: int = 3, seed: int = 1) -> nx.DiGraph:
+    """
+    Power-law AS graph with business relationships: a Barabasi-Albert graph
+    where the better-connected end of a link is the provider, except that
+    links between ASes of similar degree are peerings half of the time.
+    Edges are stored provider -> customer (rel -1) or as peerings (rel 0).
+    """
+    G = nx.barabasi_albert_graph(n, m, seed=seed)
+    rng = random.Random(seed)
+    D = nx.DiGraph()
+    D.add_nodes_from(f"AS{u}" for u in G.nodes())
+    for u, v in G.edges():
+        du, dv = G.degree(u), G.degree(v)
+        if max(du, dv) <= 2 * min(du, dv) and rng.random() < 0.5:
+            D.add_edge(f"AS{u}", f"AS{v}", rel=0)
+        elif (du, -u) > (dv, -v):
+            D.add_edge(f"AS{u}", f"AS{v}", rel=-1)
+        else:
+            D.add_edge(f"AS{v}", f"AS{u}", rel=-1)
+    return D
+
+
+def generate(topology: str, n: int, seed: int = 1) -> nx.Graph:
+    """Topology `topology` (one of TOPOLOGIES) with about n nodes."""
+    if topology not in TOPOLOGIES:
+        raise ValueError(f"Unknown topology: {topology}")
+    return globals()[topology](n, seed=seed)
+
+
+if __name__ == "__main__":
+    for name in TOPOLOGIES:
+        G = generate(name, 1000)
+        print(f"{name:<8} {G.number_of_nodes():>6} nodes {G.number_of_edges():>6} links")
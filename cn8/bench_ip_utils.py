@@ -0,0 +1,88 @@
+"""
+Parsing benchmark for ip_utils: 1M address parses with the original
+string-of-bits code versus the integer parsers, the cached parser on a
+repetitive stream, and the bulk parsers. Also reports Router build time and
+the peak transient allocation of a route_packet call.
+
+Usage: python bench_ip_utils.py [n_addresses]
+"""
+
+import random
+import sys
+import time
+import tracemalloc
+
+from bench_router import int_to_ip, random_routes
+from ip_utils import (ip_to_int, ip_to_int_cached, ipv4_from_lines,
+                      ipv4_from_packed, parse_cidr)
+from router import Router
+
+
+def bits_ip_to_binary(ip_address: str) -> str:
+    # the original implementation, kept here as the baseline
+    octets = ip_address.split('.')
+    if len(octets) != 4:
+        raise ValueError(f"Invalid IPv4 address: {ip_address}")
+    bin_octets = []
+    for o in octets:
+        n = int(o)
+        if n < 0 or n > 255:
+            raise ValueError(f"Invalid octet value: {o}")
+        bin_octets.append(f"{n:08b}")
+    return ''.join(bin_octets)
+
+
+def bits_network_prefix(ip_cidr: str) -> str:
+    ip_str, mask_str = ip_cidr.split('/')
+    return bits_ip_to_binary(ip_str)[:int(mask_str)]
+
+
+def timed(label: str, n: int, fn):
+    t0 = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - t0
+    print(f"{label:<34} {elapsed:>7.3f} s  {n / elapsed:>13,.0f} /s")
+
+
+def peak_alloc_per_call(fn, args):
+    """Largest transient allocation seen while calling fn on each argument."""
+    tracemalloc.start()
+    worst = 0
+    for a in args:
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        fn(a)
+        worst = max(worst, tracemalloc.get_traced_memory()[1] - current)
+    tracemalloc.stop()
+    return worst
+
+
+def run(n: int):
+    rng = random.Random(4)
+    ips = [int_to_ip(rng.getrandbits(32)) for _ in range(n)]
+    flows = [ips[rng.randrange(1000)] for _ in range(n)]  # 1000 hot addresses
+    cidrs = [cidr for cidr, _ in random_routes(n)]
+    packed = b"".join(ip_to_int(ip).to_bytes(4, "big") for ip in ips)
+    text = "\n".join(ips).encode()
+
+    timed("string-of-bits ip_to_binary", n, lambda: [bits_ip_to_binary(ip) for ip in ips])
+    timed("ip_to_int", n, lambda: [ip_to_int(ip) for ip in ips])
+    ip_to_int_cached.cache_clear()
+    timed("ip_to_int_cached (1000 hot addrs)", n, lambda: [ip_to_int_cached(ip) for ip in flows])
+    timed("ipv4_from_packed", n, lambda: ipv4_from_packed(packed))
+    timed("ipv4_from_lines", n, lambda: ipv4_from_lines(text))
+    timed("string-of-bits network prefix", n, lambda: [bits_network_prefix(c) for c in cidrs])
+    timed("parse_cidr", n, lambda: [parse_cidr(c) for c in cidrs])
+
+    routes = random_routes(min(n, 100_000))
+    for backend in Router.BACKENDS:
+        t0 = time.perf_counter()
+        router = Router(routes, backend=backend)
+        print(f"Router build ({backend}, {len(routes)} routes)   {time.perf_counter() - t0:>7.3f} s")
+        sample = ips[:20 if backend == "list" else 20_000]
+        print(f"  peak bytes per route_packet:      {peak_alloc_per_call(router.route_packet, sample)}")
+    print(f"  peak bytes per string-of-bits parse: {peak_alloc_per_call(bits_ip_to_binary, ips[:20_000])}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
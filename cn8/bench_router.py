@@ -0,0 +1,178 @@
+"""
+Lookup-rate benchmark for the Router backends.
+Builds random forwarding tables with a realistic prefix-length mix and
+measures table build time and lookups/sec for each backend, plus the
+vectorized Router.route_many batch path (build = range table compile).
+
+The churn mode replays BGP-style update batches (announce, re-announce,
+withdraw) interleaved with lookups and compares them with a full rebuild.
+
+The snapshot mode compares building a Router from CIDR strings with
+loading a saved snapshot through mmap.
+
+Usage: python bench_router.py [n_routes ...]
+       python bench_router.py churn [n_routes]
+       python bench_router.py snapshot [n_routes ...]
+"""
+
+import random
+import sys
+import time
+from typing import List, Tuple
+
+from ip_utils import int_to_ip
+from router import Router
+
+# rough shape of a full BGP table: dominated by /24, then /22-/23 and /16-/21
+PREFIX_LENGTHS = [8, 12, 16, 18, 19, 20, 21, 22, 23, 24]
+LENGTH_WEIGHTS = [1, 2, 10, 8, 12, 20, 25, 60, 60, 600]
+
+
+def random_routes(n: int, n_links: int = 16, seed: int = 1) -> List[Tuple[str, str]]:
+    rng = random.Random(seed)
+    lengths = rng.choices(PREFIX_LENGTHS, LENGTH_WEIGHTS, k=n)
+    routes = []
+    for length in lengths:
+        network = rng.getrandbits(length) << (32 - length)
+        routes.append((f"{int_to_ip(network)}/{length}", f"Link {rng.randrange(n_links)}"))
+    return routes
+
+
+def random_ips(n: int, seed: int = 2) -> List[str]:
+    rng = random.Random(seed)
+    return [int_to_ip(rng.getrandbits(32)) for _ in range(n)]
+
+
+def bench_backend(routes, backend: str, ips: List[str]):
+    t0 = time.perf_counter()
+    router = Router(routes, backend=backend)
+    build = time.perf_counter() - t0
+    route = router.route_packet
+    t0 = time.perf_counter()
+    results = [route(ip) for ip in ips]
+    elapsed = time.perf_counter() - t0
+    return build, len(ips) / elapsed, results
+
+
+def bench_batch(router: Router, n_lookups: int = 10_000_000):
+    import numpy as np
+    addrs = np.random.default_rng(3).integers(0, 1 << 32, n_lookups, dtype=np.uint32)
+    t0 = time.perf_counter()
+    router.route_many(addrs[:1])  # compiles the range table
+    build = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    router.route_many(addrs)
+    return build, n_lookups / (time.perf_counter() - t0)
+
+
+def run(sizes: List[int], trie_lookups: int = 200_000, list_budget: int = 50_000_000):
+    print(f"{'routes':>9} {'backend':>7} {'build s':>9} {'lookups':>8} {'lookups/s':>12}")
+    for n in sizes:
+        routes = random_routes(n)
+        trie_ips = random_ips(trie_lookups)
+        # the list scan is O(routes) per lookup, so cap its total work
+        list_ips = trie_ips[:max(10, min(trie_lookups, list_budget // n))]
+        build, rate, trie_results = bench_backend(routes, "trie", trie_ips)
+        print(f"{n:>9} {'trie':>7} {build:>9.2f} {len(trie_ips):>8} {rate:>12,.0f}")
+        router = Router(routes, backend="trie")
+        build, rate = bench_batch(router)
+        print(f"{n:>9} {'batch':>7} {build:>9.2f} {10_000_000:>8} {rate:>12,.0f}")
+        batch = router.route_many(trie_ips)
+        batch_results = [router.links[i] if i >= 0 else "Default Gateway" for i in batch]
+        assert batch_results == trie_results, "route_many disagrees with route_packet"
+        build, rate, list_results = bench_backend(routes, "list", list_ips)
+        print(f"{n:>9} {'list':>7} {build:>9.2f} {len(list_ips):>8} {rate:>12,.0f}")
+        assert list_results == trie_results[:len(list_results)], "backends disagree"
+
+
+def churn(n: int, n_batches: int = 200, batch_size: int = 500, lookups_per_batch: int = 2_000):
+    import numpy as np
+    rng = random.Random(5)
+    routes = random_routes(n)
+    model = {}
+    for cidr, link in routes:
+        model.setdefault(cidr, link)
+    t0 = time.perf_counter()
+    router = Router(routes, backend="trie")
+    rebuild = time.perf_counter() - t0
+    addrs = np.random.default_rng(6).integers(0, 1 << 32, 100_000, dtype=np.uint32)
+    router.route_many(addrs)
+    ips = random_ips(lookups_per_batch)
+    fresh = iter(random_routes(n_batches * batch_size, seed=7))
+    update_time = lookup_time = batch_lookup_time = 0.0
+    for _ in range(n_batches):
+        batch = []
+        existing = list(model)
+        for _ in range(batch_size):
+            kind = rng.random()
+            if kind < 0.5:
+                cidr, link = next(fresh)
+            elif kind < 0.75:
+                cidr, link = rng.choice(existing), f"Link {rng.randrange(16)}"
+            else:
+                cidr, link = rng.choice(existing), None
+            batch.append((cidr, link))
+            if link is None:
+                model.pop(cidr, None)
+            else:
+                model[cidr] = link
+        t0 = time.perf_counter()
+        router.apply_batch(batch)
+        update_time += time.perf_counter() - t0
+        t0 = time.perf_counter()
+        for ip in ips:
+            router.route_packet(ip)
+        lookup_time += time.perf_counter() - t0
+        t0 = time.perf_counter()
+        router.route_many(addrs)
+        batch_lookup_time += time.perf_counter() - t0
+    n_updates = n_batches * batch_size
+    print(f"routes {n:,}: full rebuild {rebuild:.2f} s")
+    print(f"  {n_updates:,} updates in batches of {batch_size}: {n_updates / update_time:,.0f} updates/s")
+    print(f"  route_packet under churn: {n_batches * len(ips) / lookup_time:,.0f} lookups/s")
+    print(f"  route_many under churn:   {n_batches * len(addrs) / batch_lookup_time:,.0f} lookups/s")
+    reference = Router(list(model.items()), backend="trie")
+    expected = [reference.route_packet(ip) for ip in ips]
+    assert [router.route_packet(ip) for ip in ips] == expected, "trie diverged from a fresh build"
+    batch = router.route_many(ips)
+    assert [router.links[i] if i >= 0 else "Default Gateway" for i in batch] == expected, \
+        "patched range table diverged from a fresh build"
+    print("  final table matches a fresh build")
+
+
+def snapshot(sizes: List[int]):
+    import os
+    import tempfile
+    import numpy as np
+    addrs = np.random.default_rng(8).integers(0, 1 << 32, 1_000_000, dtype=np.uint32)
+    print(f"{'routes':>9} {'build s':>9} {'save s':>8} {'MB':>6} {'load s':>9} {'1st lookup s':>13}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            routes = random_routes(n)
+            path = os.path.join(tmp, f"fib_{n}.snap")
+            t0 = time.perf_counter()
+            router = Router(routes, backend="trie")
+            router.route_many(addrs[:1])
+            build = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            router.save(path)
+            save = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            loaded = Router.load(path)
+            load = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            loaded.route_packet("8.8.8.8")
+            first = time.perf_counter() - t0
+            assert (loaded.route_many(addrs) == router.route_many(addrs)).all(), "snapshot lookups differ"
+            size = os.path.getsize(path) / 1e6
+            print(f"{n:>9} {build:>9.2f} {save:>8.2f} {size:>6.1f} {load:>9.5f} {first:>13.6f}")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["churn"]:
+        churn(int(sys.argv[2]) if len(sys.argv) > 2 else 100_000)
+    elif sys.argv[1:2] == ["snapshot"]:
+        snapshot([int(a) for a in sys.argv[2:]] or [1_000, 100_000, 1_000_000])
+    else:
+        sizes = [int(a) for a in sys.argv[1:]] or [1_000, 100_000, 1_000_000]
+        run(sizes)
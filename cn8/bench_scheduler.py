@@ -0,0 +1,195 @@
+"""
+Scheduler benchmark: packets/sec for the batch scheduler and the streaming
+schedulers, and per-class fairness with every class permanently backlogged
+(byte share against the weight share, Jain's index over share / weight,
+mean and worst wait in dequeues).
+
+The memory mode measures tracemalloc bytes per queued packet for the
+original dict-backed Packet dataclass, the slotted Packet and a
+PacketBuffer with compact scheduler queues.
+
+The port mode pushes an overloaded Poisson packet stream through an
+OutputPort (RED, class 1 shaped) and reports packets/s with and without
+telemetry recording, plus the per-class telemetry.
+
+Usage: python bench_scheduler.py [n_packets]
+       python bench_scheduler.py memory [n_packets [payload_bytes]]
+       python bench_scheduler.py port [n_packets]
+"""
+
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import List
+
+from ip_utils import int_to_ip
+from scheduler import (DEFAULT_WEIGHTS, DRRScheduler, OutputPort, Packet, PacketBuffer,
+                       PortTelemetry, RedConfig, StrictPriorityScheduler, TokenBucket,
+                       WFQScheduler, priority_scheduler)
+
+SCHEDULERS = {
+    "strict": StrictPriorityScheduler,
+    "drr": DRRScheduler,
+    "wfq": WFQScheduler,
+}
+
+
+@dataclass
+class DictPacket:
+    # the original Packet, with a per-instance __dict__, kept as the baseline
+    source_ip: str
+    dest_ip: str
+    payload: str
+    priority: int
+
+
+def random_packets(n: int, seed: int = 6) -> List[Packet]:
+    rng = random.Random(seed)
+    sizes = [64, 64, 64, 576, 1500]  # small-packet heavy mix
+    return [Packet("10.0.0.1", "10.0.0.2", "x" * rng.choice(sizes), rng.randrange(3))
+            for _ in range(n)]
+
+
+def throughput(n: int):
+    packets = random_packets(n)
+    print(f"{'scheduler':<10} {'mode':<12} {'packets/s':>12}")
+    t0 = time.perf_counter()
+    priority_scheduler(packets)
+    print(f"{'sorted':<10} {'batch':<12} {n / (time.perf_counter() - t0):>12,.0f}")
+    for name, cls in SCHEDULERS.items():
+        scheduler = cls()
+        t0 = time.perf_counter()
+        for p in packets:
+            scheduler.enqueue(p)
+        for _ in scheduler.drain():
+            pass
+        print(f"{name:<10} {'fill+drain':<12} {n / (time.perf_counter() - t0):>12,.0f}")
+        # continuous operation: one packet in, one packet out, 1000 queued
+        scheduler = cls()
+        for p in packets[:1000]:
+            scheduler.enqueue(p)
+        t0 = time.perf_counter()
+        for p in packets:
+            scheduler.enqueue(p)
+            scheduler.dequeue()
+        print(f"{name:<10} {'steady':<12} {n / (time.perf_counter() - t0):>12,.0f}")
+
+
+def fairness(n: int, backlog: int = 50):
+    """Serve n packets while keeping backlog packets of every class queued."""
+    total_weight = sum(DEFAULT_WEIGHTS.values())
+    print(f"\n{'scheduler':<10} {'class':>5} {'weight %':>9} {'bytes %':>8} "
+          f"{'mean wait':>10} {'max wait':>9}")
+    for name, cls in SCHEDULERS.items():
+        rng = random.Random(7)
+        scheduler = cls()
+        sent = {c: 0 for c in DEFAULT_WEIGHTS}
+        waits = {c: [] for c in DEFAULT_WEIGHTS}
+        queued = {c: 0 for c in DEFAULT_WEIGHTS}
+        for clock in range(n + 1):
+            for c in DEFAULT_WEIGHTS:
+                while queued[c] < backlog:
+                    size = rng.choice((64, 576, 1500))
+                    scheduler.push((c, size, clock), c, size)
+                    queued[c] += 1
+            if clock == n:
+                break
+            c, size, enqueued = scheduler.dequeue()
+            queued[c] -= 1
+            sent[c] += size
+            waits[c].append(clock - enqueued)
+        total = sum(sent.values())
+        normalized = [sent[c] / total / (DEFAULT_WEIGHTS[c] / total_weight) for c in sent]
+        jain = sum(normalized) ** 2 / (len(normalized) * sum(x * x for x in normalized))
+        for c in sorted(sent):
+            w = waits[c]
+            mean = sum(w) / len(w) if w else float("nan")
+            print(f"{name:<10} {c:>5} {100 * DEFAULT_WEIGHTS[c] / total_weight:>9.1f} "
+                  f"{100 * sent[c] / total:>8.1f} {mean:>10.1f} {max(w, default=0):>9}")
+        print(f"{name:<10} Jain's index (weighted): {jain:.3f}")
+
+
+def memory(n: int, payload_size: int = 64):
+    """Bytes per queued packet, and the same less the payload bytes themselves."""
+    print(f"{'scheduler':<10} {'packets':<14} {'bytes/packet':>13} {'overhead':>9} {'vs original':>12}")
+    for name, cls in SCHEDULERS.items():
+        baseline = None
+        for label in ("dataclass", "slotted", "PacketBuffer"):
+            rng = random.Random(8)
+            tracemalloc.start()
+            before = tracemalloc.get_traced_memory()[0]
+            if label == "PacketBuffer":
+                buffer = PacketBuffer()
+                scheduler = cls(compact=True)
+                for _ in range(n):
+                    i = buffer.append(int_to_ip(rng.getrandbits(32)), int_to_ip(rng.getrandbits(32)),
+                                      "x" * payload_size, rng.randrange(3))
+                    scheduler.enqueue_from(buffer, i)
+            else:
+                packet_cls = DictPacket if label == "dataclass" else Packet
+                scheduler = cls()
+                for _ in range(n):
+                    scheduler.enqueue(packet_cls(int_to_ip(rng.getrandbits(32)),
+                                                 int_to_ip(rng.getrandbits(32)),
+                                                 "x" * payload_size, rng.randrange(3)))
+            per_packet = (tracemalloc.get_traced_memory()[0] - before) / n
+            tracemalloc.stop()
+            del scheduler
+            baseline = baseline or per_packet
+            print(f"{name:<10} {label:<14} {per_packet:>13.1f} {per_packet - payload_size:>9.1f} "
+                  f"{baseline / per_packet:>11.1f}x")
+
+class NullTelemetry(PortTelemetry):
+    # recording switched off, to measure what telemetry costs
+    def record_enqueue(self, cls, now, depth):
+        pass
+
+    def record_dequeue(self, cls, now, depth, sojourn, size):
+        pass
+
+    def record_drop(self, cls, now, red):
+        pass
+
+
+def port(n: int, load: float = 1.2, rate: float = 125e6):
+    """Poisson arrivals at load x the line rate (bytes/s) through a shaped port."""
+    rng = random.Random(9)
+    sizes = [64, 64, 64, 576, 1500]
+    mean_size = sum(sizes) / len(sizes)
+    t = 0.0
+    arrivals = []
+    for i in range(n):
+        t += rng.expovariate(load * rate / mean_size)
+        arrivals.append((t, i, rng.randrange(3), rng.choice(sizes)))
+    print(f"{'scheduler':<10} {'telemetry':<10} {'packets/s':>12}")
+    for name, cls in SCHEDULERS.items():
+        for telemetry in (NullTelemetry(), PortTelemetry()):
+            p = OutputPort(cls(compact=True), rate,
+                           shapers={1: TokenBucket(rate=0.2 * rate, burst=64 * 1500)},
+                           red=RedConfig(min_th=200, max_th=800), telemetry=telemetry)
+            t0 = time.perf_counter()
+            for now, item, c, size in arrivals:
+                p.arrive(now, item, c, size)
+            p.advance()
+            elapsed = time.perf_counter() - t0
+            label = "off" if isinstance(telemetry, NullTelemetry) else "on"
+            print(f"{name:<10} {label:<10} {n / elapsed:>12,.0f}")
+        print(f"  {'class':>5} {'sent':>8} {'tail':>6} {'red':>6} {'max q':>6} {'mean q':>7} "
+              f"{'mean sojourn':>13} {'p99 <=':>9}")
+        for r in telemetry.summary(p.now):
+            print(f"  {r['class']:>5} {r['sent']:>8} {r['tail_drops']:>6} {r['red_drops']:>6} "
+                  f"{r['max_depth']:>6} {r['mean_depth']:>7.1f} {r['mean_sojourn'] * 1e6:>10.1f} us "
+                  f"{r['p99_sojourn'] * 1e6:>6.0f} us")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "port":
+        port(int(sys.argv[2]) if len(sys.argv) > 2 else 300_000)
+    elif len(sys.argv) > 1 and sys.argv[1] == "memory":
+        memory(*map(int, sys.argv[2:4])) if len(sys.argv) > 2 else memory(200_000)
+    else:
+        n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+        throughput(n)
+        fairness(min(n, 100_000))
@@ -0,0 +1,94 @@
+"""
+Compiled forwarding-table snapshots.
+A snapshot is a flat binary file holding the link names, the routes as
+prefix/length/link-index arrays and the compiled route_many range table.
+Loading maps the file read-only with mmap and wraps each section in a NumPy
+array without copying or parsing, so startup cost does not grow with the
+table and every process loading the same file shares one copy in the page
+cache.
+
+Layout (little-endian, sections 8-byte aligned):
+  header   magic, version, n_links, n_prefixes, n_ranges, block_bits, names_len
+  names    link names, UTF-8, NUL-separated
+  prefixes network uint32[n_prefixes], length uint8[n_prefixes], link int32[n_prefixes]
+  ranges   start uint32[n_ranges], link int32[n_ranges]
+  block    int32[1 << block_bits] (absent when block_bits is 0)
+"""
+
+import mmap
+import struct
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Union
+
+import numpy as np
+
+MAGIC = b"FIBSNAP1"
+VERSION = 1
+HEADER = struct.Struct("<8sIIQQIQ")
+
+
+class FibSnapshot(NamedTuple):
+    links: List[str]
+    networks: np.ndarray      # uint32
+    lengths: np.ndarray       # uint8
+    prefix_links: np.ndarray  # int32 index into links
+    starts: np.ndarray        # uint32 range starts
+    range_links: np.ndarray   # int32 link index per range
+    block: Optional[np.ndarray]
+
+
+def _pad(n: int) -> int:
+    return -n % 8
+
+
+def save_snapshot(path: Union[str, Path], snapshot: FibSnapshot):
+    names = "\0".join(snapshot.links).encode("utf-8")
+    block_bits = 0 if snapshot.block is None else len(snapshot.block).bit_length() - 1
+    sections = [
+        names,
+        np.ascontiguousarray(snapshot.networks, dtype="<u4"),
+        np.ascontiguousarray(snapshot.lengths, dtype="u1"),
+        np.ascontiguousarray(snapshot.prefix_links, dtype="<i4"),
+        np.ascontiguousarray(snapshot.starts, dtype="<u4"),
+        np.ascontiguousarray(snapshot.range_links, dtype="<i4"),
+    ]
+    if snapshot.block is not None:
+        sections.append(np.ascontiguousarray(snapshot.block, dtype="<i4"))
+    header = HEADER.pack(MAGIC, VERSION, len(snapshot.links), len(snapshot.networks),
+                         len(snapshot.starts), block_bits, len(names))
+    tmp = Path(str(path) + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(header)
+        f.write(b"\0" * _pad(len(header)))
+        for section in sections:
+            data = section if isinstance(section, bytes) else section.tobytes()
+            f.write(data)
+            f.write(b"\0" * _pad(len(data)))
+    # readers that already mapped the old file keep their pages
+    tmp.replace(path)
+
+
+def load_snapshot(path: Union[str, Path]) -> FibSnapshot:
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, n_links, n_prefixes, n_ranges, block_bits, names_len = HEADER.unpack_from(mm, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"Not a forwarding-table snapshot: {path}")
+    offset = HEADER.size + _pad(HEADER.size)
+
+    def section(dtype, count):
+        nonlocal offset
+        array = np.frombuffer(mm, dtype=dtype, count=count, offset=offset)
+        offset += array.nbytes + _pad(array.nbytes)
+        return array
+
+    names = bytes(mm[offset:offset + names_len]).decode("utf-8")
+    offset += names_len + _pad(names_len)
+    links = names.split("\0") if n_links else []
+    networks = section("<u4", n_prefixes)
+    lengths = section("u1", n_prefixes)
+    prefix_links = section("<i4", n_prefixes)
+    starts = section("<u4", n_ranges)
+    range_links = section("<i4", n_ranges)
+    block = section("<i4", 1 << block_bits) if block_bits else None
+    return FibSnapshot(links, networks, lengths, prefix_links, starts, range_links, block)
@@ -1,29 +1,142 @@
+import socket
+import sys
+from array import array
+from functools import lru_cache
+from typing import List, NamedTuple, Tuple
 
-def ip_to_binary(ip_address: str) -> str:
+IPV4_BITS = 32
+IPV6_BITS = 128
+
+
+class Prefix(NamedTuple):
+    network: int    # address with the host bits cleared
+    length: int     # mask length in bits
+    version: int = 4
+
+    @property
+    def width(self) -> int:
+        return IPV4_BITS if self.version == 4 else IPV6_BITS
+
+    @property
+    def mask(self) -> int:
+        return prefix_mask(self.length, self.width)
+
+    def contains(self, addr: int) -> bool:
+        return (addr ^ self.network) >> (self.width - self.length) == 0
+
+
+def prefix_mask(length: int, width: int = IPV4_BITS) -> int:
+    return ((1 << length) - 1) << (width - length)
+
+
+def _legacy_ip_to_int(ip_address: str) -> int:
+    # accepts the looser forms int() allows (e.g. "010"), as the string
+    # version always did, and produces the historical error messages
     octets = ip_address.split('.')
     if len(octets) != 4:
         raise ValueError(f"Invalid IPv4 address: {ip_address}")
-    bin_octets = []
+    value = 0
     for o in octets:
         n = int(o)
         if n < 0 or n > 255:
             raise ValueError(f"Invalid octet value: {o}")
-        bin_octets.append(f"{n:08b}")
-    return ''.join(bin_octets)
+        value = (value << 8) | n
+    return value
 
 
-def get_network_prefix(ip_cidr: str) -> str:
+def ip_to_int(ip_address: str) -> int:
+    try:
+        return int.from_bytes(socket.inet_pton(socket.AF_INET, ip_address), "big")
+    except OSError:
+        return _legacy_ip_to_int(ip_address)
+
+
+def int_to_ip(value: int) -> str:
+    return socket.inet_ntoa(value.to_bytes(4, "big"))
+
+
+def ipv6_to_int(ip_address: str) -> int:
+    try:
+        return int.from_bytes(socket.inet_pton(socket.AF_INET6, ip_address), "big")
+    except OSError:
+        raise ValueError(f"Invalid IPv6 address: {ip_address}")
+
+
+def parse_ip(ip_address: str) -> Tuple[int, int]:
+    """Return (address, version) for an IPv4 or IPv6 address string."""
+    if ':' in ip_address:
+        return ipv6_to_int(ip_address), 6
+    return ip_to_int(ip_address), 4
+
+
+# interning parser for streams where the same addresses repeat (flows, captures)
+ip_to_int_cached = lru_cache(maxsize=1 << 16)(ip_to_int)
+
+
+def parse_prefix(ip_cidr: str) -> Prefix:
     try:
         ip_str, mask_str = ip_cidr.split('/')
     except ValueError:
         raise ValueError(f"Invalid CIDR notation: {ip_cidr}")
+    addr, version = parse_ip(ip_str)
+    width = IPV4_BITS if version == 4 else IPV6_BITS
     mask_len = int(mask_str)
-    if mask_len < 0 or mask_len > 32:
+    if mask_len < 0 or mask_len > width:
         raise ValueError(f"Invalid mask length: {mask_len}")
-    ip_bin = ip_to_binary(ip_str)
-    return ip_bin[:mask_len]
+    return Prefix(addr & prefix_mask(mask_len, width), mask_len, version)
+
+
+def parse_cidr(ip_cidr: str) -> Tuple[int, int]:
+    """Return (network, mask_len) of an IPv4 CIDR with the host bits cleared."""
+    try:
+        ip_str, mask_str = ip_cidr.split('/')
+    except ValueError:
+        raise ValueError(f"Invalid CIDR notation: {ip_cidr}")
+    mask_len = int(mask_str)
+    if mask_len < 0 or mask_len > IPV4_BITS:
+        raise ValueError(f"Invalid mask length: {mask_len}")
+    return ip_to_int(ip_str) & prefix_mask(mask_len), mask_len
+
+
+def ipv4_from_packed(buf: bytes) -> array:
+    """Addresses from a buffer of 4-byte network-order records (e.g. IP headers)."""
+    if len(buf) % 4:
+        raise ValueError("Packed IPv4 buffer length must be a multiple of 4")
+    out = array('I')
+    if out.itemsize != 4:
+        out = array('L')
+    out.frombytes(buf)
+    if sys.byteorder == "little":
+        out.byteswap()
+    return out
+
+
+def ipv6_from_packed(buf: bytes) -> List[int]:
+    if len(buf) % 16:
+        raise ValueError("Packed IPv6 buffer length must be a multiple of 16")
+    view = memoryview(buf)
+    return [int.from_bytes(view[i:i + 16], "big") for i in range(0, len(buf), 16)]
+
+
+def ipv4_from_lines(buf: bytes) -> List[int]:
+    """Addresses from a whitespace-separated buffer of dotted quads."""
+    return [ip_to_int(ip) for ip in buf.decode("ascii").split()]
+
+
+# String-of-bits helpers, kept for existing callers.
+
+def ip_to_binary(ip_address: str) -> str:
+    return format(ip_to_int(ip_address), "032b")
+
+
+def get_network_prefix(ip_cidr: str) -> str:
+    network, mask_len = parse_cidr(ip_cidr)
+    return format(network, "032b")[:mask_len]
 
 
 if __name__ == "__main__":
     print(ip_to_binary("192.168.1.1"))
     print(get_network_prefix("200.23.16.0/23"))
+    print(ip_to_int("192.168.1.1"), parse_cidr("200.23.17.5/23"))
+    print(parse_prefix("2001:db8::1/32"))
+    print(list(ipv4_from_packed(bytes([10, 0, 0, 1, 192, 168, 1, 1]))))
@@ -0,0 +1,212 @@
+from typing import Any, Iterable, Iterator, Optional, Tuple
+
+
+class _Node:
+    __slots__ = ("key", "length", "value", "left", "right", "epoch")
+
+    def __init__(self, key: int, length: int, value: Any = None, epoch: int = 0):
+        self.key = key          # network address, host bits cleared
+        self.length = length    # prefix length in bits
+        self.value = value      # None when the node is only a branch point
+        self.left = None
+        self.right = None
+        self.epoch = epoch      # version that created the node
+
+
+class PrefixTrie:
+    """Path-compressed binary trie (radix tree) for longest-prefix match.
+
+    Keys are integer addresses of ``width`` bits.  A lookup walks at most one
+    node per bit, comparing whole compressed segments with a single XOR/shift.
+
+    update() is copy-on-write: it copies the nodes on the path of each change
+    and publishes the new root with one assignment, so lookups that started
+    on the previous version are unaffected.
+    """
+
+    def __init__(self, width: int = 32):
+        self.width = width
+        # nodes stamped with the current epoch are not yet visible to readers
+        # and may be changed in place; older nodes are copied first
+        self._epoch = 0
+        self._root = _Node(0, 0)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _bit(self, addr: int, pos: int) -> int:
+        return (addr >> (self.width - 1 - pos)) & 1
+
+    def _writable(self, node: _Node) -> _Node:
+        if node.epoch == self._epoch:
+            return node
+        copy = _Node(node.key, node.length, node.value, self._epoch)
+        copy.left = node.left
+        copy.right = node.right
+        return copy
+
+    def insert(self, network: int, length: int, value: Any, replace: bool = True):
+        """Store value for network/length; keep an existing value unless replace.
+
+        Changes the trie in place (used while building); use update() once
+        lookups may run concurrently.
+        """
+        self._insert(self._root, network, length, value, replace)
+
+    def update(self, changes: Iterable[Tuple[int, int, Optional[Any]]]) -> int:
+        """
+        Apply (network, length, value) changes as one new version; a value of
+        None withdraws the prefix.  Returns the number of prefixes changed.
+        """
+        self._epoch += 1
+        root = self._writable(self._root)
+        changed = 0
+        for network, length, value in changes:
+            if value is None:
+                changed += self._remove(root, network, length)
+            else:
+                changed += self._insert(root, network, length, value, True)
+        self._root = root
+        self._epoch += 1  # freeze the published version
+        return changed
+
+    def _insert(self, root: _Node, network: int, length: int, value: Any, replace: bool) -> bool:
+        if value is None:
+            raise ValueError("PrefixTrie values must not be None")
+        width = self.width
+        node = root
+        while True:
+            if node.length == length:
+                if node.value is None:
+                    self._size += 1
+                elif not replace or node.value == value:
+                    return False
+                node.value = value
+                return True
+            bit = (network >> (width - 1 - node.length)) & 1
+            child = node.right if bit else node.left
+            if child is None:
+                child = _Node(network, length, value, self._epoch)
+                self._size += 1
+                break
+            child_len = child.length
+            if child_len <= length and not (network ^ child.key) >> (width - child_len):
+                if child.epoch != self._epoch:
+                    child = self._writable(child)
+                    if bit:
+                        node.right = child
+                    else:
+                        node.left = child
+                node = child
+                continue
+            # length of the prefix shared by the new key and the child segment
+            diff = network ^ child.key
+            common = width - diff.bit_length()
+            if common > length:
+                common = length
+            if common == length:
+                new = _Node(network, length, value, self._epoch)
+            else:
+                mask = ((1 << common) - 1) << (width - common)
+                new = _Node(network & mask, common, None, self._epoch)
+                leaf = _Node(network, length, value, self._epoch)
+                if self._bit(network, common):
+                    new.right = leaf
+                else:
+                    new.left = leaf
+            self._size += 1
+            if self._bit(child.key, common):
+                new.right = child
+            else:
+                new.left = child
+            child = new
+            break
+        if bit:
+            node.right = child
+        else:
+            node.left = child
+        return True
+
+    def _remove(self, root: _Node, network: int, length: int) -> bool:
+        width = self.width
+        path = []  # (parent, bit) pairs down to node
+        node = root
+        while node.length < length:
+            bit = (network >> (width - 1 - node.length)) & 1
+            child = node.right if bit else node.left
+            if child is None or child.length > length or (network ^ child.key) >> (width - child.length):
+                return False
+            child = self._writable(child)
+            if bit:
+                node.right = child
+            else:
+                node.left = child
+            path.append((node, bit))
+            node = child
+        if node.value is None:
+            return False
+        node.value = None
+        self._size -= 1
+        # splice out branch points left with fewer than two children
+        while path and node.value is None and (node.left is None or node.right is None):
+            parent, bit = path.pop()
+            replacement = node.left if node.left is not None else node.right
+            if bit:
+                parent.right = replacement
+            else:
+                parent.left = replacement
+            node = parent
+        return True
+
+    def lookup(self, addr: int) -> Optional[Any]:
+        """Return the value of the longest prefix containing addr, or None."""
+        width = self.width
+        best = None
+        node = self._root
+        while node is not None:
+            if (addr ^ node.key) >> (width - node.length):
+                break
+            if node.value is not None:
+                best = node.value
+            if node.length == width:
+                break
+            if (addr >> (width - 1 - node.length)) & 1:
+                node = node.right
+            else:
+                node = node.left
+        return best
+
+    def covering(self, network: int, length: int) -> Optional[Any]:
+        """Value of the longest prefix strictly shorter than length that contains network."""
+        width = self.width
+        best = None
+        node = self._root
+        while node is not None and node.length < length:
+            if (network ^ node.key) >> (width - node.length):
+                break
+            if node.value is not None:
+                best = node.value
+            node = node.right if self._bit(network, node.length) else node.left
+        return best
+
+    def items(self, network: int = 0, length: int = 0) -> Iterator[Tuple[int, int, Any]]:
+        """
+        Yield (network, length, value) in address order for every stored
+        prefix inside network/length (the whole trie by default).
+        """
+        width = self.width
+        node = self._root
+        while node is not None and node.length < length:
+            node = node.right if self._bit(network, node.length) else node.left
+        if node is None or (network ^ node.key) >> (width - length):
+            return
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node.value is not None:
+                yield node.key, node.length, node.value
+            if node.right is not None:
+                stack.append(node.right)
+            if node.left is not None:
+                stack.append(node.left)
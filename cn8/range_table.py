@@ -0,0 +1,189 @@
+"""
+Vectorized longest-prefix match over NumPy arrays.
+The nested prefixes of a forwarding table are flattened into disjoint address
+ranges, each labelled with the link of its longest covering prefix, so a batch
+of lookups becomes a single np.searchsorted over the range start addresses.
+Large tables add a direct-indexed /24 block stage in front of the search.
+"""
+
+import warnings
+from itertools import repeat
+from typing import Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+NO_ROUTE = -1
+NEEDS_SEARCH = -2
+# small tables leave most /16 blocks without a range boundary, so a 256 KB
+# block table suffices; past this many ranges use /24 blocks (64 MB)
+BLOCK24_MIN_RANGES = 1 << 14
+
+
+def build_range_table(prefixes: Iterable[Tuple[int, int, int]], width: int = 32):
+    """
+    prefixes: (network, length, link_index) tuples; the first occurrence of a
+    duplicate prefix wins.
+    Returns (starts, links): sorted uint32 range starts and the int32 link index
+    of each range (NO_ROUTE where no prefix covers it).
+    """
+    # containing prefixes sort before the prefixes nested inside them
+    ordered = sorted(
+        ((network, length, order, link) for order, (network, length, link) in enumerate(prefixes)),
+    )
+    top = 1 << width
+    starts = [0]
+    links = [NO_ROUTE]
+
+    def emit(start, link):
+        if start >= top:
+            return
+        if starts[-1] == start:
+            links[-1] = link
+            if len(links) > 1 and links[-2] == link:
+                starts.pop()
+                links.pop()
+        elif links[-1] != link:
+            starts.append(start)
+            links.append(link)
+
+    stack = []  # open prefixes as (end, link), innermost last
+    prev = None
+    for network, length, _, link in ordered:
+        if (network, length) == prev:
+            continue
+        prev = (network, length)
+        while stack and stack[-1][0] <= network:
+            end, _ = stack.pop()
+            emit(end, stack[-1][1] if stack else NO_ROUTE)
+        emit(network, link)
+        stack.append((network + (1 << (width - length)), link))
+    while stack:
+        end, _ = stack.pop()
+        emit(end, stack[-1][1] if stack else NO_ROUTE)
+
+    return np.array(starts, dtype=np.uint32), np.array(links, dtype=np.int32)
+
+
+def build_block_index(starts: np.ndarray, links: np.ndarray, bits: Optional[int] = None) -> np.ndarray:
+    """
+    Direct-indexed first stage (as in DIR-24-8): one entry per /bits block
+    holding its link index when a single range covers the whole block, or
+    NEEDS_SEARCH when a range boundary falls inside it.
+    """
+    if bits is None:
+        bits = 24 if len(starts) >= BLOCK24_MIN_RANGES else 16
+    block = np.empty(1 << bits, dtype=np.int32)
+    _fill_blocks(block, starts, links)
+    return block
+
+
+def _fill_blocks(block: np.ndarray, starts: np.ndarray, links: np.ndarray, ids: Optional[np.ndarray] = None):
+    """Recompute the block entries listed in ids (all blocks by default) in place."""
+    shift = np.uint32(32 - (len(block).bit_length() - 1))
+    low_bits = np.uint32((1 << int(shift)) - 1)
+    if ids is None:
+        # one pass over the starts instead of a binary search per block
+        per_block = np.bincount(starts >> shift, minlength=len(block))
+        aligned = np.bincount(starts[(starts & low_bits) == 0] >> shift, minlength=len(block))
+        covering = np.cumsum(per_block) - per_block + aligned
+        inner = per_block - aligned
+        block[:] = np.where(inner > 0, NEEDS_SEARCH, links[covering - 1])
+        return
+    first = ids.astype(np.uint32) << shift
+    covering = np.searchsorted(starts, first, side="right")
+    inner = np.searchsorted(starts, first | low_bits, side="right") - covering
+    block[ids] = np.where(inner > 0, NEEDS_SEARCH, links[covering - 1])
+
+
+def build_range_piece(prefixes: Iterable[Tuple[int, int, int]], network: int, length: int,
+                      cover: int, width: int = 32):
+    """
+    Ranges for the block network/length alone, from the prefixes nested in it
+    and the link index of the closest prefix covering it (NO_ROUTE if none).
+    Returns (lo, hi, starts, links) for patch_range_table.
+    """
+    starts, links = build_range_table(list(prefixes) + [(network, length, cover)], width)
+    lo, hi = network, network + (1 << (width - length))
+    first = np.searchsorted(starts, np.uint32(lo), side="right") - 1
+    last = len(starts) if hi >> width else np.searchsorted(starts, np.uint32(hi), side="left")
+    piece_starts = starts[first:last].copy()
+    piece_starts[0] = lo
+    return lo, hi, piece_starts, links[first:last]
+
+
+def patch_range_table(table, pieces, width: int = 32):
+    """
+    Replace the ranges inside each (lo, hi, starts, links) piece, given in
+    address order and non-overlapping.  Returns a new (starts, links, block)
+    table; the arrays of the old table are left untouched for readers.
+    """
+    starts, links, block = table
+    new_starts, new_links = [], []
+    prev = 0
+    for k, (lo, hi, piece_starts, piece_links) in enumerate(pieces):
+        i = np.searchsorted(starts, np.uint32(lo), side="left")
+        j = len(starts) if hi >> width else np.searchsorted(starts, np.uint32(hi), side="left")
+        new_starts += [starts[prev:i], piece_starts]
+        new_links += [links[prev:i], piece_links]
+        next_lo = pieces[k + 1][0] if k + 1 < len(pieces) else None
+        if not hi >> width and next_lo != hi and (j == len(starts) or starts[j] != hi):
+            # the range that ran across hi now needs its own start
+            new_starts.append(np.array([hi], dtype=np.uint32))
+            new_links.append(links[j - 1:j])
+        prev = j
+    new_starts.append(starts[prev:])
+    new_links.append(links[prev:])
+    starts, links = np.concatenate(new_starts), np.concatenate(new_links)
+    if block is not None and pieces:
+        block = block.copy()
+        shift = width - (len(block).bit_length() - 1)
+        ids = np.concatenate([np.arange(lo >> shift, ((hi - 1) >> shift) + 1) for lo, hi, _, _ in pieces])
+        _fill_blocks(block, starts, links, None if len(ids) >= len(block) else ids)
+    return starts, links, block
+
+
+def lookup_many(starts: np.ndarray, links: np.ndarray, addrs: np.ndarray,
+                block: Optional[np.ndarray] = None) -> np.ndarray:
+    """Link index for every address in addrs (uint32 array)."""
+    if block is None:
+        idx = np.searchsorted(starts, addrs, side="right")
+        idx -= 1
+        return links[idx]
+    bits = len(block).bit_length() - 1
+    result = block[addrs >> np.uint32(32 - bits)]
+    pending = np.flatnonzero(result == NEEDS_SEARCH)
+    if pending.size:
+        result[pending] = lookup_many(starts, links, addrs[pending])
+    return result
+
+
+def lookup_one(starts: np.ndarray, links: np.ndarray, block: Optional[np.ndarray], addr: int) -> int:
+    """Link index for a single address."""
+    if block is not None:
+        link = int(block[addr >> (32 - (len(block).bit_length() - 1))])
+        if link != NEEDS_SEARCH:
+            return link
+    return int(links[starts.searchsorted(addr, side="right") - 1])
+
+
+def ips_to_uint32(ips: Sequence[str]) -> np.ndarray:
+    """Parse dotted-quad strings into a uint32 array in one pass."""
+    if not ips:
+        return np.zeros(0, dtype=np.uint32)
+    if set(map(str.count, ips, repeat('.'))) != {3}:
+        bad = next(ip for ip in ips if ip.count('.') != 3)
+        raise ValueError(f"Invalid IPv4 address: {bad}")
+    try:
+        with warnings.catch_warnings():
+            # older NumPy stops at a malformed octet with a warning; the size
+            # check below reports it
+            warnings.simplefilter("ignore", DeprecationWarning)
+            octets = np.fromstring('.'.join(ips), dtype=np.int64, sep='.')
+    except ValueError:
+        raise ValueError("Invalid IPv4 address in batch")
+    if octets.size != 4 * len(ips):
+        raise ValueError("Invalid IPv4 address in batch")
+    if octets.min() < 0 or octets.max() > 255:
+        raise ValueError("Invalid octet value in address batch")
+    octets = octets.reshape(-1, 4)
+    return ((octets[:, 0] << 24) | (octets[:, 1] << 16) | (octets[:, 2] << 8) | octets[:, 3]).astype(np.uint32)
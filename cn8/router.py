@@ -1,48 +1,280 @@
 
-from ip_utils import ip_to_binary, get_network_prefix
-from typing import List, Tuple
+import gc
+from bisect import bisect_right
+from ip_utils import ip_to_int, parse_cidr, prefix_mask
+from prefix_trie import PrefixTrie
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
 class Router:
-    def __init__(self, routes: List[Tuple[str, str]]):
-        self._forwarding_table = []  # list of tuples (binary_prefix, prefix_length, output_link)
+    BACKENDS = ("list", "trie")
+
+    def __init__(self, routes: List[Tuple[str, str]], backend: str = "list"):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown router backend: {backend}")
+        self._reset(backend)
         self.build_forwarding_table(routes)
 
+    def _reset(self, backend: str):
+        self.backend = backend
+        self._forwarding_table = []  # list of tuples (network, mask, prefix_length, output_link)
+        self._trie = None            # PrefixTrie used by the "trie" backend
+        self._snapshot = None        # FibSnapshot backing a router returned by load()
+        self._range_table = None     # (starts, link indices, block index) built on first route_many
+        self.links: List[str] = []   # distinct output links, indexed by route_many
+        self._link_ids = {}          # out_link -> index into self.links
+
+    @classmethod
+    def load(cls, path: str) -> "Router":
+        """
+        Open a snapshot written by save().  The table is memory-mapped, not
+        parsed; the first route update converts it to a "trie" router.
+        """
+        from fib_snapshot import load_snapshot
+
+        snapshot = load_snapshot(path)
+        router = cls.__new__(cls)
+        router._reset("snapshot")
+        router._snapshot = snapshot
+        router.links = list(snapshot.links)
+        router._link_ids = {link: i for i, link in enumerate(router.links)}
+        router._range_table = (snapshot.starts, snapshot.range_links, snapshot.block)
+        return router
+
+    def save(self, path: str):
+        """Write the compiled forwarding table to path for Router.load()."""
+        import numpy as np
+        from fib_snapshot import FibSnapshot, save_snapshot
+
+        link_ids = self._link_ids
+        networks, lengths, prefix_links = [], [], []
+        for network, length, out_link in self._prefixes():
+            networks.append(network)
+            lengths.append(length)
+            prefix_links.append(link_ids[out_link])
+        starts, links, block = self._compiled_range_table()
+        save_snapshot(path, FibSnapshot(
+            self.links,
+            np.array(networks, dtype=np.uint32),
+            np.array(lengths, dtype=np.uint8),
+            np.array(prefix_links, dtype=np.int32),
+            starts, links, block,
+        ))
+
     def build_forwarding_table(self, routes: List[Tuple[str, str]]):
+        self.links = list(dict.fromkeys(out_link for _, out_link in routes))
+        self._link_ids = {link: i for i, link in enumerate(self.links)}
+        self._range_table = None
+        if self.backend == "trie":
+            trie = PrefixTrie()
+            # millions of small trie nodes would otherwise trigger repeated
+            # full garbage-collector passes during the build
+            gc_was_enabled = gc.isenabled()
+            gc.disable()
+            try:
+                for cidr, out_link in routes:
+                    try:
+                        network, mask_len = parse_cidr(cidr)
+                    except Exception as e:
+                        raise ValueError(f"Error parsing route {cidr}: {e}")
+                    # first route for a prefix wins, as with the stable list sort
+                    trie.insert(network, mask_len, out_link, replace=False)
+            finally:
+                if gc_was_enabled:
+                    gc.enable()
+            self._trie = trie
+            return
         table = []
         for cidr, out_link in routes:
-            # get the binary prefix and length
+            # get the network address and prefix length
             try:
-                prefix_bits = get_network_prefix(cidr)
+                network, mask_len = parse_cidr(cidr)
             except Exception as e:
                 raise ValueError(f"Error parsing route {cidr}: {e}")
-            table.append((prefix_bits, len(prefix_bits), out_link))
+            table.append((network, prefix_mask(mask_len), mask_len, out_link))
         # sort by prefix length descending (longest first)
-        table.sort(key=lambda x: x[1], reverse=True)
+        table.sort(key=lambda x: x[2], reverse=True)
         self._forwarding_table = table
 
     def route_packet(self, dest_ip: str) -> str:
-        dest_bin = ip_to_binary(dest_ip)
-        for prefix_bits, prefix_len, out_link in self._forwarding_table:
-            if dest_bin.startswith(prefix_bits):
+        if self._snapshot is not None:
+            from range_table import lookup_one
+            i = lookup_one(*self._range_table, ip_to_int(dest_ip))
+            return "Default Gateway" if i < 0 else self.links[i]
+        if self._trie is not None:
+            out_link = self._trie.lookup(ip_to_int(dest_ip))
+            return "Default Gateway" if out_link is None else out_link
+        dest = ip_to_int(dest_ip)
+        for network, mask, prefix_len, out_link in self._forwarding_table:
+            if dest & mask == network:
                 return out_link
         return "Default Gateway"
 
+    def add_route(self, cidr: str, out_link: str):
+        self.apply_batch([(cidr, out_link)])
+
+    def withdraw_route(self, cidr: str) -> bool:
+        return self.apply_batch([(cidr, None)]) > 0
+
+    def apply_batch(self, updates: Iterable[Tuple[str, Optional[str]]]) -> int:
+        """
+        Apply (cidr, out_link) updates as one change; out_link None withdraws
+        the route, otherwise it replaces any route for the same prefix.
+        Lookups see either the table before the batch or after it, never a
+        partial batch.  Returns the number of routes changed.
+        """
+        changes = []
+        for cidr, out_link in updates:
+            try:
+                network, mask_len = parse_cidr(cidr)
+            except Exception as e:
+                raise ValueError(f"Error parsing route {cidr}: {e}")
+            if out_link is not None and out_link not in self._link_ids:
+                self._link_ids[out_link] = len(self.links)
+                self.links.append(out_link)
+            changes.append((network, mask_len, out_link))
+        if self._snapshot is not None:
+            self._thaw_snapshot()
+        if self._trie is not None:
+            # O(prefix length) path copy per update, published atomically
+            changed = self._trie.update(changes)
+            if self._range_table is not None:
+                self._range_table = self._patch_range_table(changes)
+            return changed
+        changed = self._update_list(changes)
+        self._range_table = None
+        return changed
+
+    def _thaw_snapshot(self):
+        """Rebuild a trie from the snapshot arrays so the table can change."""
+        trie = PrefixTrie()
+        links = self.links
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for network, length, link in zip(self._snapshot.networks.tolist(),
+                                             self._snapshot.lengths.tolist(),
+                                             self._snapshot.prefix_links.tolist()):
+                trie.insert(network, length, links[link], replace=False)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        self._trie = trie
+        self._snapshot = None
+        self.backend = "trie"
+
+    def _update_list(self, changes) -> int:
+        # the list backend copies the table once per batch and swaps it in
+        table = list(self._forwarding_table)
+        changed = 0
+        for network, mask_len, out_link in changes:
+            kept = [e for e in table if e[0] != network or e[2] != mask_len]
+            entry = (network, prefix_mask(mask_len), mask_len, out_link)
+            if out_link is None:
+                changed += len(kept) != len(table)
+            elif len(table) - len(kept) != 1 or entry not in table:
+                # keep the table sorted longest prefix first
+                kept.insert(bisect_right(kept, -mask_len, key=lambda e: -e[2]), entry)
+                changed += 1
+            else:
+                continue
+            table = kept
+        self._forwarding_table = table
+        return changed
+
+    def _patch_range_table(self, changes):
+        """Rebuild only the address ranges under the changed prefixes."""
+        from range_table import NO_ROUTE, build_range_piece, patch_range_table
+
+        link_ids = self._link_ids
+        pieces = []
+        end = -1
+        for network, mask_len in sorted({(network, mask_len) for network, mask_len, _ in changes}):
+            if network < end:
+                continue  # nested in the previous block, rebuilt with it
+            end = network + (1 << (32 - mask_len))
+            cover = self._trie.covering(network, mask_len)
+            nested = ((n, length, link_ids[link]) for n, length, link in self._trie.items(network, mask_len))
+            pieces.append(build_range_piece(nested, network, mask_len,
+                                            NO_ROUTE if cover is None else link_ids[cover]))
+        return patch_range_table(self._range_table, pieces)
+
+    def _prefixes(self) -> Iterator[Tuple[int, int, str]]:
+        """(network, length, out_link) for every route, in lookup priority order."""
+        if self._snapshot is not None:
+            links = self.links
+            for network, length, link in zip(self._snapshot.networks.tolist(),
+                                             self._snapshot.lengths.tolist(),
+                                             self._snapshot.prefix_links.tolist()):
+                yield network, length, links[link]
+            return
+        if self._trie is not None:
+            yield from self._trie.items()
+            return
+        for network, mask, prefix_len, out_link in self._forwarding_table:
+            yield network, prefix_len, out_link
+
+    def route_many(self, dest_ips: Union["np.ndarray", bytes, Sequence[str]]) -> "np.ndarray":
+        """
+        Route a batch of destinations at once.
+        dest_ips: uint32 array of addresses, a bytes buffer of packed 4-byte
+        network-order addresses, or a sequence of dotted-quad strings.
+        Returns an int32 array of indices into self.links; -1 means "Default Gateway".
+        """
+        import numpy as np
+        from range_table import ips_to_uint32, lookup_many
+
+        starts, links, block = self._compiled_range_table()
+        if isinstance(dest_ips, np.ndarray):
+            addrs = dest_ips.astype(np.uint32, copy=False)
+        elif isinstance(dest_ips, (bytes, bytearray, memoryview)):
+            addrs = np.frombuffer(dest_ips, dtype=">u4").astype(np.uint32)
+        else:
+            addrs = ips_to_uint32(dest_ips)
+        return lookup_many(starts, links, addrs, block)
+
+    def _compiled_range_table(self):
+        if self._range_table is None:
+            from range_table import build_block_index, build_range_table
+
+            link_index = self._link_ids
+            starts, links = build_range_table(
+                (network, length, link_index[out_link])
+                for network, length, out_link in self._prefixes()
+            )
+            self._range_table = (starts, links, build_block_index(starts, links))
+        return self._range_table
+
 
 # Test block for router
 if __name__ == "__main__":
+    import os
+    import tempfile
+
     routes = [
         ("223.1.1.0/24", "Link 0"),
         ("223.1.2.0/24", "Link 1"),
         ("223.1.3.0/24", "Link 2"),
         ("223.1.0.0/16", "Link 4 (ISP)")
     ]
-    r = Router(routes)
     tests = {
         "223.1.1.100": "Link 0",
         "223.1.2.5": "Link 1",
         "223.1.250.1": "Link 4 (ISP)",
         "198.51.100.1": "Default Gateway"
     }
-    for ip, expected in tests.items():
-        result = r.route_packet(ip)
-        print(ip, "->", result, "(expected:", expected, ")")
+    for backend in Router.BACKENDS:
+        r = Router(routes, backend=backend)
+        print(f"[{backend}]")
+        for ip, expected in tests.items():
+            result = r.route_packet(ip)
+            print(ip, "->", result, "(expected:", expected, ")")
+        batch = r.route_many(list(tests))
+        print("route_many:", [r.links[i] if i >= 0 else "Default Gateway" for i in batch])
+        r.apply_batch([("223.1.250.0/24", "Link 3"), ("223.1.1.0/24", None)])
+        print("after update: 223.1.250.1 ->", r.route_packet("223.1.250.1"),
+              "| 223.1.1.100 ->", r.route_packet("223.1.1.100"))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "router.fib")
+        r.save(path)
+        loaded = Router.load(path)
+        print("[snapshot]", {ip: loaded.route_packet(ip) for ip in tests})
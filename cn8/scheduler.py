@@ -1,7 +1,14 @@
+import random
+from abc import ABC, abstractmethod
+from array import array
+from collections import deque
 from dataclasses import dataclass
-from typing import List
+from heapq import heappop, heappush, heapreplace
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Union
 
-@dataclass
+from ip_utils import int_to_ip, ip_to_int
+
+@dataclass(slots=True)
 class Packet:
     source_ip: str
     dest_ip: str
@@ -14,6 +21,543 @@ def fifo_scheduler(packet_list: List[Packet]) -> List[Packet]:
 def priority_scheduler(packet_list: List[Packet]) -> List[Packet]:
     return sorted(packet_list, key=lambda p: p.priority)
 
+
+class PacketBuffer:
+    """
+    Columnar packet store: one typed array per header field and every payload
+    in one shared bytearray, so a packet costs its payload plus 13 bytes
+    instead of a Python object per field.  Packets are addressed by index.
+    The buffer is append-only; clear() it once its packets have been sent.
+    Payload offsets are uint32, so it holds up to 4 GiB of payload.
+    """
+
+    def __init__(self):
+        self.sources = array("I")       # uint32 addresses
+        self.dests = array("I")
+        self.priorities = array("B")    # uint8 class
+        self.offsets = array("I", [0])  # payload i is data[offsets[i]:offsets[i + 1]]
+        self.data = bytearray()
+
+    def __len__(self) -> int:
+        return len(self.priorities)
+
+    def append(self, source_ip: str, dest_ip: str, payload: Union[str, bytes], priority: int) -> int:
+        """Store a packet and return its index.  Raises ValueError, storing nothing, on bad input."""
+        if isinstance(payload, str):
+            payload = payload.encode()
+        source, dest = ip_to_int(source_ip), ip_to_int(dest_ip)
+        if not 0 <= priority <= 255:
+            raise ValueError(f"Invalid priority: {priority}")
+        end = len(self.data) + len(payload)
+        if end > 0xFFFFFFFF:
+            raise ValueError(f"PacketBuffer full: {end} bytes of payload exceed 4 GiB")
+        # every column grows together: only this first append can still fail (a non-int priority)
+        self.priorities.append(priority)
+        self.sources.append(source)
+        self.dests.append(dest)
+        self.data += payload
+        self.offsets.append(end)
+        return len(self.priorities) - 1
+
+    def append_packet(self, packet: Packet) -> int:
+        return self.append(packet.source_ip, packet.dest_ip, packet.payload, packet.priority)
+
+    def payload_length(self, index: int) -> int:
+        return self.offsets[index + 1] - self.offsets[index]
+
+    def payload(self, index: int) -> bytes:
+        return bytes(self.data[self.offsets[index]:self.offsets[index + 1]])
+
+    def packet(self, index: int) -> Packet:
+        return Packet(int_to_ip(self.sources[index]), int_to_ip(self.dests[index]),
+                      self.payload(index).decode(), self.priorities[index])
+
+    def clear(self):
+        self.__init__()
+
+
+class ArrayQueue:
+    """FIFO of numbers in a typed array: a fixed 2 to 8 bytes per entry."""
+
+    __slots__ = ("_items", "_head")
+
+    def __init__(self, typecode: str = "I"):
+        self._items = array(typecode)
+        self._head = 0
+
+    def __len__(self) -> int:
+        return len(self._items) - self._head
+
+    def __getitem__(self, i: int):
+        return self._items[self._head + i]
+
+    def append(self, value):
+        self._items.append(value)
+
+    def popleft(self):
+        items = self._items
+        head = self._head
+        value = items[head]
+        head += 1
+        # drop the consumed prefix once it is at least half the array
+        if head * 2 >= len(items) and (head >= 1024 or head == len(items)):
+            del items[:head]
+            head = 0
+        self._head = head
+        return value
+
+
+# Streaming schedulers: packets are enqueued and dequeued one at a time, so
+# the queue can be fed continuously instead of from a complete batch.
+
+# default share of the link per priority class for DRR and WFQ
+DEFAULT_WEIGHTS = {0: 4, 1: 2, 2: 1}
+MAX_PACKET_BYTES = 65535  # an IP packet's total length is a 16-bit field
+
+
+class StreamScheduler(ABC):
+    """
+    Abstract base class for the streaming schedulers, which implement
+    push() and dequeue().
+    enqueue() takes a Packet; push() takes any item with an explicit class
+    and size in bytes, for callers that keep packets in another form.
+    With compact=True items must be PacketBuffer indices (any uint32) and
+    are queued in typed arrays instead of deques; see enqueue_from().
+    push() queues the item before touching any other state, so an item that
+    does not fit the array (OverflowError) leaves the scheduler unchanged.
+    """
+
+    def __init__(self, compact: bool = False):
+        self.compact = compact
+        self._queues: Dict[int, Any] = {}  # class -> FIFO of items
+        self._len = 0
+        self.last_class: Optional[int] = None  # class of the last dequeued item
+
+    def __len__(self) -> int:
+        return self._len
+
+    def _new_queue(self, typecode: str = "I"):
+        return ArrayQueue(typecode) if self.compact else deque()
+
+    def enqueue(self, packet: Packet):
+        self.push(packet, packet.priority, len(packet.payload))
+
+    def enqueue_from(self, buffer: PacketBuffer, index: int):
+        """Queue packet index of buffer; dequeue() then returns the index."""
+        self.push(index, buffer.priorities[index], buffer.payload_length(index))
+
+    @abstractmethod
+    def push(self, item: Any, cls: int, size: int):
+        """Queue item as a packet of class cls and size bytes."""
+
+    @abstractmethod
+    def dequeue(self) -> Optional[Any]:
+        """Next item to transmit, or None when the scheduler is empty."""
+
+    def drain(self) -> Iterator[Any]:
+        while self._len:
+            yield self.dequeue()
+
+
+def _check_weights(weights: Dict[int, float]) -> Dict[int, float]:
+    for cls, weight in weights.items():
+        if weight <= 0:
+            raise ValueError(f"Invalid weight for class {cls}: {weight}")
+    return dict(weights)
+
+
+class StrictPriorityScheduler(StreamScheduler):
+    """
+    Lowest priority value first, FIFO within a class.  A heap over the
+    backlogged classes picks the next queue, so each packet costs
+    O(log classes).
+    """
+
+    def __init__(self, compact: bool = False):
+        super().__init__(compact)
+        self._active = []  # heap of classes with queued packets
+
+    def push(self, item: Any, cls: int, size: int = 0):
+        queue = self._queues.get(cls)
+        if queue is None:
+            queue = self._queues[cls] = self._new_queue()
+        queue.append(item)
+        if len(queue) == 1:
+            heappush(self._active, cls)
+        self._len += 1
+
+    def dequeue(self) -> Optional[Any]:
+        if not self._active:
+            return None
+        cls = self.last_class = self._active[0]
+        queue = self._queues[cls]
+        item = queue.popleft()
+        if not queue:
+            heappop(self._active)
+        self._len -= 1
+        return item
+
+
+class DRRScheduler(StreamScheduler):
+    """
+    Deficit Round Robin.  Each backlogged class receives quantum * weight
+    bytes of credit per round and sends packets while its credit covers the
+    head packet, so bandwidth is shared by weight whatever the packet sizes.
+    O(1) per packet when the quantum is at least the largest packet.
+    """
+
+    def __init__(self, weights: Optional[Dict[int, float]] = None, quantum: int = 1500,
+                 compact: bool = False):
+        super().__init__(compact)
+        if quantum <= 0:
+            raise ValueError(f"Invalid quantum: {quantum}")
+        self.weights = _check_weights(DEFAULT_WEIGHTS if weights is None else weights)
+        self.quantum = quantum
+        self._sizes: Dict[int, Any] = {}  # class -> packet sizes, parallel to _queues
+        self._deficit: Dict[int, float] = {}
+        self._active = deque()            # backlogged classes in round order
+        self._credited = False            # head of _active got its quantum this turn
+
+    def push(self, item: Any, cls: int, size: int):
+        if self.compact and not 0 <= size <= MAX_PACKET_BYTES:
+            raise ValueError(f"Invalid packet size: {size} (at most {MAX_PACKET_BYTES} bytes)")
+        queue = self._queues.get(cls)
+        if queue is None:
+            queue = self._queues[cls] = self._new_queue()
+            self._sizes[cls] = self._new_queue("H")  # sizes fit uint16, see MAX_PACKET_BYTES
+            self._deficit[cls] = 0
+        queue.append(item)
+        self._sizes[cls].append(size)
+        if len(queue) == 1:
+            self._active.append(cls)
+        self._len += 1
+
+    def dequeue(self) -> Optional[Any]:
+        active = self._active
+        deficit = self._deficit
+        while active:
+            cls = active[0]
+            sizes = self._sizes[cls]
+            size = sizes[0]
+            if deficit[cls] >= size:
+                deficit[cls] -= size
+                sizes.popleft()
+                queue = self._queues[cls]
+                item = queue.popleft()
+                self._len -= 1
+                self.last_class = cls
+                if not queue:
+                    # an idle class does not bank credit
+                    deficit[cls] = 0
+                    active.popleft()
+                    self._credited = False
+                return item
+            if self._credited:
+                active.rotate(-1)
+                self._credited = False
+            else:
+                deficit[cls] += self.quantum * self.weights.get(cls, 1)
+                self._credited = True
+        return None
+
+
+class WFQScheduler(StreamScheduler):
+    """
+    Weighted Fair Queuing with self-clocked virtual time: a packet's finish
+    tag is max(virtual time, class's last finish tag) + size / weight, and
+    packets leave in finish-tag order (lower class first on ties).  Tags rise
+    within a class, so only each class's head sits in the heap:
+    O(log classes) per packet.
+    """
+
+    def __init__(self, weights: Optional[Dict[int, float]] = None, compact: bool = False):
+        super().__init__(compact)
+        self.weights = _check_weights(DEFAULT_WEIGHTS if weights is None else weights)
+        self._tags: Dict[int, Any] = {}      # class -> finish tags, parallel to _queues
+        self._heads = []                     # heap of (head finish tag, class)
+        self._vtime = 0.0
+        self._finish: Dict[int, float] = {}  # last finish tag per class
+
+    def push(self, item: Any, cls: int, size: int):
+        queue = self._queues.get(cls)
+        if queue is None:
+            queue = self._queues[cls] = self._new_queue()
+            self._tags[cls] = self._new_queue("d")
+        start = self._finish.get(cls, 0.0)
+        if start < self._vtime:
+            start = self._vtime
+        finish = start + size / self.weights.get(cls, 1)
+        queue.append(item)
+        self._tags[cls].append(finish)
+        self._finish[cls] = finish
+        if len(queue) == 1:
+            heappush(self._heads, (finish, cls))
+        self._len += 1
+
+    def dequeue(self) -> Optional[Any]:
+        if not self._heads:
+            return None
+        finish, cls = self._heads[0]
+        self.last_class = cls
+        queue = self._queues[cls]
+        tags = self._tags[cls]
+        item = queue.popleft()
+        tags.popleft()
+        if queue:
+            heapreplace(self._heads, (tags[0], cls))
+        else:
+            heappop(self._heads)
+        self._len -= 1
+        if self._len:
+            self._vtime = finish
+        else:
+            # system idle: every tag is in the past, restart the clock
+            self._vtime = 0.0
+            self._finish.clear()
+        return item
+
+
+# Simulated output port: per-class admission (tail drop, RED), optional
+# token-bucket shaping per class, then the scheduler and the line.
+
+class TokenBucket:
+    """rate bytes/s refilled up to burst bytes; a packet needs size tokens."""
+
+    __slots__ = ("rate", "burst", "tokens", "stamp")
+
+    def __init__(self, rate: float, burst: float):
+        if rate <= 0 or burst <= 0:
+            raise ValueError(f"Invalid token bucket: rate={rate}, burst={burst}")
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.stamp = 0.0  # time of the last take()
+
+    def ready_at(self, size: int) -> float:
+        """Earliest time size tokens are available."""
+        if self.tokens >= size:
+            return self.stamp
+        return self.stamp + (size - self.tokens) / self.rate
+
+    def take(self, size: int, now: float):
+        tokens = self.tokens + (now - self.stamp) * self.rate
+        self.tokens = (tokens if tokens < self.burst else self.burst) - size
+        self.stamp = now
+
+
+class RedConfig(NamedTuple):
+    min_th: float        # average depth (packets) where early drops start
+    max_th: float        # average depth where every arrival is dropped
+    max_p: float = 0.1   # drop probability reached at max_th
+    weight: float = 0.002  # EWMA weight of the instantaneous depth
+
+
+class PortTelemetry:
+    """
+    Per-class counters and sojourn-time histograms for an OutputPort, kept
+    in arrays allocated up front so recording a packet allocates nothing.
+    Sojourn is the time from arrival until transmission starts.  Histogram
+    bin 0 counts sojourns under resolution seconds and bin k those in
+    [resolution * 2**(k-1), resolution * 2**k); the last bin is open-ended.
+    Subclasses can extend the record_* hooks to export events elsewhere.
+    """
+
+    def __init__(self, classes: int = 3, bins: int = 32, resolution: float = 1e-6):
+        self.classes = classes
+        self.bins = bins
+        self.resolution = resolution
+        self.enqueued = array("Q", [0]) * classes
+        self.sent = array("Q", [0]) * classes
+        self.bytes_sent = array("Q", [0]) * classes
+        self.tail_drops = array("Q", [0]) * classes
+        self.red_drops = array("Q", [0]) * classes
+        self.depth = array("Q", [0]) * classes       # packets queued now
+        self.max_depth = array("Q", [0]) * classes
+        self.depth_area = array("d", [0.0]) * classes  # integral of depth over time
+        self._stamp = array("d", [0.0]) * classes
+        self.sojourn_total = array("d", [0.0]) * classes
+        self.histogram = array("Q", [0]) * (classes * bins)  # row per class
+
+    def _set_depth(self, cls: int, now: float, depth: int):
+        self.depth_area[cls] += self.depth[cls] * (now - self._stamp[cls])
+        self._stamp[cls] = now
+        self.depth[cls] = depth
+        if depth > self.max_depth[cls]:
+            self.max_depth[cls] = depth
+
+    def record_enqueue(self, cls: int, now: float, depth: int):
+        self.enqueued[cls] += 1
+        self._set_depth(cls, now, depth)
+
+    def record_dequeue(self, cls: int, now: float, depth: int, sojourn: float, size: int):
+        self.sent[cls] += 1
+        self.bytes_sent[cls] += size
+        self.sojourn_total[cls] += sojourn
+        b = int(sojourn / self.resolution).bit_length()
+        self.histogram[cls * self.bins + (b if b < self.bins else self.bins - 1)] += 1
+        self._set_depth(cls, now, depth)
+
+    def record_drop(self, cls: int, now: float, red: bool):
+        if red:
+            self.red_drops[cls] += 1
+        else:
+            self.tail_drops[cls] += 1
+
+    def mean_depth(self, cls: int, now: float) -> float:
+        area = self.depth_area[cls] + self.depth[cls] * (now - self._stamp[cls])
+        return area / now if now > 0 else 0.0
+
+    def sojourn_percentile(self, cls: int, q: float) -> float:
+        """Upper edge of the histogram bin holding the q-th percentile (0-100)."""
+        row = self.histogram[cls * self.bins:(cls + 1) * self.bins]
+        target = q / 100 * sum(row)
+        seen = 0
+        for b, count in enumerate(row):
+            seen += count
+            if count and seen >= target:
+                return self.resolution * (1 << b) if b < self.bins - 1 else float("inf")
+        return 0.0
+
+    def summary(self, now: float) -> List[Dict[str, float]]:
+        """Per-class report, one dict per class."""
+        return [{
+            "class": c,
+            "enqueued": self.enqueued[c],
+            "sent": self.sent[c],
+            "bytes_sent": self.bytes_sent[c],
+            "tail_drops": self.tail_drops[c],
+            "red_drops": self.red_drops[c],
+            "depth": self.depth[c],
+            "max_depth": self.max_depth[c],
+            "mean_depth": self.mean_depth(c, now),
+            "mean_sojourn": self.sojourn_total[c] / self.sent[c] if self.sent[c] else 0.0,
+            "p50_sojourn": self.sojourn_percentile(c, 50),
+            "p99_sojourn": self.sojourn_percentile(c, 99),
+        } for c in range(self.classes)]
+
+
+class OutputPort:
+    """
+    Output link of rate bytes/s on a simulated clock.  An arriving packet of
+    class c is tail-dropped when c already has queue_limit packets queued,
+    or dropped early by RED on c's average depth; a class with a token
+    bucket in shapers is held until the bucket allows it, then competes in
+    the scheduler.  Classes are 0 .. telemetry.classes - 1.
+
+    Time only moves forward: arrive() first runs every release and
+    transmission due before the arrival; advance() runs them up to a time.
+    on_depart(item, departure_time) is called as each packet finishes.
+    """
+
+    def __init__(self, scheduler: StreamScheduler, rate: float,
+                 shapers: Optional[Dict[int, TokenBucket]] = None,
+                 queue_limit: int = 1000, red: Optional[RedConfig] = None,
+                 telemetry: Optional[PortTelemetry] = None,
+                 on_depart: Optional[Callable[[Any, float], None]] = None, seed: int = 0):
+        if rate <= 0:
+            raise ValueError(f"Invalid port rate: {rate}")
+        self.scheduler = scheduler
+        self.rate = rate
+        self.telemetry = telemetry if telemetry is not None else PortTelemetry()
+        classes = self.telemetry.classes
+        self.shapers: List[Optional[TokenBucket]] = [None] * classes
+        for cls, bucket in (shapers or {}).items():
+            self.shapers[cls] = bucket
+        self.queue_limit = queue_limit
+        self.red = red
+        self.on_depart = on_depart
+        self.now = 0.0
+        self._rng = random.Random(seed)
+        self._red_avg = [0.0] * classes
+        # per class, every queued packet in arrival order; the newest
+        # _held[c] of them are still waiting in the shaper
+        self._arrivals = [ArrayQueue("d") for _ in range(classes)]
+        self._sizes = [ArrayQueue("I") for _ in range(classes)]
+        self._shaped = [deque() for _ in range(classes)]
+        self._held = [0] * classes
+        self._link_free = 0.0  # time the line finishes the current packet
+
+    def send(self, packet: Packet, now: float) -> bool:
+        return self.arrive(now, packet, packet.priority, len(packet.payload))
+
+    def arrive(self, now: float, item: Any, cls: int, size: int) -> bool:
+        """Offer a packet at time now; returns False if it was dropped."""
+        if now < self.now:
+            raise ValueError(f"Arrival at {now} is before the port clock {self.now}")
+        bucket = self.shapers[cls]
+        if bucket is not None and size > bucket.burst:
+            raise ValueError(f"Packet of {size} bytes exceeds the class {cls} burst size")
+        self.advance(now)
+        telemetry = self.telemetry
+        arrivals = self._arrivals[cls]
+        depth = len(arrivals)
+        if depth >= self.queue_limit:
+            telemetry.record_drop(cls, now, False)
+            return False
+        red = self.red
+        if red is not None:
+            avg = self._red_avg[cls] = (1 - red.weight) * self._red_avg[cls] + red.weight * depth
+            if avg >= red.max_th or (avg > red.min_th and self._rng.random() <
+                                     red.max_p * (avg - red.min_th) / (red.max_th - red.min_th)):
+                telemetry.record_drop(cls, now, True)
+                return False
+        telemetry.record_enqueue(cls, now, depth + 1)
+        arrivals.append(now)
+        self._sizes[cls].append(size)
+        if bucket is None:
+            self._schedule(item, cls, size, now)
+        else:
+            self._shaped[cls].append(item)
+            self._held[cls] += 1
+        return True
+
+    def _schedule(self, item: Any, cls: int, size: int, now: float):
+        if not len(self.scheduler) and self._link_free < now:
+            self._link_free = now  # idle line starts on this packet
+        self.scheduler.push(item, cls, size)
+
+    def advance(self, until: float = float("inf")):
+        """Run shaper releases and transmissions due at or before until."""
+        scheduler = self.scheduler
+        telemetry = self.telemetry
+        inf = float("inf")
+        while True:
+            release, release_cls = inf, -1
+            for cls, held in enumerate(self._held):
+                if held:
+                    sizes = self._sizes[cls]
+                    i = len(sizes) - held
+                    t = self.shapers[cls].ready_at(sizes[i])
+                    if t < self._arrivals[cls][i]:
+                        t = self._arrivals[cls][i]
+                    if t < release:
+                        release, release_cls = t, cls
+            send = self._link_free if len(scheduler) else inf
+            t = release if release <= send else send
+            if t > until or t == inf:
+                break
+            self.now = t
+            if release <= send:
+                cls = release_cls
+                sizes = self._sizes[cls]
+                size = sizes[len(sizes) - self._held[cls]]
+                self.shapers[cls].take(size, t)
+                self._held[cls] -= 1
+                self._schedule(self._shaped[cls].popleft(), cls, size, t)
+            else:
+                item = scheduler.dequeue()
+                cls = scheduler.last_class
+                arrivals = self._arrivals[cls]
+                sojourn = t - arrivals.popleft()
+                size = self._sizes[cls].popleft()
+                self._link_free = t + size / self.rate
+                telemetry.record_dequeue(cls, t, len(arrivals), sojourn, size)
+                if self.on_depart is not None:
+                    self.on_depart(item, self._link_free)
+        if until != inf:
+            self.now = until
+
+
 # Test block for scheduler
 if __name__ == "__main__":
     packets = [
@@ -29,3 +573,23 @@ if __name__ == "__main__":
 
     prio_out = priority_scheduler(packets)
     print("Priority order:", [p.payload for p in prio_out])
+
+    for scheduler in (StrictPriorityScheduler(), DRRScheduler(quantum=8), WFQScheduler()):
+        for p in packets:
+            scheduler.enqueue(p)
+        print(f"{type(scheduler).__name__} order:", [p.payload for p in scheduler.drain()])
+
+    buffer = PacketBuffer()
+    scheduler = WFQScheduler(compact=True)
+    for p in packets:
+        scheduler.enqueue_from(buffer, buffer.append_packet(p))
+    print("WFQScheduler over PacketBuffer:", [buffer.packet(i).payload for i in scheduler.drain()])
+
+    port = OutputPort(WFQScheduler(), rate=1000, shapers={1: TokenBucket(rate=100, burst=20)})
+    departures = []
+    port.on_depart = lambda p, t: departures.append(f"{p.payload} @{t:.3f}s")
+    for t, p in enumerate(packets):
+        port.send(p, t * 0.001)
+    port.advance()
+    print("OutputPort departures:", departures)
+    print("Class 1 telemetry:", port.telemetry.summary(port.now)[1])
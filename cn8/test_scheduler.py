@@ -0,0 +1,68 @@
+# test_scheduler.py
+"""Compact scheduler queues and PacketBuffer input checks.  Run with pytest."""
+
+import random
+
+import pytest
+
+from scheduler import (MAX_PACKET_BYTES, DRRScheduler, PacketBuffer, StrictPriorityScheduler,
+                       WFQScheduler)
+
+SCHEDULERS = (StrictPriorityScheduler, DRRScheduler, WFQScheduler)
+
+
+def fill(buffer, n, seed=4):
+    rng = random.Random(seed)
+    for i in range(n):
+        buffer.append(f"10.0.{i % 256}.1", "10.1.0.1", "x" * rng.choice((64, 576, 1500)), rng.randrange(3))
+
+
+@pytest.mark.parametrize("cls", SCHEDULERS)
+def test_compact_matches_deques(cls):
+    buffer = PacketBuffer()
+    fill(buffer, 500)
+    compact, plain = cls(compact=True), cls()
+    for i in range(len(buffer)):
+        compact.enqueue_from(buffer, i)
+        plain.push(i, buffer.priorities[i], buffer.payload_length(i))
+    assert list(compact.drain()) == list(plain.drain())
+    assert len(compact) == 0 and compact.dequeue() is None
+
+
+@pytest.mark.parametrize("cls", SCHEDULERS)
+def test_compact_rejected_item_leaves_scheduler_unchanged(cls):
+    scheduler = cls(compact=True)
+    scheduler.push(7, 0, 100)
+    with pytest.raises(OverflowError):
+        scheduler.push(-1, 0, 100)  # not a uint32 index
+    assert len(scheduler) == 1
+    assert list(scheduler.drain()) == [7]
+
+
+def test_compact_drr_rejects_oversized_packet():
+    scheduler = DRRScheduler(compact=True)
+    with pytest.raises(ValueError):
+        scheduler.push(0, 0, MAX_PACKET_BYTES + 1)
+    assert len(scheduler) == 0 and scheduler.dequeue() is None
+    scheduler.push(1, 0, MAX_PACKET_BYTES)
+    assert list(scheduler.drain()) == [1]
+
+
+@pytest.mark.parametrize("args", [
+    ("1.1.1.1", "2.2.2.2", "x", 300),
+    ("1.1.1.1", "2.2.2.2", "x", -1),
+    ("1.1.1.1", "2.2.2.2", "x", 1.5),
+    ("1.1.1.256", "2.2.2.2", "x", 1),
+    ("1.1.1.1", "not an ip", "x", 1),
+])
+def test_bad_packet_stores_nothing(args):
+    buffer = PacketBuffer()
+    buffer.append("5.5.5.5", "6.6.6.6", "first", 0)
+    with pytest.raises((ValueError, TypeError)):
+        buffer.append(*args)
+    assert len(buffer) == 1
+    assert len(buffer.sources) == len(buffer.dests) == 1 and len(buffer.offsets) == 2
+    i = buffer.append("9.9.9.9", "8.8.8.8", "y", 1)
+    assert i == 1
+    packet = buffer.packet(i)
+    assert (packet.source_ip, packet.dest_ip, packet.payload, packet.priority) == ("9.9.9.9", "8.8.8.8", "y", 1)
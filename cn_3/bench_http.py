@@ -0,0 +1,161 @@
+"""
+Load generator for httpserver.py: each server mode runs in its own process
+and is hit by N concurrent keep-alive connections (asyncio clients) that
+share TOTAL GET / requests, for at most TIMEOUT seconds (connections still
+running then count as errors).  Reports requests/sec and the median and p99
+latency, measured from sending a request (or connecting, for a
+connection's first one) to reading the whole response.
+
+Usage: python bench_http.py [mode ...] [connections ...] [pipeline=N] [conditional]
+  e.g. python bench_http.py pool threaded 1 100 1000 pipeline=4
+All modes and 1, 100, 1000 connections by default.  With pipeline=N each
+connection sends N requests before reading the responses; the HTTP/1.0
+single server answers one and closes, so the rest are sent again.
+"conditional" sends If-None-Match with the page's ETag, so every answer
+is a 304.
+"""
+
+import asyncio
+import http.client
+import multiprocessing
+import os
+import socket
+import sys
+import time
+
+from httpserver import MODES, make_server
+
+TOTAL = 4000
+TIMEOUT = 60
+REQUEST = b"GET / HTTP/1.1\r\nHost: localhost\r\n\r\n"
+
+
+def serve(mode: str, port: int):
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    sys.stderr = open(os.devnull, "w")  # no request log
+    with make_server(mode, ("127.0.0.1", port)) as httpd:
+        httpd.serve_forever()
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(mode: str):
+    port = free_port()
+    proc = multiprocessing.Process(target=serve, args=(mode, port), daemon=True)
+    proc.start()
+    deadline = time.monotonic() + 10
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return proc, port
+        except OSError:
+            if time.monotonic() > deadline:
+                proc.terminate()
+                raise
+            time.sleep(0.05)
+
+
+async def read_response(reader) -> bool:
+    """Read one response; True if the server keeps the connection open."""
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+    headers = {}
+    for line in head[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    await reader.readexactly(int(headers.get("content-length", 0)))
+    return head[0].startswith("HTTP/1.1") and headers.get("connection", "").lower() != "close"
+
+
+def etag(port: int) -> str:
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    conn.request("GET", "/")
+    response = conn.getresponse()
+    response.read()
+    conn.close()
+    return response.getheader("ETag")
+
+
+async def client(port: int, request: bytes, requests: int, pipeline: int, latencies: list):
+    while requests:
+        start = time.perf_counter()
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        try:
+            keep_alive = True
+            while requests and keep_alive:
+                batch = min(pipeline, requests)
+                writer.write(request * batch)
+                await writer.drain()
+                for _ in range(batch):
+                    keep_alive = await read_response(reader)
+                    latencies.append(time.perf_counter() - start)
+                    requests -= 1
+                    if not keep_alive:
+                        break
+                start = time.perf_counter()
+        finally:
+            writer.close()
+
+
+async def load(port: int, request: bytes, connections: int, pipeline: int):
+    latencies = []
+    share, extra = divmod(TOTAL, connections)
+    tasks = [asyncio.create_task(client(port, request, share + (i < extra), pipeline, latencies))
+             for i in range(connections)]
+    done, pending = await asyncio.wait(tasks, timeout=TIMEOUT)
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+    # connections that failed, or had not finished by TIMEOUT
+    errors = len(pending) + sum(task.exception() is not None for task in done)
+    return latencies, errors
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else float("nan")
+
+
+def run(modes, connection_counts, pipeline=1, conditional=False):
+    print(f"{'mode':<9} {'conns':>6} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>9}")
+    for mode in modes:
+        proc, port = start_server(mode)
+        try:
+            request = REQUEST
+            if conditional:
+                request = REQUEST[:-2] + f"If-None-Match: {etag(port)}\r\n\r\n".encode()
+            for connections in connection_counts:
+                t0 = time.perf_counter()
+                latencies, errors = asyncio.run(load(port, request, connections, pipeline))
+                elapsed = time.perf_counter() - t0
+                print(f"{mode:<9} {connections:>6} {len(latencies):>9} {errors:>7} "
+                      f"{len(latencies) / elapsed:>9.0f} {percentile(latencies, 0.5) * 1000:>8.2f} "
+                      f"{percentile(latencies, 0.99) * 1000:>9.2f}")
+        finally:
+            proc.terminate()
+            proc.join()
+
+
+def parse(args):
+    """(modes, connection counts, pipeline depth, conditional) from command-line words."""
+    modes, counts, pipeline, conditional = [], [], 1, False
+    for arg in args:
+        if arg.isdigit():
+            counts.append(int(arg))
+        elif arg.startswith("pipeline="):
+            pipeline = int(arg.split("=", 1)[1])
+        elif arg == "conditional":
+            conditional = True
+        elif arg in MODES:
+            modes.append(arg)
+        else:
+            raise ValueError(f"Unknown argument: {arg}")
+    return modes or list(MODES), counts or [1, 100, 1000], pipeline, conditional
+
+
+if __name__ == "__main__":
+    run(*parse(sys.argv[1:]))
@@ -1,55 +1,168 @@
+"""
+Caching HTTP server: ETag / Last-Modified revalidation for every file, with
+contents, ETags and dates kept in an LRU FileCache (CACHE_BYTES), so a 304
+costs a stat and no reading or hashing.
+
+Usage: python httpserver.py [single|threaded|pool] [workers]
+  single    one connection at a time (socketserver.TCPServer), HTTP/1.0
+  threaded  a thread per connection (http.server.ThreadingHTTPServer)
+  pool      a bounded pool of worker threads, one connection each (default)
+
+The threaded and pool servers speak HTTP/1.1: connections are kept alive
+and pipelined requests are answered in order.  A connection idle for
+KEEPALIVE_TIMEOUT seconds is closed so it doesn't hold a pool worker.
+"""
+
 import http.server
+import mimetypes
 import socketserver
 import os
+import stat
+import sys
 import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from email.utils import formatdate, parsedate_to_datetime
 
 PORT = 8088
 FILE_PATH = "index.html"
+MODES = ("single", "threaded", "pool")
+WORKERS = 64
+KEEPALIVE_TIMEOUT = 5
+CACHE_BYTES = 64 * 2**20
 
-class CachingHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
+# content, ETag and Last-Modified of a file as of its (mtime_ns, size) stamp
+CachedFile = namedtuple("CachedFile", "stamp content etag last_modified mtime content_type")
 
-    def do_GET(self):
-        if self.path != "/":
-            return super().do_GET()
+class FileCache:
+    """
+    LRU cache of file contents, bounded by their total size.  get() costs one
+    stat while the file's mtime and size are unchanged; the file is read and
+    hashed again only when they change.
+    """
 
-        if not os.path.exists(FILE_PATH):
-            self.send_error(404, "File not found")
-            return
+    def __init__(self, max_bytes=CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
 
-        with open(FILE_PATH, "rb") as f:
+    def get(self, path):
+        """path's CachedFile; None for directories and files bigger than the cache.  Raises OSError."""
+        st = os.stat(path)
+        if not stat.S_ISREG(st.st_mode) or st.st_size > self.max_bytes:
+            return None
+        stamp = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.stamp == stamp:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry
+        with open(path, "rb") as f:
             content = f.read()
+        entry = CachedFile(stamp, content, hashlib.md5(content).hexdigest(),
+                           formatdate(st.st_mtime, usegmt=True), st.st_mtime,
+                           mimetypes.guess_type(path)[0] or "application/octet-stream")
+        with self._lock:
+            self.misses += 1
+            old = self._entries.pop(path, None)
+            if old is not None:
+                self.size -= len(old.content)
+            self._entries[path] = entry
+            self.size += len(content)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted.content)
+        return entry
+
+FILE_CACHE = FileCache()
+
+class CachingHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    timeout = KEEPALIVE_TIMEOUT
+    # headers and body go out in separate writes; don't let Nagle hold the body back
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.send_cached(body=True)
 
-        # Generate ETag
-        etag = hashlib.md5(content).hexdigest()
+    def do_HEAD(self):
+        self.send_cached(body=False)
 
-        # Last-Modified
-        last_modified = formatdate(os.path.getmtime(FILE_PATH), usegmt=True)
+    def send_cached(self, body):
+        path = FILE_PATH if self.path == "/" else self.translate_path(self.path)
+        try:
+            entry = FILE_CACHE.get(path)
+        except OSError:
+            self.send_error(404, "File not found")
+            return
+        if entry is None:
+            # a directory (listing or index redirect) or a file too big to cache: streamed as before
+            return super().do_GET() if body else super().do_HEAD()
 
         # Client headers
         client_etag = self.headers.get("If-None-Match")
         client_modified = self.headers.get("If-Modified-Since")
+        try:
+            not_modified_since = client_modified and \
+                parsedate_to_datetime(client_modified).timestamp() >= entry.mtime
+        except (TypeError, ValueError):
+            not_modified_since = False  # unparsable date: ignore it
 
-        if client_etag == etag or (
-            client_modified and parsedate_to_datetime(client_modified).timestamp()
-            >= os.path.getmtime(FILE_PATH)
-        ):
+        if client_etag == entry.etag or not_modified_since:
             self.send_response(304)
-            self.send_header("ETag", etag)
-            self.send_header("Last-Modified", last_modified)
+            self.send_header("ETag", entry.etag)
+            self.send_header("Last-Modified", entry.last_modified)
             self.end_headers()
             return
 
         self.send_response(200)
-        self.send_header("Content-Type", "text/html")
-        self.send_header("Content-Length", str(len(content)))
-        self.send_header("ETag", etag)
-        self.send_header("Last-Modified", last_modified)
+        self.send_header("Content-Type", entry.content_type)
+        self.send_header("Content-Length", str(len(entry.content)))
+        self.send_header("ETag", entry.etag)
+        self.send_header("Last-Modified", entry.last_modified)
         self.end_headers()
-        self.wfile.write(content)
+        if body:
+            self.wfile.write(entry.content)
+
+class HTTP10CachingHandler(CachingHTTPRequestHandler):
+    # a kept-alive connection would block every other client of the single server
+    protocol_version = "HTTP/1.0"
+
+class ThreadingServer(http.server.ThreadingHTTPServer):
+    request_queue_size = 1024
+
+class PooledHTTPServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    """Connections are handled by a fixed pool of threads; the rest wait their turn."""
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, server_address, handler_class, workers=WORKERS):
+        super().__init__(server_address, handler_class)
+        self.pool = ThreadPoolExecutor(workers, thread_name_prefix="http")
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self.process_request_thread, request, client_address)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+def make_server(mode="pool", address=("", PORT), workers=WORKERS):
+    if mode == "single":
+        return socketserver.TCPServer(address, HTTP10CachingHandler)
+    if mode == "threaded":
+        return ThreadingServer(address, CachingHTTPRequestHandler)
+    if mode == "pool":
+        return PooledHTTPServer(address, CachingHTTPRequestHandler, workers)
+    raise ValueError(f"Unknown server mode: {mode} (expected one of {', '.join(MODES)})")
 
 if __name__ == "__main__":
-    with socketserver.TCPServer(("", PORT), CachingHTTPRequestHandler) as httpd:
-        print(f"Serving on port {PORT}")
+    mode = sys.argv[1] if len(sys.argv) > 1 else "pool"
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else WORKERS
+    with make_server(mode, workers=workers) as httpd:
+        print(f"Serving on port {PORT} ({mode})")
         httpd.serve_forever()
-